@@ -0,0 +1,61 @@
+"""End-to-end benchmarks of JsonProvider and Account flows against an in-process FakeNode."""
+from concurrent.futures import ThreadPoolExecutor
+
+import near_api
+from near_api.pipeline import TxPipeline
+
+from fake_node import FakeNode
+from harness import benchmark
+
+
+def _account(provider, account_id: str = "benchmark.near") -> 'near_api.account.Account':
+    signer = near_api.signer.Signer(account_id, near_api.signer.KeyPair(bytes(range(32))))
+    return near_api.account.Account(provider, signer)
+
+
+@benchmark("e2e")
+def bench_get_account(options):
+    with FakeNode(latency=options.latency) as node, near_api.providers.JsonProvider(node.url) as provider:
+        yield lambda: provider.get_account("alice.near")
+
+
+@benchmark("e2e", items=100)
+def bench_get_accounts_batch_100(options):
+    account_ids = ["account%d.near" % i for i in range(100)]
+    with FakeNode(latency=options.latency) as node, near_api.providers.JsonProvider(node.url) as provider:
+        yield lambda: provider.get_accounts(account_ids)
+
+
+@benchmark("e2e", items=64)
+def bench_get_account_16_threads(options):
+    with FakeNode(latency=options.latency) as node, near_api.providers.JsonProvider(node.url) as provider:
+        with ThreadPoolExecutor(16) as executor:
+            yield lambda: list(executor.map(lambda i: provider.get_account("account%d.near" % (i % 8)), range(64)))
+
+
+@benchmark("e2e")
+def bench_view_function(options):
+    with FakeNode(latency=options.latency) as node, near_api.providers.JsonProvider(node.url) as provider:
+        account = _account(provider)
+        yield lambda: account.view_function("contract.near", "get", {'key': "value"})
+
+
+@benchmark("e2e")
+def bench_send_money(options):
+    with FakeNode(latency=options.latency) as node, near_api.providers.JsonProvider(node.url) as provider:
+        account = _account(provider)
+        yield lambda: account.send_money("bob.near", 1)
+
+
+@benchmark("e2e", items=100)
+def bench_pipeline_send_money_100(options):
+    with FakeNode(latency=options.latency) as node, near_api.providers.JsonProvider(node.url) as provider:
+        account = _account(provider)
+        with TxPipeline(account, poll_interval=0.01) as pipeline:
+            def send():
+                futures = [pipeline.send_money("bob.near", 1) for _ in range(100)]
+                for future in futures:
+                    future.result()
+
+            yield send
+
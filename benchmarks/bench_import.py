@@ -0,0 +1,41 @@
+"""Cold import times, each in a fresh interpreter. python_startup is the baseline to subtract from the others."""
+import os
+import subprocess
+import sys
+
+import near_api
+
+from harness import benchmark
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(near_api.__file__)))
+
+
+def _interpreter(code: str):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    command = [sys.executable, "-c", code]
+    yield lambda: subprocess.run(command, env=env, check=True)
+
+
+@benchmark("import")
+def bench_python_startup(options):
+    yield from _interpreter("pass")
+
+
+@benchmark("import")
+def bench_import_near_api(options):
+    yield from _interpreter("import near_api")
+
+
+@benchmark("import")
+def bench_import_transactions(options):
+    yield from _interpreter("import near_api.transactions")
+
+
+@benchmark("import")
+def bench_import_providers(options):
+    yield from _interpreter("import near_api.providers")
+
+
+@benchmark("import")
+def bench_import_account(options):
+    yield from _interpreter("import near_api.account")
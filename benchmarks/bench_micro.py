@@ -0,0 +1,155 @@
+"""Microbenchmarks of the CPU-bound parts of the library, without network."""
+import hashlib
+import json
+
+import base58
+
+import near_api
+from near_api import codec, transactions
+from near_api.serializer import BinarySerializer
+
+from harness import benchmark
+
+BLOCK_HASH = hashlib.sha256(b"benchmark").digest()
+
+
+def _signer() -> 'near_api.signer.Signer':
+    return near_api.signer.Signer("benchmark.near", near_api.signer.KeyPair(bytes(range(32))))
+
+
+def _function_call(args_size: int = 1024) -> 'transactions.Action':
+    return transactions.create_function_call_action("method", b"x" * args_size, 30_000_000_000_000, 0)
+
+
+def _signed_transaction(actions) -> 'transactions.SignedTransaction':
+    data = transactions.sign_and_serialize_transaction("receiver.near", 1, actions, BLOCK_HASH, _signer())
+    return transactions.deserialize_signed_transaction(data)
+
+
+@benchmark("serializer")
+def bench_binary_serializer_transfer(options):
+    signed_tx = _signed_transaction([transactions.create_transfer_action(10 ** 24)])
+    serializer = BinarySerializer(transactions.tx_schema)
+    yield lambda: serializer.serialize(signed_tx)
+
+
+@benchmark("serializer")
+def bench_compiled_serializer_transfer(options):
+    signed_tx = _signed_transaction([transactions.create_transfer_action(10 ** 24)])
+    yield lambda: transactions.tx_serializer.serialize(signed_tx)
+
+
+@benchmark("serializer")
+def bench_binary_serializer_function_call_64k(options):
+    signed_tx = _signed_transaction([_function_call(65536)])
+    serializer = BinarySerializer(transactions.tx_schema)
+    yield lambda: serializer.serialize(signed_tx)
+
+
+@benchmark("serializer")
+def bench_compiled_serializer_function_call_64k(options):
+    signed_tx = _signed_transaction([_function_call(65536)])
+    yield lambda: transactions.tx_serializer.serialize(signed_tx)
+
+
+@benchmark("serializer")
+def bench_deserialize_function_call(options):
+    data = transactions.sign_and_serialize_transaction("receiver.near", 1, [_function_call()], BLOCK_HASH, _signer())
+    yield lambda: transactions.deserialize_signed_transaction(data)
+
+
+@benchmark("signing")
+def bench_key_pair_sign(options):
+    key_pair = near_api.signer.KeyPair(bytes(range(32)))
+    yield lambda: key_pair.sign(BLOCK_HASH)
+
+
+@benchmark("signing")
+def bench_sign_and_serialize_transfer(options):
+    signer = _signer()
+    actions = [transactions.create_transfer_action(10 ** 24)]
+    yield lambda: transactions.sign_and_serialize_transaction("receiver.near", 1, actions, BLOCK_HASH, signer)
+
+
+@benchmark("signing")
+def bench_sign_and_serialize_function_call(options):
+    signer = _signer()
+    actions = [_function_call()]
+    yield lambda: transactions.sign_and_serialize_transaction("receiver.near", 1, actions, BLOCK_HASH, signer)
+
+
+@benchmark("signing")
+def bench_template_sign_transfer(options):
+    template = transactions.TransactionTemplate(_signer(), "receiver.near", [transactions.create_transfer_action(1)])
+    yield lambda: template.sign(1, BLOCK_HASH, 10 ** 24)
+
+
+class _ViewProvider(object):
+    """Provider answering view calls with a canned result, to time decoding alone."""
+
+    def __init__(self, result: bytes):
+        self._result = list(result)
+
+    def view_call(self, account_id, method_name, args, finality=None, timeout=None):
+        return {'result': self._result, 'logs': [], 'block_height': 1, 'block_hash': "1" * 32}
+
+
+def _view_account(result: bytes) -> 'near_api.account.Account':
+    # Bypass Account.__init__, which fetches the access key from the node.
+    account = near_api.account.Account.__new__(near_api.account.Account)
+    account._provider = _ViewProvider(result)
+    return account
+
+
+@benchmark("view_function")
+def bench_view_function_json_small(options):
+    account = _view_account(codec.dumps({'value': 1, 'owner': "alice.near"}))
+    yield lambda: account.view_function("contract.near", "get")
+
+
+@benchmark("view_function")
+def bench_view_function_json_64k(options):
+    account = _view_account(codec.dumps([{'id': i, 'owner': "owner%d.near" % i} for i in range(2000)]))
+    yield lambda: account.view_function("contract.near", "list")
+
+
+@benchmark("view_function")
+def bench_view_function_raw_64k(options):
+    account = _view_account(bytes(65536))
+    yield lambda: account.view_function("contract.near", "raw", raw=True)
+
+
+def _block_1mb() -> bytes:
+    """A block of about 1 MB shaped like RPC responses: base58 hashes, u128 amounts as strings, u64 numbers."""
+    def hash_(i):
+        return base58.b58encode(hashlib.sha256(b"%d" % i).digest()).decode('utf8')
+
+    chunks = [{
+        'chunk_hash': hash_(i), 'prev_block_hash': hash_(i + 1), 'shard_id': i % 4, 'gas_used': 10 ** 12,
+        'balance_burnt': str(10 ** 24 + i), 'signer_id': "account%d.near" % i, 'nonce': 10 ** 15 + i,
+        'outcome': {'logs': ["Transfer 1.5 NEAR to bob.near"], 'gas_burnt': 2428000000000},
+    } for i in range(3000)]
+    return json.dumps({
+        'header': {'height': 1, 'hash': hash_(0), 'total_supply': str(10 ** 33)}, 'chunks': chunks,
+    }).encode('utf8')
+
+
+@benchmark("json")
+def bench_decode_block_1mb(options):
+    data = _block_1mb()
+    yield lambda: codec.loads(data)
+
+
+@benchmark("json")
+def bench_decode_block_1mb_stdlib(options):
+    data = _block_1mb()
+    json_codec = codec.JsonCodec()
+    yield lambda: json_codec.loads(data)
+
+
+if codec.orjson is not None:
+    @benchmark("json", faster_than="json.decode_block_1mb_stdlib")
+    def bench_decode_block_1mb_orjson(options):
+        data = _block_1mb()
+        json_codec = codec.OrjsonCodec()
+        yield lambda: json_codec.loads(data)
@@ -0,0 +1,145 @@
+import base64
+import hashlib
+import os
+import sys
+import threading
+import time
+
+import base58
+
+from near_api import transactions
+
+# The node is served by the tests' FakeRpcServer.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "test"))
+from fake_rpc import FakeRpcServer, RpcError  # noqa: E402
+
+# Number of recent blocks whose hash is accepted in a transaction, as transaction validity on a real node.
+TX_VALIDITY_BLOCKS = 100
+
+
+def _tx_error(error) -> RpcError:
+    return RpcError({
+        'name': "HANDLER_ERROR",
+        'cause': {'name': "INVALID_TRANSACTION", 'info': {}},
+        'data': {'TxExecutionError': {'InvalidTxError': error}},
+    })
+
+
+def _access_key(account_id: str, public_key: str) -> tuple:
+    """Key of an access key in FakeNode's nonces, with the public key in base58 with or without its key type."""
+    if public_key.startswith("ed25519:"):
+        public_key = public_key[len("ed25519:"):]
+    return account_id, public_key
+
+
+class FakeNode(object):
+    """
+    In-process stand-in for a NEAR JSON-RPC node, for benchmarks.
+
+    It produces a block every block_time seconds, accepts transactions only with the hash of one of the last
+    TX_VALIDITY_BLOCKS blocks and a nonce above the one of their access key, which it then updates, and answers
+    every HTTP request after latency seconds. Accounts and access keys exist on first use, with balance 10**30
+    and nonce 0. view_results maps a view method name to the bytes it returns."""
+
+    def __init__(self, latency: float = 0.0, block_time: float = 1.0, view_results: dict = None):
+        self.block_time = block_time
+        self.view_results = view_results or {}
+        self._genesis = time.monotonic()
+        self._nonces = {}
+        self._outcomes = {}
+        self._heights = {}
+        self._lock = threading.Lock()
+        self._server = FakeRpcServer({
+            'block': self.block,
+            'query': self.query,
+            'broadcast_tx_commit': self.broadcast_tx_commit,
+            'broadcast_tx_async': self.broadcast_tx_async,
+            'tx': self.tx,
+        }, status=self.status, delay=latency)
+
+    @property
+    def url(self) -> str:
+        return self._server.url
+
+    def __enter__(self) -> 'FakeNode':
+        self._server.__enter__()
+        return self
+
+    def __exit__(self, *args):
+        self._server.__exit__(*args)
+
+    def height(self) -> int:
+        return int((time.monotonic() - self._genesis) / self.block_time) + 1
+
+    def block_hash(self, height: int) -> bytes:
+        block_hash = hashlib.sha256(height.to_bytes(8, 'little')).digest()
+        self._heights[block_hash] = height
+        return block_hash
+
+    def status(self) -> dict:
+        height = self.height()
+        return {
+            'chain_id': "benchmark",
+            'sync_info': {
+                'latest_block_height': height,
+                'latest_block_hash': base58.b58encode(self.block_hash(height)).decode('utf8'),
+            },
+        }
+
+    def block(self, params) -> dict:
+        height = self.height()
+        if isinstance(params, list) and isinstance(params[0], int):
+            if params[0] > height:
+                raise RpcError({'name': "HANDLER_ERROR", 'cause': {'name': "UNKNOWN_BLOCK"}})
+            height = params[0]
+        return {
+            'header': {'height': height, 'hash': base58.b58encode(self.block_hash(height)).decode('utf8')},
+            'chunks': [],
+        }
+
+    def query(self, params: dict) -> dict:
+        request_type = params['request_type']
+        if request_type == "view_access_key":
+            with self._lock:
+                nonce = self._nonces.get(_access_key(params['account_id'], params['public_key']), 0)
+            return {'nonce': nonce, 'permission': "FullAccess"}
+        if request_type == "view_account":
+            return {'amount': str(10 ** 30), 'locked': "0", 'storage_usage': 182, 'code_hash': "1" * 32}
+        if request_type == "call_function":
+            result = self.view_results.get(params['method_name'], b'{"value": 1}')
+            return {'result': list(result), 'logs': []}
+        raise RpcError({'name': "HANDLER_ERROR", 'cause': {'name': "UNSUPPORTED_REQUEST"}})
+
+    def _execute(self, params: list) -> str:
+        data = base64.b64decode(params[0])
+        tx = transactions.deserialize_signed_transaction(data).transaction
+        tx_height = self._heights.get(bytes(tx.blockHash))
+        if tx_height is None or self.height() - tx_height > TX_VALIDITY_BLOCKS:
+            raise _tx_error("Expired")
+        key = _access_key(tx.signerId, base58.b58encode(tx.publicKey.data).decode('utf8'))
+        # The transaction is its signed encoding without the trailing signature (key type and 64 bytes).
+        tx_hash = base58.b58encode(hashlib.sha256(data[:-65]).digest()).decode('utf8')
+        with self._lock:
+            ak_nonce = self._nonces.get(key, 0)
+            if tx.nonce <= ak_nonce:
+                raise _tx_error({'InvalidNonce': {'tx_nonce': tx.nonce, 'ak_nonce': ak_nonce}})
+            self._nonces[key] = tx.nonce
+            self._outcomes[tx_hash] = {
+                'status': {'SuccessValue': ""},
+                'transaction': {'hash': tx_hash, 'signer_id': tx.signerId, 'nonce': tx.nonce},
+                'transaction_outcome': {'id': tx_hash, 'outcome': {'logs': []}},
+                'receipts_outcome': [],
+            }
+        return tx_hash
+
+    def broadcast_tx_commit(self, params: list) -> dict:
+        return self._outcomes[self._execute(params)]
+
+    def broadcast_tx_async(self, params: list) -> str:
+        return self._execute(params)
+
+    def tx(self, params: list) -> dict:
+        outcome = self._outcomes.get(params[0])
+        if outcome is None:
+            raise RpcError({'name': "HANDLER_ERROR", 'cause': {'name': "UNKNOWN_TRANSACTION"}})
+        return outcome
@@ -0,0 +1,140 @@
+import fnmatch
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Iterator, List, Optional
+
+from near_api import codec
+
+BenchmarkFactory = Callable[..., Iterator[Callable[[], object]]]
+""" A generator function setting up a benchmark, yielding the operation to time once, and tearing it down."""
+
+BENCHMARKS: List['Benchmark'] = []
+
+
+class Benchmark(object):
+    def __init__(
+            self,
+            group: str,
+            name: str,
+            factory: 'BenchmarkFactory',
+            items: int,
+            faster_than: Optional[str] = None
+    ):
+        self.group = group
+        self.name = name
+        self.factory = factory
+        # Number of items (transactions, calls...) processed by one operation, to report items per second.
+        self.items = items
+        # Full name of a benchmark this one is expected to beat when both run.
+        self.faster_than = faster_than
+
+    @property
+    def full_name(self) -> str:
+        return "%s.%s" % (self.group, self.name)
+
+
+def benchmark(group: str, items: int = 1, faster_than: Optional[str] = None):
+    """
+    Register a benchmark factory, named after the function without its bench_ prefix. With faster_than, the
+    full name of another benchmark, running both fails unless this one has the lower median."""
+    def register(factory: 'BenchmarkFactory') -> 'BenchmarkFactory':
+        name = factory.__name__[len("bench_"):] if factory.__name__.startswith("bench_") else factory.__name__
+        BENCHMARKS.append(Benchmark(group, name, factory, items, faster_than))
+        return factory
+    return register
+
+
+def select(patterns: Optional[List[str]]) -> List['Benchmark']:
+    """The registered benchmarks whose full name matches one of the glob patterns, or all of them."""
+    if not patterns:
+        return list(BENCHMARKS)
+    return [b for b in BENCHMARKS if any(fnmatch.fnmatch(b.full_name, pattern) for pattern in patterns)]
+
+
+def measure(op: Callable[[], object], min_time: float = 0.2, rounds: int = 5) -> dict:
+    """
+    Time op: the number of calls per round is calibrated so a round lasts at least min_time seconds,
+    then rounds rounds are timed. Times are per call, in seconds."""
+    op()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            op()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)) + 1)
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            op()
+        times.append((time.perf_counter() - start) / number)
+    return {
+        'iterations': number,
+        'rounds': rounds,
+        'mean': statistics.mean(times),
+        'median': statistics.median(times),
+        'min': min(times),
+        'max': max(times),
+        'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+    }
+
+
+def run(benchmark_: 'Benchmark', options, min_time: float, rounds: int) -> dict:
+    setup = benchmark_.factory(options)
+    op = next(setup)
+    try:
+        result = measure(op, min_time, rounds)
+    finally:
+        setup.close()
+    result.update({
+        'name': benchmark_.full_name,
+        'faster_than': benchmark_.faster_than,
+        'group': benchmark_.group,
+        'items': benchmark_.items,
+        'ops_per_sec': 1 / result['median'],
+        'items_per_sec': benchmark_.items / result['median'],
+    })
+    return result
+
+
+def environment() -> dict:
+    return {
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'json_codec': codec.get_codec().name,
+        'timestamp': time.time(),
+    }
+
+
+def compare(results: List[dict], baseline: List[dict], threshold: float) -> List[dict]:
+    """Results slower than their baseline median by more than threshold, as a fraction, with their slowdown."""
+    baseline = {result['name']: result for result in baseline}
+    regressions = []
+    for result in results:
+        base = baseline.get(result['name'])
+        if base is None:
+            continue
+        slowdown = result['median'] / base['median'] - 1
+        if slowdown > threshold:
+            regressions.append({'name': result['name'], 'baseline': base['median'], 'median': result['median'],
+                                'slowdown': slowdown})
+    return regressions
+
+
+def check_faster_than(results: List[dict]) -> List[dict]:
+    """Results not faster than the benchmark they are expected to beat, when it ran too."""
+    by_name = {result['name']: result for result in results}
+    failures = []
+    for result in results:
+        other = by_name.get(result.get('faster_than'))
+        if other is not None and result['median'] >= other['median']:
+            failures.append({'name': result['name'], 'median': result['median'], 'faster_than': other['name'],
+                             'other_median': other['median']})
+    return failures
@@ -0,0 +1,83 @@
+"""
+Run the benchmarks and report their timings, optionally as JSON and compared with a baseline.
+
+    python benchmarks/run.py [-k PATTERN] [--json results.json] [--compare baseline.json]
+
+Exits with status 1 if a benchmark is slower than its baseline by more than --threshold, or not faster than
+a benchmark it is expected to beat."""
+import argparse
+import json
+import sys
+
+import bench_e2e  # noqa: F401, registers the benchmarks
+import bench_import  # noqa: F401
+import bench_micro  # noqa: F401
+import harness
+
+
+def _format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return "%.2f %s" % (seconds / scale, unit)
+    return "%.0f ns" % (seconds / 1e-9)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="patterns", action="append",
+                        help="glob of the benchmarks to run, e.g. 'signing.*' (repeatable)")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    parser.add_argument("--json", dest="json_path", help="write the results as JSON to this file, - for stdout")
+    parser.add_argument("--compare", help="JSON results of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="slowdown over the baseline, as a fraction, reported as a regression (default 0.1)")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="latency in seconds added by the fake node to every request (default 0)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum duration of a round in seconds")
+    parser.add_argument("--rounds", type=int, default=5, help="timed rounds per benchmark")
+    options = parser.parse_args(argv)
+
+    benchmarks = harness.select(options.patterns)
+    if options.list:
+        for benchmark in benchmarks:
+            print(benchmark.full_name)
+        return 0
+
+    log = sys.stderr if options.json_path == "-" else sys.stdout
+    results = []
+    for benchmark in benchmarks:
+        result = harness.run(benchmark, options, options.min_time, options.rounds)
+        results.append(result)
+        print("%-50s %12s %14.1f items/s  ±%.1f%%" % (
+            result['name'], _format_time(result['median']), result['items_per_sec'],
+            100 * result['stdev'] / result['mean']), file=log)
+
+    report = {
+        'environment': harness.environment(),
+        'options': {'latency': options.latency, 'min_time': options.min_time, 'rounds': options.rounds},
+        'results': results,
+    }
+    regressions = []
+    if options.compare:
+        with open(options.compare) as f:
+            regressions = harness.compare(results, json.load(f)['results'], options.threshold)
+        report['regressions'] = regressions
+        for regression in regressions:
+            print("REGRESSION %s: %.1f%% slower" % (regression['name'], 100 * regression['slowdown']), file=log)
+    failures = harness.check_faster_than(results)
+    report['not_faster'] = failures
+    for failure in failures:
+        print("NOT FASTER %s: %s against %s for %s" % (
+            failure['name'], _format_time(failure['median']), _format_time(failure['other_median']),
+            failure['faster_than']), file=log)
+    if options.json_path == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif options.json_path:
+        with open(options.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    return 1 if regressions or failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
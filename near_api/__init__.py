@@ -1,9 +1,45 @@
-import logging
+import importlib
 
-import near_api.providers
-import near_api.serializer
-import near_api.transactions
-import near_api.account
-import near_api.signer
+# Submodules are imported on first attribute access, e.g. near_api.providers, so that importing near_api
+# or one of its submodules only loads the dependencies actually used.
+_SUBMODULES = (
+    "codec",
+    "metrics",
+    "cache",
+    "single_flight",
+    "rate_limit",
+    "providers",
+    "multi_provider",
+    "serializer",
+    "transactions",
+    "account",
+    "signer",
+    "block_hash",
+    "nonce",
+    "key_pool",
+    "pipeline",
+    "bulk_signing",
+    "state_follower",
+    "async_providers",
+    "async_account",
+)
 
-log = logging.getLogger(__name__)
+# The names imported by "from near_api import *", as before submodules were imported lazily. The others, some
+# needing optional dependencies such as aiohttp, are imported explicitly.
+__all__ = ["providers", "serializer", "transactions", "account", "signer", "log"]
+
+
+def __getattr__(name: str):
+    if name in _SUBMODULES:
+        return importlib.import_module("." + name, __name__)
+    if name == "log":
+        # The logging module is itself slow to import.
+        import logging
+        global log
+        log = logging.getLogger(__name__)
+        return log
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_SUBMODULES) | set(__all__))
@@ -1,16 +1,24 @@
+import contextlib
 import itertools
-import json
-from typing import Optional, List
-
-import base58
+import mmap
+import os
+from typing import Optional, List, Tuple, Union
 
 import near_api
-from near_api import transactions
+from near_api import codec, transactions
+from near_api.block_hash import BlockHashCache
+from near_api.nonce import NonceManager, DEFAULT_NONCE_RETRIES, invalid_nonce_info
+from near_api.providers import JsonProviderError
+from near_api.serializer import BinaryDeserializer
 
 # Amount of gas attached by default 1e14.
 DEFAULT_ATTACHED_GAS = 100_000_000_000_000
 
 
+ContractCodeType = Union[bytes, bytearray, memoryview, str, os.PathLike]
+""" Contract code to deploy, either as bytes or as the path of a .wasm file."""
+
+
 class TransactionError(Exception):
     pass
 
@@ -19,34 +27,115 @@ class ViewFunctionError(Exception):
     pass
 
 
+@contextlib.contextmanager
+def _open_contract_code(contract_code: 'ContractCodeType'):
+    """Yield contract code as a bytes-like object. Files are memory-mapped instead of read into memory."""
+    if isinstance(contract_code, (bytes, bytearray, memoryview)):
+        yield contract_code
+        return
+    with open(contract_code, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files cannot be memory-mapped.
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as code:
+            yield code
+
+
+def _is_expired_tx_error(error: 'JsonProviderError') -> bool:
+    """Whether the node rejected a transaction because its block hash is too old."""
+    return "Expired" in str(error)
+
+
+def _check_tx_result(result: dict) -> dict:
+    """Print the logs of a final execution outcome and raise TransactionError if it failed."""
+    for outcome in itertools.chain([result['transaction_outcome']], result['receipts_outcome']):
+        for log in outcome['outcome']['logs']:
+            print("Log:", log)
+    if 'Failure' in result['status']:
+        raise TransactionError(result['status']['Failure'])
+    return result
+
+
 class Account(object):
 
     def __init__(
             self,
             provider: 'near_api.providers.JsonProvider',
             signer: 'near_api.signer.Signer',
-            account_id: Optional[str] = None
+            account_id: Optional[str] = None,
+            block_hash_cache: Optional['BlockHashCache'] = None,
+            nonce_manager: Optional['NonceManager'] = None
     ):
+        """
+        Transactions are signed with the recent block hash of block_hash_cache and with nonces allocated
+        by nonce_manager. Both may be shared with other accounts and threads; if not given, the account
+        keeps its own."""
         self._provider = provider
         self._signer = signer
         self._account_id = account_id or self._signer.account_id
+        self._public_key = self._signer.key_pair.encoded_public_key()
+        self._block_hash_cache = block_hash_cache or BlockHashCache(provider)
+        self._nonce_manager = nonce_manager or NonceManager(provider)
         self._account: dict = provider.get_account(self._account_id)
-        self._access_key: dict = provider.get_access_key(self._account_id, self._signer.key_pair.encoded_public_key())
+        self._access_key: dict = provider.get_access_key(self._account_id, self._public_key)
+        self._nonce_manager.seed(self._account_id, self._public_key, self._access_key['nonce'])
         # print(account_id, self._account, self._access_key)
 
+    def _acquire_signer(self, receiver_id: str, actions: List['transactions.Action']) -> 'near_api.signer.Signer':
+        """
+        Pick the signer of a new transaction of actions to receiver_id, handed back with _release_signer()
+        once it is resolved."""
+        return self._signer
+
+    def _release_signer(self, signer: 'near_api.signer.Signer'):
+        pass
+
+    def _sign_tx(
+            self,
+            signer: 'near_api.signer.Signer',
+            receiver_id: str,
+            actions: List['transactions.Action']
+    ) -> Tuple[bytearray, bytes]:
+        """Sign a transaction with the next nonce of signer's key, returning (signed_tx, tx_hash)."""
+        public_key = self._public_key if signer is self._signer else signer.key_pair.encoded_public_key()
+        nonce = self._nonce_manager.next_nonce(
+            self._account_id, public_key, self._access_key if signer is self._signer else None)
+        return transactions.sign_and_hash_transaction_buffer(
+            receiver_id, nonce, actions, self._block_hash_cache.get(), signer)
+
+    def _handle_rejected_tx(self, signer: 'near_api.signer.Signer', error: Exception) -> bool:
+        """Recover from a rejected transaction, returning whether signing it again may succeed."""
+        if _is_expired_tx_error(error):
+            self._block_hash_cache.invalidate()
+        nonce_info = invalid_nonce_info(error)
+        if nonce_info is None:
+            return False
+        self._nonce_manager.resync(self._account_id, signer.key_pair.encoded_public_key(), nonce_info.get('ak_nonce'))
+        return True
+
     def _sign_and_submit_tx(self, receiver_id: str, actions: List['transactions.Action']) -> dict:
-        self._access_key['nonce'] += 1
-        block_hash = self._provider.get_status()['sync_info']['latest_block_hash']
-        block_hash = base58.b58decode(block_hash.encode('utf8'))
-        serialized_tx = transactions.sign_and_serialize_transaction(
-            receiver_id, self._access_key['nonce'], actions, block_hash, self._signer)
-        result: dict = self._provider.send_tx_and_wait(serialized_tx, 10)
-        for outcome in itertools.chain([result['transaction_outcome']], result['receipts_outcome']):
-            for log in outcome['outcome']['logs']:
-                print("Log:", log)
-        if 'Failure' in result['status']:
-            raise TransactionError(result['status']['Failure'])
-        return result
+        signer = self._acquire_signer(receiver_id, actions)
+        try:
+            return self._sign_and_submit_tx_with(signer, receiver_id, actions)
+        finally:
+            self._release_signer(signer)
+
+    def _sign_and_submit_tx_with(
+            self,
+            signer: 'near_api.signer.Signer',
+            receiver_id: str,
+            actions: List['transactions.Action']
+    ) -> dict:
+        for attempt in range(DEFAULT_NONCE_RETRIES + 1):
+            serialized_tx, _ = self._sign_tx(signer, receiver_id, actions)
+            try:
+                result: dict = self._provider.send_tx_and_wait(serialized_tx, 10)
+            except JsonProviderError as e:
+                if not self._handle_rejected_tx(signer, e) or attempt == DEFAULT_NONCE_RETRIES:
+                    raise
+                continue
+            return _check_tx_result(result)
 
     @property
     def account_id(self) -> str:
@@ -60,6 +149,14 @@ class Account(object):
     def provider(self) -> 'near_api.providers.JsonProvider':
         return self._provider
 
+    @property
+    def block_hash_cache(self) -> 'BlockHashCache':
+        return self._block_hash_cache
+
+    @property
+    def nonce_manager(self) -> 'NonceManager':
+        return self._nonce_manager
+
     @property
     def access_key(self) -> dict:
         return self._access_key
@@ -85,7 +182,7 @@ class Account(object):
             amount: int = 0
     ) -> dict:
         """NEAR call method."""
-        args = json.dumps(args).encode('utf8')
+        args = codec.dumps(args)
         return self._sign_and_submit_tx(
             contract_id,
             [transactions.create_function_call_action(method_name, args, gas, amount)]
@@ -102,8 +199,10 @@ class Account(object):
     def delete_account(self, beneficiary_id: str) -> dict:
         return self._sign_and_submit_tx(self._account_id, [transactions.create_delete_account_action(beneficiary_id)])
 
-    def deploy_contract(self, contract_code: bytes) -> dict:
-        return self._sign_and_submit_tx(self._account_id, [transactions.create_deploy_contract_action(contract_code)])
+    def deploy_contract(self, contract_code: 'ContractCodeType') -> dict:
+        """Deploy contract_code, given as bytes or as the path of a .wasm file which is memory-mapped."""
+        with _open_contract_code(contract_code) as code:
+            return self._sign_and_submit_tx(self._account_id, [transactions.create_deploy_contract_action(code)])
 
     def stake(self, public_key: str, amount: int) -> dict:
         return self._sign_and_submit_tx(self._account_id, [transactions.create_staking_action(amount, public_key)])
@@ -112,39 +211,68 @@ class Account(object):
             self,
             contract_id: str,
             public_key: str,
-            contract_code: bytes,
+            contract_code: 'ContractCodeType',
             initial_balance: int
     ) -> dict:
-        actions = [
-                      transactions.create_create_account_action(),
-                      transactions.create_transfer_action(initial_balance),
-                      transactions.create_deploy_contract_action(contract_code)
-                  ] + ([transactions.create_full_access_key_action(public_key)] if public_key is not None else [])
-        return self._sign_and_submit_tx(contract_id, actions)
+        with _open_contract_code(contract_code) as code:
+            actions = [
+                          transactions.create_create_account_action(),
+                          transactions.create_transfer_action(initial_balance),
+                          transactions.create_deploy_contract_action(code)
+                      ] + ([transactions.create_full_access_key_action(public_key)] if public_key is not None else [])
+            return self._sign_and_submit_tx(contract_id, actions)
 
     def create_deploy_and_init_contract(
             self,
             contract_id: str,
             public_key: str,
-            contract_code: bytes,
+            contract_code: 'ContractCodeType',
             initial_balance: int,
             args: bytes,
             gas: int = DEFAULT_ATTACHED_GAS,
             init_method_name: str = "new"
     ) -> dict:
-        args = json.dumps(args).encode('utf8')
-        actions = [
-                      transactions.create_create_account_action(),
-                      transactions.create_transfer_action(initial_balance),
-                      transactions.create_deploy_contract_action(contract_code),
-                      transactions.create_function_call_action(init_method_name, args, gas, 0)
-                  ] + ([transactions.create_full_access_key_action(public_key)] if public_key is not None else [])
-        return self._sign_and_submit_tx(contract_id, actions)
-
-    def view_function(self, contract_id: str, method_name: str, args: Optional[dict] = None) -> dict:
-        """NEAR view method."""
-        result = self._provider.view_call(contract_id, method_name, json.dumps(args).encode('utf8'))
+        args = codec.dumps(args)
+        with _open_contract_code(contract_code) as code:
+            actions = [
+                          transactions.create_create_account_action(),
+                          transactions.create_transfer_action(initial_balance),
+                          transactions.create_deploy_contract_action(code),
+                          transactions.create_function_call_action(init_method_name, args, gas, 0)
+                      ] + ([transactions.create_full_access_key_action(public_key)] if public_key is not None else [])
+            return self._sign_and_submit_tx(contract_id, actions)
+
+    def _view_function_bytes(self, contract_id: str, method_name: str, args: Optional[dict]) -> dict:
+        result = self._provider.view_call(contract_id, method_name, codec.dumps(args))
         if "error" in result:
             raise ViewFunctionError(result['error'])
-        result['result'] = json.loads(''.join([chr(x) for x in result['result']]))
+        result['result'] = bytes(result['result'])
+        return result
+
+    def view_function(
+            self,
+            contract_id: str,
+            method_name: str,
+            args: Optional[dict] = None,
+            raw: bool = False
+    ) -> dict:
+        """NEAR view method. The result is decoded from JSON, or returned as bytes if raw."""
+        result = self._view_function_bytes(contract_id, method_name, args)
+        if not raw:
+            result['result'] = codec.loads(result['result'])
+        return result
+
+    def view_function_borsh(
+            self,
+            contract_id: str,
+            method_name: str,
+            deserializer: 'BinaryDeserializer',
+            result_type: Union[type, str, list, dict],
+            args: Optional[dict] = None
+    ) -> dict:
+        """
+        NEAR view method returning Borsh. The result is decoded as result_type, a class of the deserializer
+        schema or a field type such as 'u128'."""
+        result = self._view_function_bytes(contract_id, method_name, args)
+        result['result'] = deserializer.deserialize(result['result'], result_type)
         return result
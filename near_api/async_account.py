@@ -0,0 +1,220 @@
+from typing import Optional, List, Union
+
+import near_api
+from near_api import codec, transactions
+from near_api.account import (
+    DEFAULT_ATTACHED_GAS, ContractCodeType, ViewFunctionError, _check_tx_result, _is_expired_tx_error,
+    _open_contract_code
+)
+from near_api.block_hash import AsyncBlockHashCache
+from near_api.nonce import AsyncNonceManager, DEFAULT_NONCE_RETRIES, invalid_nonce_info
+from near_api.providers import JsonProviderError
+from near_api.serializer import BinaryDeserializer
+
+
+class AsyncAccount(object):
+    """asyncio counterpart of Account, driven by an AsyncJsonProvider.
+
+    Use ``await AsyncAccount.create(provider, signer)`` to build an instance with its state and access key loaded."""
+
+    def __init__(
+            self,
+            provider: 'near_api.async_providers.AsyncJsonProvider',
+            signer: 'near_api.signer.Signer',
+            account_id: Optional[str] = None,
+            block_hash_cache: Optional['AsyncBlockHashCache'] = None,
+            nonce_manager: Optional['AsyncNonceManager'] = None
+    ):
+        self._provider = provider
+        self._signer = signer
+        self._account_id = account_id or self._signer.account_id
+        self._public_key = self._signer.key_pair.encoded_public_key()
+        self._block_hash_cache = block_hash_cache or AsyncBlockHashCache(provider)
+        self._nonce_manager = nonce_manager or AsyncNonceManager(provider)
+        self._account: Optional[dict] = None
+        self._access_key: Optional[dict] = None
+
+    @classmethod
+    async def create(
+            cls,
+            provider: 'near_api.async_providers.AsyncJsonProvider',
+            signer: 'near_api.signer.Signer',
+            account_id: Optional[str] = None,
+            block_hash_cache: Optional['AsyncBlockHashCache'] = None,
+            nonce_manager: Optional['AsyncNonceManager'] = None
+    ) -> 'AsyncAccount':
+        account = cls(provider, signer, account_id, block_hash_cache, nonce_manager)
+        await account.fetch_state()
+        await account.fetch_access_key()
+        return account
+
+    async def _sign_and_submit_tx(self, receiver_id: str, actions: List['transactions.Action']) -> dict:
+        for attempt in range(DEFAULT_NONCE_RETRIES + 1):
+            nonce = await self._nonce_manager.next_nonce(self._account_id, self._public_key, self._access_key)
+            block_hash = await self._block_hash_cache.get()
+            serialized_tx, _ = transactions.sign_and_hash_transaction_buffer(
+                receiver_id, nonce, actions, block_hash, self._signer)
+            try:
+                result: dict = await self._provider.send_tx_and_wait(serialized_tx, 10)
+            except JsonProviderError as e:
+                if _is_expired_tx_error(e):
+                    self._block_hash_cache.invalidate()
+                nonce_info = invalid_nonce_info(e)
+                if nonce_info is None or attempt == DEFAULT_NONCE_RETRIES:
+                    raise
+                await self.resync_nonce(nonce_info.get('ak_nonce'))
+                continue
+            return _check_tx_result(result)
+
+    @property
+    def account_id(self) -> str:
+        return self._account_id
+
+    @property
+    def signer(self) -> 'near_api.signer.Signer':
+        return self._signer
+
+    @property
+    def provider(self) -> 'near_api.async_providers.AsyncJsonProvider':
+        return self._provider
+
+    @property
+    def block_hash_cache(self) -> 'AsyncBlockHashCache':
+        return self._block_hash_cache
+
+    @property
+    def nonce_manager(self) -> 'AsyncNonceManager':
+        return self._nonce_manager
+
+    @property
+    def access_key(self) -> dict:
+        return self._access_key
+
+    @property
+    def state(self) -> dict:
+        return self._account
+
+    async def fetch_state(self):
+        """Fetch state for given account."""
+        self._account = await self.provider.get_account(self.account_id)
+
+    async def fetch_access_key(self):
+        """Fetch the signer's access key, including its current nonce."""
+        self._access_key = await self.provider.get_access_key(self._account_id, self._public_key)
+        self._nonce_manager.seed(self._account_id, self._public_key, self._access_key['nonce'])
+
+    async def resync_nonce(self, chain_nonce: Optional[int] = None):
+        """Move the local nonce up to the access key nonce on chain, fetched unless chain_nonce is given."""
+        nonce = await self._nonce_manager.resync(self._account_id, self._public_key, chain_nonce)
+        self._access_key['nonce'] = max(self._access_key['nonce'], nonce)
+
+    async def send_money(self, account_id: str, amount: int):
+        """Sends funds to given account_id given amount."""
+        return await self._sign_and_submit_tx(account_id, [transactions.create_transfer_action(amount)])
+
+    async def function_call(
+            self,
+            contract_id: str,
+            method_name: str,
+            args: dict,
+            gas: int = DEFAULT_ATTACHED_GAS,
+            amount: int = 0
+    ) -> dict:
+        """NEAR call method."""
+        args = codec.dumps(args)
+        return await self._sign_and_submit_tx(
+            contract_id,
+            [transactions.create_function_call_action(method_name, args, gas, amount)]
+        )
+
+    async def create_account(self, account_id: str, public_key: str, initial_balance: int) -> dict:
+        actions = [
+            transactions.create_create_account_action(),
+            transactions.create_full_access_key_action(public_key),
+            transactions.create_transfer_action(initial_balance),
+        ]
+        return await self._sign_and_submit_tx(account_id, actions)
+
+    async def delete_account(self, beneficiary_id: str) -> dict:
+        return await self._sign_and_submit_tx(
+            self._account_id, [transactions.create_delete_account_action(beneficiary_id)])
+
+    async def deploy_contract(self, contract_code: ContractCodeType) -> dict:
+        """Deploy contract_code, given as bytes or as the path of a .wasm file which is memory-mapped."""
+        with _open_contract_code(contract_code) as code:
+            return await self._sign_and_submit_tx(
+                self._account_id, [transactions.create_deploy_contract_action(code)])
+
+    async def stake(self, public_key: str, amount: int) -> dict:
+        return await self._sign_and_submit_tx(
+            self._account_id, [transactions.create_staking_action(amount, public_key)])
+
+    async def create_and_deploy_contract(
+            self,
+            contract_id: str,
+            public_key: str,
+            contract_code: ContractCodeType,
+            initial_balance: int
+    ) -> dict:
+        with _open_contract_code(contract_code) as code:
+            actions = [
+                          transactions.create_create_account_action(),
+                          transactions.create_transfer_action(initial_balance),
+                          transactions.create_deploy_contract_action(code)
+                      ] + ([transactions.create_full_access_key_action(public_key)] if public_key is not None else [])
+            return await self._sign_and_submit_tx(contract_id, actions)
+
+    async def create_deploy_and_init_contract(
+            self,
+            contract_id: str,
+            public_key: str,
+            contract_code: ContractCodeType,
+            initial_balance: int,
+            args: bytes,
+            gas: int = DEFAULT_ATTACHED_GAS,
+            init_method_name: str = "new"
+    ) -> dict:
+        args = codec.dumps(args)
+        with _open_contract_code(contract_code) as code:
+            actions = [
+                          transactions.create_create_account_action(),
+                          transactions.create_transfer_action(initial_balance),
+                          transactions.create_deploy_contract_action(code),
+                          transactions.create_function_call_action(init_method_name, args, gas, 0)
+                      ] + ([transactions.create_full_access_key_action(public_key)] if public_key is not None else [])
+            return await self._sign_and_submit_tx(contract_id, actions)
+
+    async def _view_function_bytes(self, contract_id: str, method_name: str, args: Optional[dict]) -> dict:
+        result = await self._provider.view_call(contract_id, method_name, codec.dumps(args))
+        if "error" in result:
+            raise ViewFunctionError(result['error'])
+        result['result'] = bytes(result['result'])
+        return result
+
+    async def view_function(
+            self,
+            contract_id: str,
+            method_name: str,
+            args: Optional[dict] = None,
+            raw: bool = False
+    ) -> dict:
+        """NEAR view method. The result is decoded from JSON, or returned as bytes if raw."""
+        result = await self._view_function_bytes(contract_id, method_name, args)
+        if not raw:
+            result['result'] = codec.loads(result['result'])
+        return result
+
+    async def view_function_borsh(
+            self,
+            contract_id: str,
+            method_name: str,
+            deserializer: 'BinaryDeserializer',
+            result_type: Union[type, str, list, dict],
+            args: Optional[dict] = None
+    ) -> dict:
+        """
+        NEAR view method returning Borsh. The result is decoded as result_type, a class of the deserializer
+        schema or a field type such as 'u128'."""
+        result = await self._view_function_bytes(contract_id, method_name, args)
+        result['result'] = deserializer.deserialize(result['result'], result_type)
+        return result
@@ -0,0 +1,307 @@
+import asyncio
+import base64
+import itertools
+import time
+from typing import Union, Any, Optional, List, Iterable, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from near_api import codec, metrics
+from near_api.providers import (
+    TimeoutType, FinalityTypes, JsonProvider, JsonProviderError, RpcCallType,
+    DEFAULT_MAX_BATCH_SIZE, _batch_results, _JSON_HEADERS
+)
+
+# Default number of keep-alive connections kept open to the RPC endpoint.
+DEFAULT_POOL_SIZE = 100
+
+# Default maximum number of requests in flight at once per provider.
+DEFAULT_MAX_CONCURRENCY = 1000
+
+
+def _client_timeout(timeout: 'TimeoutType') -> aiohttp.ClientTimeout:
+    """Translate a requests-style TimeoutType into an aiohttp.ClientTimeout."""
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+    else:
+        connect = read = timeout
+    return aiohttp.ClientTimeout(total=None, sock_connect=connect, sock_read=read)
+
+
+def _rpc_methods(j: Any) -> List[str]:
+    """Methods of the calls of a JSON-RPC request body, for instrumentation; None is a status request."""
+    if j is None:
+        return ["status"]
+    if isinstance(j, list):
+        return [item['method'] for item in j]
+    return [j['method']]
+
+
+class AsyncJsonProvider(object):
+    """asyncio counterpart of JsonProvider, with the same methods as coroutines.
+
+    All requests share one aiohttp connection pool of pool_size connections, and at most
+    max_concurrency requests are in flight at once; further calls wait for a free slot."""
+
+    def __init__(
+            self,
+            rpc_addr,
+            proxies=None,
+            pool_size: int = DEFAULT_POOL_SIZE,
+            max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+            session: Optional[aiohttp.ClientSession] = None
+    ):
+        if isinstance(rpc_addr, tuple):
+            self._rpc_addr = "http://%s:%s" % rpc_addr
+        else:
+            self._rpc_addr = rpc_addr
+        self.proxies = proxies
+        self._pool_size = pool_size
+        self._max_concurrency = max_concurrency
+        self._session = session
+        self._owns_session = session is None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._request_ids = itertools.count(1)
+
+    async def __aenter__(self) -> 'AsyncJsonProvider':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The pooled session, created on first use inside the running event loop."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self._pool_size, limit_per_host=self._pool_size)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._owns_session = True
+        return self._session
+
+    async def close(self):
+        session, self._session = self._session, None
+        if session is not None and self._owns_session:
+            await session.close()
+
+    def rpc_addr(self) -> str:
+        return self._rpc_addr
+
+    def _proxy(self) -> Optional[str]:
+        if not self.proxies:
+            return None
+        return self.proxies.get(urlsplit(self._rpc_addr).scheme)
+
+    async def _request(self, method: str, url: str, timeout: 'TimeoutType', j: Any = None) -> Any:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        async with self._semaphore:
+            data = None if j is None else codec.dumps(j)
+            start = time.perf_counter()
+            body = b''
+            try:
+                async with self.session.request(method, url, data=data, headers=_JSON_HEADERS,
+                                                timeout=_client_timeout(timeout), proxy=self._proxy()) as r:
+                    r.raise_for_status()
+                    body = await r.read()
+                received = time.perf_counter()
+                content = codec.loads(body)
+            except Exception as e:
+                if metrics.enabled():
+                    metrics.report_request(_rpc_methods(j), time.perf_counter() - start, len(data or b''), len(body),
+                                           error=e)
+                raise
+            if metrics.enabled():
+                metrics.report_timing("json_decode", time.perf_counter() - received)
+                metrics.report_request(_rpc_methods(j), received - start, len(data or b''), len(body), content=content)
+            return content
+
+    async def json_rpc(self, method: str, params: Union[dict, list, str], timeout: 'TimeoutType' = 2.0) -> dict:
+        j = {
+            'method': method,
+            'params': params,
+            'id': "dontcare",
+            'jsonrpc': "2.0"
+        }
+        content = await self._request("POST", self.rpc_addr(), timeout, j)
+        if "error" in content:
+            raise JsonProviderError(content['error'])
+        return content['result']
+
+    async def json_rpc_batch(
+            self,
+            calls: Iterable['RpcCallType'],
+            timeout: 'TimeoutType' = 2.0,
+            raise_on_error: bool = True,
+            max_batch_size: int = DEFAULT_MAX_BATCH_SIZE
+    ) -> List[Any]:
+        """See JsonProvider.json_rpc_batch. Batches exceeding max_batch_size are sent concurrently."""
+        calls = list(calls)
+        chunks = await asyncio.gather(*[
+            self._send_batch(calls[start:start + max_batch_size], timeout, raise_on_error)
+            for start in range(0, len(calls), max_batch_size)
+        ])
+        return [result for chunk in chunks for result in chunk]
+
+    async def _send_batch(self, calls: List['RpcCallType'], timeout: 'TimeoutType', raise_on_error: bool) -> List[Any]:
+        ids = [next(self._request_ids) for _ in calls]
+        j = [
+            {'method': method, 'params': params, 'id': id_, 'jsonrpc': "2.0"}
+            for id_, (method, params) in zip(ids, calls)
+        ]
+        return _batch_results(await self._request("POST", self.rpc_addr(), timeout, j), ids, raise_on_error)
+
+    async def send_tx(self, signed_tx: bytes, timeout: 'TimeoutType' = 2.0) -> dict:
+        return await self.json_rpc("broadcast_tx_async",
+                                   [base64.b64encode(signed_tx).decode('utf8')], timeout=timeout)
+
+    async def send_tx_and_wait(self, signed_tx: bytes, timeout: 'TimeoutType') -> dict:
+        return await self.json_rpc("broadcast_tx_commit",
+                                   [base64.b64encode(signed_tx).decode('utf8')],
+                                   timeout=timeout)
+
+    async def get_status(self, timeout: 'TimeoutType' = 2.0) -> dict:
+        return await self._request("GET", "%s/status" % self.rpc_addr(), timeout)
+
+    async def get_validators(self, timeout: 'TimeoutType' = 2.0) -> dict:
+        return await self.json_rpc("validators", [None], timeout=timeout)
+
+    async def query(self, query_object: str, timeout: 'TimeoutType' = 2.0) -> dict:
+        return await self.json_rpc("query", query_object, timeout=timeout)
+
+    async def get_account(
+            self,
+            account_id: str,
+            finality: str = FinalityTypes.OPTIMISTIC,
+            timeout: 'TimeoutType' = 2.0
+    ) -> dict:
+        return await self.json_rpc("query", JsonProvider._account_query(account_id, finality), timeout=timeout)
+
+    async def get_accounts(
+            self,
+            account_ids: Iterable[str],
+            finality: str = FinalityTypes.OPTIMISTIC,
+            timeout: 'TimeoutType' = 2.0,
+            raise_on_error: bool = True
+    ) -> List[dict]:
+        return await self.json_rpc_batch(
+            [("query", JsonProvider._account_query(account_id, finality)) for account_id in account_ids],
+            timeout=timeout, raise_on_error=raise_on_error)
+
+    async def get_access_key_list(
+            self,
+            account_id: str,
+            finality: str = FinalityTypes.OPTIMISTIC,
+            timeout: 'TimeoutType' = 2.0
+    ) -> dict:
+        return await self.json_rpc(
+            "query", {
+                'request_type': "view_access_key_list",
+                'account_id': account_id,
+                'finality': finality
+            }, timeout=timeout)
+
+    async def get_access_key(
+            self,
+            account_id: str,
+            public_key: str,
+            finality: str = FinalityTypes.OPTIMISTIC,
+            timeout: 'TimeoutType' = 2.0
+    ) -> dict:
+        return await self.json_rpc("query", JsonProvider._access_key_query(account_id, public_key, finality),
+                                   timeout=timeout)
+
+    async def get_access_keys(
+            self,
+            keys: Iterable[Tuple[str, str]],
+            finality: str = FinalityTypes.OPTIMISTIC,
+            timeout: 'TimeoutType' = 2.0,
+            raise_on_error: bool = True
+    ) -> List[dict]:
+        return await self.json_rpc_batch(
+            [
+                ("query", JsonProvider._access_key_query(account_id, public_key, finality))
+                for account_id, public_key in keys
+            ],
+            timeout=timeout, raise_on_error=raise_on_error)
+
+    async def view_call(
+            self,
+            account_id: str,
+            method_name: str,
+            args: bytes,
+            finality: str = FinalityTypes.OPTIMISTIC,
+            timeout: 'TimeoutType' = 2.0
+    ) -> dict:
+        return await self.json_rpc("query", JsonProvider._view_call_query(account_id, method_name, args, finality),
+                                   timeout=timeout)
+
+    async def view_calls(
+            self,
+            calls: Iterable[Tuple[str, str, bytes]],
+            finality: str = FinalityTypes.OPTIMISTIC,
+            timeout: 'TimeoutType' = 2.0,
+            raise_on_error: bool = True
+    ) -> List[dict]:
+        return await self.json_rpc_batch(
+            [
+                ("query", JsonProvider._view_call_query(account_id, method_name, args, finality))
+                for account_id, method_name, args in calls
+            ],
+            timeout=timeout, raise_on_error=raise_on_error)
+
+    async def get_block(self, block_id: str, timeout: 'TimeoutType' = 2.0) -> dict:
+        return await self.json_rpc("block", [block_id], timeout=timeout)
+
+    async def get_blocks(
+            self,
+            block_ids: Iterable[str],
+            timeout: 'TimeoutType' = 2.0,
+            raise_on_error: bool = True
+    ) -> List[dict]:
+        return await self.json_rpc_batch([("block", [block_id]) for block_id in block_ids],
+                                         timeout=timeout, raise_on_error=raise_on_error)
+
+    async def get_chunk(self, chunk_id: str, timeout: 'TimeoutType' = 2.0) -> dict:
+        return await self.json_rpc("chunk", [chunk_id], timeout=timeout)
+
+    async def get_chunks(
+            self,
+            chunk_ids: Iterable[str],
+            timeout: 'TimeoutType' = 2.0,
+            raise_on_error: bool = True
+    ) -> List[dict]:
+        return await self.json_rpc_batch([("chunk", [chunk_id]) for chunk_id in chunk_ids],
+                                         timeout=timeout, raise_on_error=raise_on_error)
+
+    async def get_tx(self, tx_hash: str, tx_recipient_id: str, timeout: 'TimeoutType' = 2.0) -> dict:
+        return await self.json_rpc("tx", [tx_hash, tx_recipient_id], timeout=timeout)
+
+    async def get_changes_in_block(
+            self,
+            block_id: Union[str] = None,
+            finality: str = None,
+            timeout: 'TimeoutType' = 2.0
+    ) -> dict:
+        """Use either block_id or finality. Choose finality from "finality_types" class."""
+        return await self.json_rpc("EXPERIMENTAL_changes_in_block", JsonProvider._block_reference(block_id, finality),
+                                   timeout=timeout)
+
+    async def get_validators_ordered(self, block_hash: bytes) -> dict:
+        return await self.json_rpc("EXPERIMENTAL_validators_ordered", [block_hash])
+
+    async def get_light_client_proof(
+            self,
+            outcome_type: str,
+            tx_or_receipt_id: str,
+            sender_or_receiver_id: str,
+            light_client_head: str
+    ) -> dict:
+        return await self.json_rpc("light_client_proof", JsonProvider._light_client_proof_params(
+            outcome_type, tx_or_receipt_id, sender_or_receiver_id, light_client_head))
+
+    async def get_next_light_client_block(self, last_block_hash) -> dict:
+        return await self.json_rpc("next_light_client_block", [last_block_hash])
+
+    async def get_receipt(self, receipt_hash, timeout: 'TimeoutType' = 2.0) -> dict:
+        return await self.json_rpc("EXPERIMENTAL_receipt", [receipt_hash], timeout=timeout)
@@ -0,0 +1,130 @@
+import logging
+import threading
+import time
+from typing import Optional
+
+import base58
+
+import near_api
+
+log = logging.getLogger(__name__)
+
+# Maximum age in seconds of a cached block hash before it is fetched again.
+# Transactions stay valid for a day of blocks after their block hash, so this is very conservative.
+DEFAULT_MAX_AGE = 60.0
+
+
+def _decode_status_block_hash(status: dict) -> bytes:
+    return base58.b58decode(status['sync_info']['latest_block_hash'].encode('utf8'))
+
+
+class BlockHashCache(object):
+    """
+    Recent block hash shared by the transactions signed through it, so that signing does not need a
+    get_status call every time. The hash is fetched again once it is older than max_age seconds, or
+    every refresh_interval seconds by a background thread if one is given. Thread-safe."""
+
+    def __init__(
+            self,
+            provider: 'near_api.providers.JsonProvider',
+            max_age: float = DEFAULT_MAX_AGE,
+            refresh_interval: Optional[float] = None
+    ):
+        self._provider = provider
+        self._max_age = max_age
+        self._block_hash: Optional[bytes] = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if refresh_interval is not None:
+            self._thread = threading.Thread(target=self._refresh_loop, args=(refresh_interval,),
+                                            name="near-block-hash-refresh", daemon=True)
+            self._thread.start()
+
+    def __enter__(self) -> 'BlockHashCache':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def max_age(self) -> float:
+        return self._max_age
+
+    def get(self) -> bytes:
+        """Return a recent block hash, fetching it only if the cached one is missing or too old."""
+        block_hash = self._block_hash
+        if block_hash is not None and time.monotonic() - self._fetched_at < self._max_age:
+            return block_hash
+        with self._lock:
+            if self._block_hash is not None and time.monotonic() - self._fetched_at < self._max_age:
+                return self._block_hash
+            return self._fetch()
+
+    def refresh(self) -> bytes:
+        """Fetch and cache the latest block hash."""
+        with self._lock:
+            return self._fetch()
+
+    def _fetch(self) -> bytes:
+        block_hash = _decode_status_block_hash(self._provider.get_status())
+        self._block_hash, self._fetched_at = block_hash, time.monotonic()
+        return block_hash
+
+    def invalidate(self):
+        """Drop the cached hash, e.g. after the node rejected a transaction as expired."""
+        self._block_hash = None
+
+    def _refresh_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception:
+                log.warning("Failed to refresh block hash", exc_info=True)
+
+    def close(self):
+        """Stop the background refresh thread, if any."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+class AsyncBlockHashCache(object):
+    """asyncio counterpart of BlockHashCache for an AsyncJsonProvider, refreshed on demand once older than max_age."""
+
+    def __init__(
+            self,
+            provider: 'near_api.async_providers.AsyncJsonProvider',
+            max_age: float = DEFAULT_MAX_AGE
+    ):
+        self._provider = provider
+        self._max_age = max_age
+        self._block_hash: Optional[bytes] = None
+        self._fetched_at = 0.0
+        self._lock: Optional['asyncio.Lock'] = None
+
+    @property
+    def max_age(self) -> float:
+        return self._max_age
+
+    async def get(self) -> bytes:
+        if self._block_hash is not None and time.monotonic() - self._fetched_at < self._max_age:
+            return self._block_hash
+        if self._lock is None:
+            # asyncio is only imported once used, it takes a third of the import time of near_api.account.
+            import asyncio
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._block_hash is not None and time.monotonic() - self._fetched_at < self._max_age:
+                return self._block_hash
+            return await self.refresh()
+
+    async def refresh(self) -> bytes:
+        block_hash = _decode_status_block_hash(await self._provider.get_status())
+        self._block_hash, self._fetched_at = block_hash, time.monotonic()
+        return block_hash
+
+    def invalidate(self):
+        self._block_hash = None
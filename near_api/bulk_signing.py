@@ -0,0 +1,87 @@
+import collections
+import itertools
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, List, Iterable, Iterator, Tuple
+
+import near_api
+from near_api import transactions
+from near_api.signer import KeyPair, Signer
+
+# Number of transactions signed by a worker per task, to amortize inter-process communication.
+DEFAULT_CHUNK_SIZE = 256
+
+SigningJobType = Tuple[str, List['transactions.Action'], int]
+""" A (receiver_id, actions, nonce) transaction to sign."""
+
+# Signer of the current worker process, set up once by init_signing_worker().
+_worker_signer: Optional['Signer'] = None
+
+
+def init_signing_worker(account_id: str, secret_key: bytes):
+    """ProcessPoolExecutor initializer setting up the signer used by sign_transactions in the worker."""
+    global _worker_signer
+    _worker_signer = Signer(account_id, KeyPair(secret_key))
+
+
+def _sign_chunk(
+        jobs: List['SigningJobType'],
+        block_hash: bytes,
+        signer: Optional['Signer'] = None
+) -> List[Tuple[bytes, bytes]]:
+    signer = signer or _worker_signer
+    return [
+        transactions.sign_and_hash_transaction(receiver_id, nonce, actions, block_hash, signer)
+        for receiver_id, actions, nonce in jobs
+    ]
+
+
+def _chunks(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    chunk = list(itertools.islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(itertools.islice(iterator, size))
+
+
+def sign_transactions(
+        signer: 'near_api.signer.Signer',
+        jobs: Iterable['SigningJobType'],
+        block_hash: bytes,
+        use_processes: bool = True,
+        max_workers: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        executor: Optional[Executor] = None
+) -> Iterator[Tuple[bytes, bytes]]:
+    """
+    Sign many transactions of one signer in parallel, yielding (signed_tx, tx_hash) in the order of jobs,
+    as produced by transactions.sign_and_hash_transaction.
+
+    Jobs are consumed lazily and signed in chunks of chunk_size by a pool of max_workers processes, or threads
+    if use_processes is False; at most two chunks per worker are pending at any time. With processes, only the
+    secret key is sent to the workers, once, and jobs and actions must be picklable. An existing executor may be
+    passed instead; it is then not shut down, and if it is a process pool it must have been created with
+    initializer=init_signing_worker and initargs=(account_id, secret_key) of the signer."""
+    own_executor = executor is None
+    if own_executor:
+        if use_processes:
+            executor = ProcessPoolExecutor(
+                max_workers, initializer=init_signing_worker,
+                initargs=(signer.account_id, signer.key_pair.secret_key))
+        else:
+            executor = ThreadPoolExecutor(max_workers)
+    worker_signer = None if isinstance(executor, ProcessPoolExecutor) else signer
+    max_pending = 2 * (max_workers or os.cpu_count() or 1)
+    pending = collections.deque()
+    try:
+        for chunk in _chunks(jobs, chunk_size):
+            pending.append(executor.submit(_sign_chunk, chunk, block_hash, worker_signer))
+            while len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        if own_executor:
+            executor.shutdown(wait=True)
@@ -0,0 +1,154 @@
+import collections
+import math
+import threading
+import time
+from typing import Optional, Union, Any, Tuple, Iterable
+
+from near_api import codec
+
+# Default bounds of an RpcCache.
+DEFAULT_MAX_ENTRIES = 10_000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Default block time in seconds. Results read at "final" finality live one block time, and results at
+# "optimistic" finality half of it, unless their time to live is given.
+DEFAULT_BLOCK_TIME = 1.0
+
+# Methods whose result is fully determined by a block or chunk id in their params.
+_BLOCK_METHODS = ("block", "chunk", "EXPERIMENTAL_changes_in_block")
+
+# Prefixes of the methods sending transactions. They are not idempotent, a transaction sent twice may be
+# executed twice, so their requests are never cached, shared, hedged or retried once they may have reached a node.
+_TX_METHODS = ("broadcast_tx", "send_tx")
+
+# Queries cached only when pinned to a block_id: access key nonces read at a finality must be fresh, a stale one
+# would resync a NonceManager backwards.
+_LATEST_ONLY_REQUESTS = ("view_access_key", "view_access_key_list")
+
+MISSING = object()
+""" Returned by RpcCache.get on a cache miss."""
+
+
+def rpc_key(method: str, params: Union[dict, list, str]) -> Tuple[str, bytes]:
+    """Key identifying a call by its method and params, whatever the order of their keys."""
+    return method, codec.dumps(params, sort_keys=True)
+
+
+def is_idempotent(methods: Iterable[str]) -> bool:
+    """Whether a request carrying calls of methods may be sent more than once."""
+    return not any(method.startswith(_TX_METHODS) for method in methods)
+
+
+def _shallow_copy(result: Any) -> Any:
+    if isinstance(result, dict):
+        return dict(result)
+    if isinstance(result, list):
+        return list(result)
+    return result
+
+
+class RpcCache(object):
+    """
+    Read-through cache of JSON-RPC results for a JsonProvider, bounded by entry count and total bytes with LRU
+    eviction. Results pinned to a block_id (query, block, chunk and changes_in_block) never change and are kept
+    until evicted; query results at "final" or "optimistic" finality expire after final_ttl or optimistic_ttl
+    seconds, by default one and half a block_time, except access key queries which are not cached at a finality.
+    Other methods, including transaction broadcasts, are never cached. Thread-safe.
+
+    Results are kept decoded. A hit returns a shallow copy of the cached dict or list: its top-level items may be
+    replaced, but nested values are shared with the cache and must be treated as read-only."""
+
+    def __init__(
+            self,
+            max_entries: int = DEFAULT_MAX_ENTRIES,
+            max_bytes: int = DEFAULT_MAX_BYTES,
+            final_ttl: Optional[float] = None,
+            optimistic_ttl: Optional[float] = None,
+            block_time: float = DEFAULT_BLOCK_TIME
+    ):
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._final_ttl = final_ttl if final_ttl is not None else block_time
+        self._optimistic_ttl = optimistic_ttl if optimistic_ttl is not None else block_time / 2
+        # Entries are (result, size, expiry).
+        self._entries: 'collections.OrderedDict[Tuple[str, bytes], Tuple[Any, int, float]]' = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def ttl(self, method: str, params: Union[dict, list, str]) -> Optional[float]:
+        """Time to live of the result of a call, math.inf if it never changes, None if it must not be cached."""
+        if method == "query" and isinstance(params, dict):
+            if 'block_id' in params:
+                return math.inf
+            if params.get('request_type') in _LATEST_ONLY_REQUESTS:
+                return None
+            if params.get('finality') == "final":
+                return self._final_ttl
+            if params.get('finality') == "optimistic":
+                return self._optimistic_ttl
+            return None
+        if method in _BLOCK_METHODS:
+            if isinstance(params, list) and params and params[0] is not None:
+                return math.inf
+            if isinstance(params, dict) and 'block_id' in params:
+                return math.inf
+        return None
+
+    def get(self, method: str, params: Union[dict, list, str]) -> Any:
+        """Return the cached result of a call, or MISSING."""
+        key = rpc_key(method, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return _shallow_copy(entry[0])
+
+    def put(self, method: str, params: Union[dict, list, str], result: Any, size: Optional[int] = None):
+        """
+        Store the result of a call if it is cacheable. size is the size of its JSON encoding, e.g. of the response
+        it was decoded from, about the memory it takes decoded; without it, the result is encoded to measure it."""
+        ttl = self.ttl(method, params)
+        if ttl is None:
+            return
+        if size is None:
+            size = len(codec.dumps(result))
+        if size > self._max_bytes:
+            return
+        key = rpc_key(method, params)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            # The caller keeps the result it stores, which it may modify like the copies returned by get().
+            self._entries[key] = (_shallow_copy(result), size, time.monotonic() + ttl)
+            self._bytes += size
+            while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: Tuple[str, bytes]):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+            }
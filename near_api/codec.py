@@ -0,0 +1,116 @@
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+class JsonCodec(object):
+    """JSON encoder and decoder used for RPC requests and responses, contract arguments and key files."""
+    name = "json"
+
+    def dumps(self, obj: Any, sort_keys: bool = False) -> bytes:
+        return json.dumps(obj, sort_keys=sort_keys).encode('utf8')
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+
+# Integers beyond 64 bits, such as u128 balances, are decoded by orjson as floats. Such a number has at least 19
+# digits, right after a separator, whitespace or minus sign. Mapping all of these to ':' and digits to '0' turns the
+# search for one into a single substring search, a few times faster than decoding. Digits inside strings, as in
+# amounts encoded as strings, are preceded by a quote and do not match; the few strings that do match are decoded
+# by the standard library, correctly though slower.
+_BIG_INT_TRANSLATION = bytes.maketrans(b"0123456789-[, \t\r\n", b"0" * 10 + b":" * 7)
+_BIG_INT_DIGITS = b"0" * 19
+_BIG_INT = b":" + _BIG_INT_DIGITS
+
+
+def _may_have_big_int(data: bytes) -> bool:
+    translated = data.translate(_BIG_INT_TRANSLATION)
+    return _BIG_INT in translated or translated.startswith(_BIG_INT_DIGITS)
+
+
+class OrjsonCodec(JsonCodec):
+    """
+    Codec based on orjson, falling back to the standard library for integers beyond 64 bits, which orjson cannot
+    encode and decodes as floats."""
+    name = "orjson"
+
+    def dumps(self, obj: Any, sort_keys: bool = False) -> bytes:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+        except TypeError:
+            return super().dumps(obj, sort_keys)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        if isinstance(data, str):
+            data = data.encode('utf8')
+        if _may_have_big_int(data):
+            return super().loads(data)
+        return orjson.loads(data)
+
+
+class UjsonCodec(JsonCodec):
+    """Codec based on ujson, falling back to the standard library for integers beyond 64 bits."""
+    name = "ujson"
+
+    def dumps(self, obj: Any, sort_keys: bool = False) -> bytes:
+        try:
+            return ujson.dumps(obj, sort_keys=sort_keys, escape_forward_slashes=False).encode('utf8')
+        except OverflowError:
+            return super().dumps(obj, sort_keys)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        try:
+            return ujson.loads(data)
+        except ValueError:
+            # Integers beyond 64 bits are rejected by ujson; invalid JSON raises again below.
+            return super().loads(data)
+
+
+def default_codec() -> 'JsonCodec':
+    """The fastest codec installed: orjson, then ujson, then the standard library."""
+    if orjson is not None:
+        return OrjsonCodec()
+    if ujson is not None:
+        return UjsonCodec()
+    return JsonCodec()
+
+
+_codec = default_codec()
+
+
+def get_codec() -> 'JsonCodec':
+    return _codec
+
+
+def set_codec(codec: Union['JsonCodec', str]):
+    """Replace the codec used by the library, by instance or by name: "orjson", "ujson" or "json"."""
+    global _codec
+    if isinstance(codec, str):
+        codecs = {'orjson': (OrjsonCodec, orjson), 'ujson': (UjsonCodec, ujson), 'json': (JsonCodec, json)}
+        if codec not in codecs:
+            raise ValueError("Unknown JSON codec %s" % codec)
+        cls, module = codecs[codec]
+        if module is None:
+            raise ImportError("JSON codec %s is not installed" % codec)
+        codec = cls()
+    _codec = codec
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    """Encode obj to UTF-8 JSON with the current codec."""
+    return _codec.dumps(obj, sort_keys)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode JSON with the current codec."""
+    return _codec.loads(data)
@@ -0,0 +1,181 @@
+import contextlib
+import itertools
+import threading
+from typing import Optional, List, Iterator, Union
+
+import near_api
+from near_api import transactions
+from near_api.account import Account
+from near_api.block_hash import BlockHashCache
+from near_api.nonce import NonceManager
+from near_api.signer import KeyPair, Signer
+
+
+class KeyPoolStrategies:
+    ROUND_ROBIN = "round_robin"
+    LEAST_LOADED = "least_loaded"
+
+
+FULL_ACCESS = "FullAccess"
+
+PermissionType = Union[str, dict]
+""" Permission of an access key as returned by get_access_key: FULL_ACCESS or {'FunctionCall': {...}}."""
+
+
+def _permits(permission: 'PermissionType', receiver_id: str, actions: List['transactions.Action']) -> bool:
+    """
+    Whether an access key with permission may sign a transaction of actions to receiver_id. A function call key
+    only signs a single FunctionCall action without deposit to its receiver, calling one of its methods if any."""
+    if permission == FULL_ACCESS:
+        return True
+    function_call = permission.get('FunctionCall') if isinstance(permission, dict) else None
+    if function_call is None or receiver_id != function_call.get('receiver_id') or len(actions) != 1:
+        return False
+    action = actions[0]
+    if action.enum != "functionCall" or action.functionCall.deposit != 0:
+        return False
+    method_names = function_call.get('method_names') or []
+    return not method_names or action.functionCall.methodName in method_names
+
+
+class KeyPool(object):
+    """
+    Access keys of one account used as parallel signing lanes. NEAR orders transactions per access key,
+    so transactions signed with different keys of the pool do not wait on each other. Every key has the
+    permission of its access key, full access unless given, and only signs transactions it permits. Thread-safe."""
+
+    def __init__(
+            self,
+            signers: List['Signer'],
+            strategy: str = KeyPoolStrategies.LEAST_LOADED,
+            permissions: Optional[List['PermissionType']] = None
+    ):
+        if strategy not in (KeyPoolStrategies.ROUND_ROBIN, KeyPoolStrategies.LEAST_LOADED):
+            raise ValueError("Unknown key pool strategy %s" % strategy)
+        self._signers: List['Signer'] = list(signers)
+        self._permissions: List['PermissionType'] = (
+            list(permissions) if permissions is not None else [FULL_ACCESS] * len(self._signers))
+        self._in_flight: List[int] = [0] * len(self._signers)
+        self._strategy = strategy
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._signers)
+
+    @property
+    def signers(self) -> List['Signer']:
+        return list(self._signers)
+
+    def in_flight(self) -> List[int]:
+        """Number of transactions currently in flight for each signer, in the order of signers."""
+        with self._lock:
+            return list(self._in_flight)
+
+    def add(self, signer: 'Signer', permission: 'PermissionType' = FULL_ACCESS):
+        with self._lock:
+            self._signers.append(signer)
+            self._permissions.append(permission)
+            self._in_flight.append(0)
+
+    def acquire(
+            self,
+            receiver_id: Optional[str] = None,
+            actions: Optional[List['transactions.Action']] = None
+    ) -> 'Signer':
+        """
+        Pick a signer for a new transaction, among those permitted to sign actions to receiver_id if actions
+        are given. Every acquire() must be followed by a release()."""
+        with self._lock:
+            candidates = [
+                idx for idx, permission in enumerate(self._permissions)
+                if actions is None or _permits(permission, receiver_id, actions)
+            ]
+            if not candidates:
+                raise ValueError("No key of the pool may sign this transaction" if self._signers
+                                 else "Key pool is empty")
+            if self._strategy == KeyPoolStrategies.ROUND_ROBIN:
+                idx = candidates[next(self._next) % len(candidates)]
+            else:
+                # Ties go round robin, so idle keys are used evenly.
+                start = next(self._next) % len(candidates)
+                idx = min(candidates[start:] + candidates[:start], key=self._in_flight.__getitem__)
+            self._in_flight[idx] += 1
+            return self._signers[idx]
+
+    def release(self, signer: 'Signer'):
+        with self._lock:
+            idx = self._signers.index(signer)
+            self._in_flight[idx] -= 1
+
+    @contextlib.contextmanager
+    def lane(
+            self,
+            receiver_id: Optional[str] = None,
+            actions: Optional[List['transactions.Action']] = None
+    ) -> Iterator['Signer']:
+        signer = self.acquire(receiver_id, actions)
+        try:
+            yield signer
+        finally:
+            self.release(signer)
+
+
+class MultiKeyAccount(Account):
+    """
+    Account signing each transaction with one key of a KeyPool, so several threads sending from the same account
+    proceed in parallel. Every key keeps its own nonce through the account's NonceManager, and transactions its
+    permission does not allow, such as transfers for a function call key, go to a full access key.
+    The primary signer is part of the pool and must be a full access key to provision new keys with add_keys()."""
+
+    def __init__(
+            self,
+            provider: 'near_api.providers.JsonProvider',
+            signer: 'Signer',
+            key_pairs: Optional[List['KeyPair']] = None,
+            account_id: Optional[str] = None,
+            strategy: str = KeyPoolStrategies.LEAST_LOADED,
+            block_hash_cache: Optional['BlockHashCache'] = None,
+            nonce_manager: Optional['NonceManager'] = None
+    ):
+        super().__init__(provider, signer, account_id, block_hash_cache, nonce_manager)
+        self._key_pool = KeyPool([self._signer], strategy, [self._access_key['permission']])
+        self._add_to_pool(key_pairs or [])
+
+    @property
+    def key_pool(self) -> 'KeyPool':
+        return self._key_pool
+
+    def _add_to_pool(self, key_pairs: List['KeyPair']):
+        public_keys = [key_pair.encoded_public_key() for key_pair in key_pairs]
+        access_keys = self._provider.get_access_keys([(self._account_id, public_key) for public_key in public_keys])
+        for key_pair, public_key, access_key in zip(key_pairs, public_keys, access_keys):
+            self._nonce_manager.seed(self._account_id, public_key, access_key['nonce'])
+            self._key_pool.add(Signer(self._account_id, key_pair), access_key['permission'])
+
+    def _acquire_signer(self, receiver_id: str, actions: List['transactions.Action']) -> 'Signer':
+        return self._key_pool.acquire(receiver_id, actions)
+
+    def _release_signer(self, signer: 'Signer'):
+        self._key_pool.release(signer)
+
+    def add_keys(
+            self,
+            count: int,
+            receiver_id: Optional[str] = None,
+            method_names: Optional[List[str]] = None,
+            allowance: Optional[int] = None
+    ) -> List['KeyPair']:
+        """
+        Generate count new keys, add them to the account in one transaction signed by the primary key and to the pool.
+        Keys get function call access to method_names (all if empty) of receiver_id, by default the contract of the
+        account itself, spending at most allowance."""
+        key_pairs = [KeyPair() for _ in range(count)]
+        actions = [
+            transactions.create_function_call_access_key_action(
+                key_pair.public_key, receiver_id or self._account_id, method_names, allowance)
+            for key_pair in key_pairs
+        ]
+        self._sign_and_submit_tx_with(self._signer, self._account_id, actions)
+        self._add_to_pool(key_pairs)
+        return key_pairs
@@ -0,0 +1,226 @@
+import bisect
+import threading
+from typing import Optional, List, Dict, Tuple, Any, Sequence
+
+# Default histogram buckets of RPC latencies in seconds, request and response sizes in bytes, and
+# transaction serialization, hashing and signing times in seconds.
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+DEFAULT_TIMING_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01)
+
+
+class Observer(object):
+    """
+    Receiver of instrumentation events, registered with add_observer(). Methods are called synchronously on the
+    thread doing the work, so they should be cheap; the default implementations do nothing.
+
+    A request carries one call, or a batch of calls, in which case method is their method if they all share one,
+    "batch" otherwise. error is None on success, otherwise the kind of failure of the whole request: "HTTP_<status>"
+    or the exception class name. JSON-RPC errors of single calls are reported by on_rpc_error, with their cause name
+    if any (e.g. "UNKNOWN_BLOCK"), otherwise their name. Timed operations are "serialize", "hash" and "sign"
+    of sign_and_serialize_transaction, and "json_decode" of responses."""
+
+    def on_request(
+            self,
+            method: str,
+            calls: int,
+            latency: float,
+            request_bytes: int,
+            response_bytes: int,
+            error: Optional[str]
+    ):
+        pass
+
+    def on_rpc_error(self, method: str, kind: str):
+        pass
+
+    def on_timing(self, operation: str, seconds: float):
+        pass
+
+
+_observers: List['Observer'] = []
+
+
+def add_observer(observer: 'Observer'):
+    global _observers
+    _observers = _observers + [observer]
+
+
+def remove_observer(observer: 'Observer'):
+    global _observers
+    _observers = [o for o in _observers if o is not observer]
+
+
+def enabled() -> bool:
+    """Whether any observer is registered, so instrumentation can be skipped entirely otherwise."""
+    return bool(_observers)
+
+
+def _request_method(methods: Sequence[str]) -> str:
+    method = methods[0] if methods else "batch"
+    return method if all(m == method for m in methods) else "batch"
+
+
+def error_kind(error: Any) -> str:
+    """Kind of a JSON-RPC error object, or of an exception raised while sending a request."""
+    if isinstance(error, dict):
+        cause = error.get('cause')
+        if isinstance(cause, dict) and cause.get('name'):
+            return cause['name']
+        return error.get('name') or "UNKNOWN"
+    # requests.HTTPError carries the response, aiohttp.ClientResponseError the status. Neither library is
+    # imported here, so signing alone does not load them.
+    status = getattr(getattr(error, 'response', None), 'status_code', None) or getattr(error, 'status', None)
+    if isinstance(status, int):
+        return "HTTP_%d" % status
+    return type(error).__name__
+
+
+def report_request(
+        methods: Sequence[str],
+        latency: float,
+        request_bytes: int,
+        response_bytes: int,
+        error: Optional[BaseException] = None,
+        content: Any = None
+):
+    """Report a sent request to the observers, with its decoded response content on success."""
+    method = _request_method(methods)
+    kind = None if error is None else error_kind(error)
+    rpc_errors = []
+    if isinstance(content, dict) and isinstance(content.get('error'), dict):
+        rpc_errors.append((method, error_kind(content['error'])))
+    elif isinstance(content, list):
+        rpc_errors.extend(
+            (methods[idx] if idx < len(methods) else method, error_kind(item['error']))
+            for idx, item in enumerate(content) if isinstance(item, dict) and isinstance(item.get('error'), dict))
+    for observer in _observers:
+        observer.on_request(method, len(methods), latency, request_bytes, response_bytes, kind)
+        for rpc_method, rpc_kind in rpc_errors:
+            observer.on_rpc_error(rpc_method, rpc_kind)
+
+
+def report_timing(operation: str, seconds: float):
+    for observer in _observers:
+        observer.on_timing(operation, seconds)
+
+
+class _Histogram(object):
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        total = 0
+        result = []
+        for bound, count in zip(list(self.buckets) + [float('inf')], self.counts):
+            total += count
+            result.append(("+Inf" if bound == float('inf') else repr(bound), total))
+        return result
+
+
+def _label_value(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels) -> str:
+    return ",".join('%s="%s"' % (k, _label_value(v)) for k, v in labels.items())
+
+
+class MetricsRecorder(Observer):
+    """
+    In-memory aggregation of instrumentation events: per-method histograms of latency and of request and response
+    sizes, request failures and JSON-RPC errors by method and kind, and histograms of timed operations.
+    prometheus_text() renders them in the Prometheus text exposition format. Thread-safe."""
+
+    def __init__(
+            self,
+            latency_buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+            size_buckets: Sequence[float] = DEFAULT_SIZE_BUCKETS,
+            timing_buckets: Sequence[float] = DEFAULT_TIMING_BUCKETS
+    ):
+        self._latency_buckets = latency_buckets
+        self._size_buckets = size_buckets
+        self._timing_buckets = timing_buckets
+        self._latency: Dict[str, _Histogram] = {}
+        self._request_bytes: Dict[str, _Histogram] = {}
+        self._response_bytes: Dict[str, _Histogram] = {}
+        self._calls: Dict[str, int] = {}
+        self._failures: Dict[Tuple[str, str], int] = {}
+        self._rpc_errors: Dict[Tuple[str, str], int] = {}
+        self._timings: Dict[str, _Histogram] = {}
+        self._lock = threading.Lock()
+
+    def on_request(self, method, calls, latency, request_bytes, response_bytes, error):
+        with self._lock:
+            if method not in self._latency:
+                self._latency[method] = _Histogram(self._latency_buckets)
+                self._request_bytes[method] = _Histogram(self._size_buckets)
+                self._response_bytes[method] = _Histogram(self._size_buckets)
+                self._calls[method] = 0
+            self._latency[method].observe(latency)
+            self._request_bytes[method].observe(request_bytes)
+            self._response_bytes[method].observe(response_bytes)
+            self._calls[method] += calls
+            if error is not None:
+                self._failures[method, error] = self._failures.get((method, error), 0) + 1
+
+    def on_rpc_error(self, method, kind):
+        with self._lock:
+            self._rpc_errors[method, kind] = self._rpc_errors.get((method, kind), 0) + 1
+
+    def on_timing(self, operation, seconds):
+        with self._lock:
+            if operation not in self._timings:
+                self._timings[operation] = _Histogram(self._timing_buckets)
+            self._timings[operation].observe(seconds)
+
+    def stats(self) -> dict:
+        """Counts and sums of the recorded events, by method or operation."""
+        with self._lock:
+            return {
+                'requests': {method: h.count for method, h in self._latency.items()},
+                'calls': dict(self._calls),
+                'latency_sum': {method: h.sum for method, h in self._latency.items()},
+                'response_bytes_sum': {method: h.sum for method, h in self._response_bytes.items()},
+                'failures': dict(self._failures),
+                'rpc_errors': dict(self._rpc_errors),
+                'timings_sum': {operation: h.sum for operation, h in self._timings.items()},
+            }
+
+    def prometheus_text(self, prefix: str = "near") -> str:
+        lines = []
+
+        def histograms(name: str, help_: str, label: str, values: Dict[str, _Histogram]):
+            lines.append("# HELP %s_%s %s" % (prefix, name, help_))
+            lines.append("# TYPE %s_%s histogram" % (prefix, name))
+            for key, histogram in sorted(values.items()):
+                for bound, count in histogram.cumulative():
+                    lines.append("%s_%s_bucket{%s} %d" % (prefix, name, _labels(**{label: key, 'le': bound}), count))
+                lines.append("%s_%s_sum{%s} %r" % (prefix, name, _labels(**{label: key}), histogram.sum))
+                lines.append("%s_%s_count{%s} %d" % (prefix, name, _labels(**{label: key}), histogram.count))
+
+        def counters(name: str, help_: str, values: Dict[Any, int], label_names: Tuple[str, ...]):
+            lines.append("# HELP %s_%s %s" % (prefix, name, help_))
+            lines.append("# TYPE %s_%s counter" % (prefix, name))
+            for key, count in sorted(values.items()):
+                key = key if isinstance(key, tuple) else (key,)
+                lines.append("%s_%s{%s} %d" % (prefix, name, _labels(**dict(zip(label_names, key))), count))
+
+        with self._lock:
+            histograms("rpc_request_duration_seconds", "Latency of RPC requests.", 'method', self._latency)
+            histograms("rpc_request_size_bytes", "Size of RPC request bodies.", 'method', self._request_bytes)
+            histograms("rpc_response_size_bytes", "Size of RPC response bodies.", 'method', self._response_bytes)
+            counters("rpc_calls_total", "RPC calls sent, batched or not.", self._calls, ('method',))
+            counters("rpc_request_failures_total", "Failed RPC requests by kind.", self._failures,
+                     ('method', 'kind'))
+            counters("rpc_errors_total", "JSON-RPC errors by kind.", self._rpc_errors, ('method', 'kind'))
+            histograms("operation_duration_seconds", "Duration of local operations.", 'operation', self._timings)
+        return "\n".join(lines) + "\n"
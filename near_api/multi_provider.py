@@ -0,0 +1,326 @@
+import collections
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Optional, List, Union, Callable, Any, Iterable, Tuple
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from near_api.cache import RpcCache, is_idempotent
+from near_api.providers import JsonProvider, TimeoutType, RpcCallType, DEFAULT_POOL_MAXSIZE
+
+log = logging.getLogger(__name__)
+
+# Weight of the newest sample in the moving averages of latency and error rate.
+DEFAULT_EWMA_ALPHA = 0.3
+
+# Consecutive failures after which an endpoint is ejected.
+DEFAULT_MAX_FAILURES = 3
+
+# Seconds an endpoint stays ejected after its first ejection, doubled on every failed re-probe up to the maximum.
+DEFAULT_EJECT_TIME = 5.0
+DEFAULT_MAX_EJECT_TIME = 60.0
+
+# Number of endpoints a call is tried on before its error is raised.
+DEFAULT_MAX_ATTEMPTS = 2
+
+# Percentile of the recent call latencies after which a hedged call is sent to a second endpoint, and the delay
+# used instead until enough latencies are known.
+DEFAULT_HEDGE_PERCENTILE = 0.95
+DEFAULT_HEDGE_DELAY = 0.5
+_HEDGE_MIN_SAMPLES = 20
+_HEDGE_WINDOW = 500
+
+
+def _is_node_failure(error: Exception) -> bool:
+    """Whether an error means the node is unhealthy, as opposed to the request being invalid."""
+    if isinstance(error, requests.HTTPError):
+        status = error.response.status_code if error.response is not None else 500
+        return status >= 500 or status == 429
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+def _is_unsent(error: Exception) -> bool:
+    """Whether a failed request certainly was not sent, since no connection could be made."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.ConnectionError) and error.args:
+        return isinstance(getattr(error.args[0], 'reason', None), NewConnectionError)
+    return False
+
+
+class Endpoint(object):
+    """Health statistics of one RPC endpoint of a MultiJsonProvider."""
+
+    def __init__(self, provider: 'JsonProvider'):
+        self.provider = provider
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.failures = 0
+        self.in_flight = 0
+        self.ejected_until: Optional[float] = None
+        self.ejections = 0
+
+    @property
+    def healthy(self) -> bool:
+        return self.ejected_until is None
+
+    def score(self) -> float:
+        """Expected cost of sending a call to this endpoint, lower is better. Unmeasured endpoints come first."""
+        return (self.latency or 0.0) * (1 + self.in_flight) * (1 + 10 * self.error_rate)
+
+    def stats(self) -> dict:
+        return {
+            'rpc_addr': self.provider.rpc_addr(),
+            'latency': self.latency,
+            'error_rate': self.error_rate,
+            'in_flight': self.in_flight,
+            'healthy': self.healthy,
+        }
+
+
+class MultiJsonProvider(JsonProvider):
+    """
+    JsonProvider spreading calls over several RPC endpoints, usable anywhere a JsonProvider is.
+
+    Each call goes to the healthy endpoint with the best score, based on the moving averages of its latency and
+    error rate and on its calls in flight. Connection errors, timeouts, HTTP 429 and 5xx count as failures: the call
+    is retried on another endpoint up to max_attempts endpoints in total, and an endpoint failing max_failures times
+    in a row is ejected. broadcast_tx_* and send_tx calls are only retried if the failed request was certainly not
+    sent, i.e. the connection could not be made, since the node may have applied a transaction whose request
+    failed afterwards. A background thread re-probes ejected endpoints with get_status and puts
+    them back once they answer. If every endpoint is ejected, the best of them is still used. rpc_addr() and
+    session are those of the endpoint the next call would go to.
+
+    With hedge, a read-only call which has not completed after hedge_delay seconds, or by default the
+    hedge_percentile of the recent call latencies, is sent again to a second endpoint and the first response wins.
+    The slower request cannot be aborted, its response is discarded. broadcast_tx_* calls are never hedged."""
+
+    def __init__(
+            self,
+            rpc_addrs: List[Union[str, tuple]],
+            proxies=None,
+            pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+            cache: Optional['RpcCache'] = None,
+            single_flight: bool = False,
+            max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+            max_failures: int = DEFAULT_MAX_FAILURES,
+            eject_time: float = DEFAULT_EJECT_TIME,
+            max_eject_time: float = DEFAULT_MAX_EJECT_TIME,
+            ewma_alpha: float = DEFAULT_EWMA_ALPHA,
+            hedge: bool = False,
+            hedge_delay: Optional[float] = None,
+            hedge_percentile: float = DEFAULT_HEDGE_PERCENTILE
+    ):
+        if not rpc_addrs:
+            raise ValueError("At least one RPC endpoint is required")
+        super().__init__(rpc_addrs[0], proxies, pool_maxsize, cache=cache, single_flight=single_flight)
+        self._endpoints = [Endpoint(JsonProvider(rpc_addr, proxies, pool_maxsize)) for rpc_addr in rpc_addrs]
+        self._max_attempts = max_attempts
+        self._max_failures = max_failures
+        self._eject_time = eject_time
+        self._max_eject_time = max_eject_time
+        self._alpha = ewma_alpha
+        self._hedge = hedge and len(self._endpoints) > 1
+        self._hedge_delay = hedge_delay
+        self._hedge_percentile = hedge_percentile
+        self._latencies = collections.deque(maxlen=_HEDGE_WINDOW)
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        self._pool_maxsize = pool_maxsize
+        self._lock = threading.Lock()
+        self._prober: Optional[threading.Thread] = None
+        self._closed = threading.Event()
+
+    @property
+    def endpoints(self) -> List['Endpoint']:
+        return list(self._endpoints)
+
+    def rpc_addr(self) -> str:
+        """Address of the endpoint the next call would go to."""
+        with self._lock:
+            return self._choose([]).provider.rpc_addr()
+
+    @property
+    def session(self) -> requests.Session:
+        """Session of the endpoint the next call would go to; the provider has no session of its own."""
+        with self._lock:
+            return self._choose([]).provider.session
+
+    def rpc_addrs(self) -> List[str]:
+        return [endpoint.provider.rpc_addr() for endpoint in self._endpoints]
+
+    def endpoint_stats(self) -> List[dict]:
+        with self._lock:
+            return [endpoint.stats() for endpoint in self._endpoints]
+
+    def hedge_delay(self) -> float:
+        """Seconds after which a hedged call is sent to a second endpoint."""
+        if self._hedge_delay is not None:
+            return self._hedge_delay
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if len(latencies) < _HEDGE_MIN_SAMPLES:
+            return DEFAULT_HEDGE_DELAY
+        return latencies[int(self._hedge_percentile * (len(latencies) - 1))]
+
+    def close(self):
+        self._closed.set()
+        with self._lock:
+            executor, self._hedge_executor = self._hedge_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+        for endpoint in self._endpoints:
+            endpoint.provider.close()
+        super().close()
+
+    def _choose(self, exclude: List['Endpoint']) -> 'Endpoint':
+        candidates = [endpoint for endpoint in self._endpoints if endpoint not in exclude]
+        healthy = [endpoint for endpoint in candidates if endpoint.healthy]
+        return min(healthy or candidates, key=Endpoint.score)
+
+    def _record(self, endpoint: 'Endpoint', latency: Optional[float]):
+        """Update the statistics of endpoint with a call that took latency seconds, or failed if latency is None."""
+        alpha = self._alpha
+        if latency is not None:
+            endpoint.latency = latency if endpoint.latency is None else alpha * latency + (1 - alpha) * endpoint.latency
+            endpoint.error_rate *= 1 - alpha
+            endpoint.failures = 0
+            self._latencies.append(latency)
+            return
+        endpoint.error_rate = alpha + (1 - alpha) * endpoint.error_rate
+        endpoint.failures += 1
+        if endpoint.healthy and endpoint.failures >= self._max_failures:
+            log.warning("Ejecting RPC endpoint %s", endpoint.provider.rpc_addr())
+            self._eject(endpoint)
+
+    def _eject(self, endpoint: 'Endpoint'):
+        eject_time = min(self._eject_time * 2 ** endpoint.ejections, self._max_eject_time)
+        endpoint.ejected_until = time.monotonic() + eject_time
+        endpoint.ejections += 1
+        if self._prober is None and not self._closed.is_set():
+            self._prober = threading.Thread(target=self._probe_loop, name="near-rpc-prober", daemon=True)
+            self._prober.start()
+
+    def _probe_loop(self):
+        while True:
+            with self._lock:
+                ejected = [endpoint for endpoint in self._endpoints if not endpoint.healthy]
+                if not ejected or self._closed.is_set():
+                    self._prober = None
+                    return
+                next_probe = min(endpoint.ejected_until for endpoint in ejected)
+            if self._closed.wait(max(0.0, next_probe - time.monotonic())):
+                continue
+            for endpoint in ejected:
+                if endpoint.ejected_until > time.monotonic():
+                    continue
+                try:
+                    endpoint.provider.get_status()
+                except Exception:
+                    with self._lock:
+                        self._eject(endpoint)
+                    continue
+                log.info("RPC endpoint %s is back", endpoint.provider.rpc_addr())
+                with self._lock:
+                    endpoint.ejected_until = None
+                    endpoint.ejections = 0
+                    endpoint.failures = 0
+
+    def _start(self, tried: List['Endpoint']) -> 'Endpoint':
+        with self._lock:
+            endpoint = self._choose(tried)
+            endpoint.in_flight += 1
+        tried.append(endpoint)
+        return endpoint
+
+    def _attempt(self, endpoint: 'Endpoint', fn: Callable[['JsonProvider'], Any]) -> Any:
+        start = time.monotonic()
+        try:
+            result = fn(endpoint.provider)
+        except Exception as e:
+            with self._lock:
+                endpoint.in_flight -= 1
+                self._record(endpoint, None if _is_node_failure(e) else time.monotonic() - start)
+            raise
+        with self._lock:
+            endpoint.in_flight -= 1
+            self._record(endpoint, time.monotonic() - start)
+        return result
+
+    def _call(self, fn: Callable[['JsonProvider'], Any], idempotent: bool = True) -> Any:
+        """Call fn with the provider of the best endpoint, failing over to others. Only idempotent calls are hedged."""
+        if idempotent and self._hedge:
+            return self._hedged_call(fn)
+        tried = []
+        while True:
+            endpoint = self._start(tried)
+            try:
+                return self._attempt(endpoint, fn)
+            except Exception as e:
+                if not _is_node_failure(e) or not (idempotent or _is_unsent(e)) \
+                        or len(tried) >= min(self._max_attempts, len(self._endpoints)):
+                    raise
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(
+                    self._pool_maxsize * len(self._endpoints), thread_name_prefix="near-rpc-hedge")
+            return self._hedge_executor
+
+    def _hedged_call(self, fn: Callable[['JsonProvider'], Any]) -> Any:
+        executor = self._executor()
+        max_endpoints = min(max(self._max_attempts, 2), len(self._endpoints))
+        tried = []
+        endpoints = {}
+        futures = {self._submit(executor, tried, fn, endpoints)}
+        error = None
+        while futures:
+            can_hedge = len(tried) < max_endpoints
+            done, futures = wait(futures, self.hedge_delay() if can_hedge else None, FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    if not _is_node_failure(e):
+                        self._discard(futures, endpoints)
+                        raise
+                    error = e
+                    continue
+                self._discard(futures, endpoints)
+                return result
+            if can_hedge and (not done or not futures):
+                futures.add(self._submit(executor, tried, fn, endpoints))
+        raise error
+
+    def _submit(self, executor: ThreadPoolExecutor, tried: List['Endpoint'], fn: Callable[['JsonProvider'], Any],
+                endpoints: dict) -> Future:
+        endpoint = self._start(tried)
+        future = executor.submit(self._attempt, endpoint, fn)
+        endpoints[future] = endpoint
+        return future
+
+    def _discard(self, futures: Iterable[Future], endpoints: dict):
+        """Cancel the requests of a hedged call which are no longer needed, if they have not started yet."""
+        for future in futures:
+            if future.cancel():
+                with self._lock:
+                    endpoints[future].in_flight -= 1
+
+    def _json_rpc(self, method: str, params: Union[dict, list, str], timeout: 'TimeoutType') -> Tuple[dict, int]:
+        return self._call(lambda provider: provider._json_rpc(method, params, timeout), is_idempotent([method]))
+
+    def _send_batch(
+            self,
+            calls: List['RpcCallType'],
+            timeout: 'TimeoutType',
+            raise_on_error: bool
+    ) -> Tuple[List[Any], int]:
+        return self._call(
+            lambda provider: provider._send_batch(calls, timeout, raise_on_error),
+            is_idempotent(method for method, _ in calls))
+
+    def get_status(self, timeout: 'TimeoutType' = 2.0) -> dict:
+        return self._call(lambda provider: provider.get_status(timeout), True)
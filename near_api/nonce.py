@@ -0,0 +1,138 @@
+import threading
+from typing import Optional, Dict, Tuple, Any
+
+import near_api
+
+# Number of times a transaction rejected with InvalidNonce is signed again with a resynced nonce.
+DEFAULT_NONCE_RETRIES = 3
+
+
+def _find(obj: Any, key: str) -> Optional[Any]:
+    if isinstance(obj, dict):
+        if key in obj:
+            return obj[key]
+        for value in obj.values():
+            found = _find(value, key)
+            if found is not None:
+                return found
+    elif isinstance(obj, (list, tuple)):
+        for value in obj:
+            found = _find(value, key)
+            if found is not None:
+                return found
+    return None
+
+
+def invalid_nonce_info(error: Exception) -> Optional[dict]:
+    """
+    Return the InvalidNonce details ({'tx_nonce': ..., 'ak_nonce': ...}) of an error raised for a rejected
+    transaction, or None if the transaction was not rejected because of its nonce."""
+    info = _find(error.args, 'InvalidNonce')
+    if info is None:
+        return None
+    return info if isinstance(info, dict) else {}
+
+
+class NonceManager(object):
+    """
+    Hands out transaction nonces per (account_id, public_key) access key. Allocation is atomic, so one
+    manager may be shared by any number of threads and Account objects signing with the same keys.
+    The current nonce of a key is read with get_access_key on first use, and again on resync()."""
+
+    def __init__(self, provider: 'near_api.providers.JsonProvider'):
+        self._provider = provider
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._nonces: Dict[Tuple[str, str], int] = {}
+
+    def _key_lock(self, key: Tuple[str, str]) -> threading.Lock:
+        lock = self._key_locks.get(key)
+        if lock is None:
+            with self._lock:
+                lock = self._key_locks.setdefault(key, threading.Lock())
+        return lock
+
+    def _fetch(self, account_id: str, public_key: str) -> int:
+        return self._provider.get_access_key(account_id, public_key)['nonce']
+
+    def seed(self, account_id: str, public_key: str, nonce: int):
+        """Record a nonce known to be used on chain, e.g. from an access key fetched elsewhere."""
+        key = (account_id, public_key)
+        with self._key_lock(key):
+            self._nonces[key] = max(self._nonces.get(key, nonce), nonce)
+
+    def next_nonce(self, account_id: str, public_key: str, access_key: Optional[dict] = None) -> int:
+        """
+        Allocate the next unused nonce of the access key. access_key, a dict as returned by get_access_key,
+        gets its 'nonce' raised to the allocated one under the same lock."""
+        key = (account_id, public_key)
+        with self._key_lock(key):
+            nonce = self._nonces.get(key)
+            if nonce is None:
+                nonce = self._fetch(account_id, public_key)
+            nonce += 1
+            self._nonces[key] = nonce
+            if access_key is not None:
+                access_key['nonce'] = max(access_key['nonce'], nonce)
+            return nonce
+
+    def resync(self, account_id: str, public_key: str, chain_nonce: Optional[int] = None) -> int:
+        """
+        Reconcile with the nonce of the access key on chain, fetched with get_access_key unless chain_nonce
+        is given. Nonces are never moved backwards, so concurrently allocated ones stay unique."""
+        key = (account_id, public_key)
+        with self._key_lock(key):
+            if chain_nonce is None:
+                chain_nonce = self._fetch(account_id, public_key)
+            nonce = max(self._nonces.get(key, chain_nonce), chain_nonce)
+            self._nonces[key] = nonce
+            return nonce
+
+    def current_nonce(self, account_id: str, public_key: str) -> Optional[int]:
+        """The last allocated or seeded nonce of the access key, None if unknown."""
+        return self._nonces.get((account_id, public_key))
+
+
+class AsyncNonceManager(object):
+    """
+    asyncio counterpart of NonceManager for an AsyncJsonProvider. Once the nonce of a key is known, allocation
+    does not await, so concurrent tasks never share a nonce."""
+
+    def __init__(self, provider: 'near_api.async_providers.AsyncJsonProvider'):
+        self._provider = provider
+        self._key_locks: Dict[Tuple[str, str], 'asyncio.Lock'] = {}
+        self._nonces: Dict[Tuple[str, str], int] = {}
+
+    async def _fetch(self, account_id: str, public_key: str) -> int:
+        return (await self._provider.get_access_key(account_id, public_key))['nonce']
+
+    def seed(self, account_id: str, public_key: str, nonce: int):
+        key = (account_id, public_key)
+        self._nonces[key] = max(self._nonces.get(key, nonce), nonce)
+
+    async def next_nonce(self, account_id: str, public_key: str, access_key: Optional[dict] = None) -> int:
+        key = (account_id, public_key)
+        if key not in self._nonces:
+            # Tasks allocating the first nonces of a key wait for a single fetch. asyncio is only imported
+            # once used, so that synchronous accounts do not pay for it.
+            import asyncio
+            lock = self._key_locks.setdefault(key, asyncio.Lock())
+            async with lock:
+                if key not in self._nonces:
+                    self._nonces[key] = await self._fetch(account_id, public_key)
+        nonce = self._nonces[key] + 1
+        self._nonces[key] = nonce
+        if access_key is not None:
+            access_key['nonce'] = max(access_key['nonce'], nonce)
+        return nonce
+
+    async def resync(self, account_id: str, public_key: str, chain_nonce: Optional[int] = None) -> int:
+        key = (account_id, public_key)
+        if chain_nonce is None:
+            chain_nonce = await self._fetch(account_id, public_key)
+        nonce = max(self._nonces.get(key, chain_nonce), chain_nonce)
+        self._nonces[key] = nonce
+        return nonce
+
+    def current_nonce(self, account_id: str, public_key: str) -> Optional[int]:
+        return self._nonces.get((account_id, public_key))
@@ -0,0 +1,180 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional, List, Dict
+
+import base58
+
+import near_api
+from near_api import codec, transactions
+from near_api.account import DEFAULT_ATTACHED_GAS, _check_tx_result
+from near_api.providers import JsonProviderError
+
+log = logging.getLogger(__name__)
+
+# Seconds between two polls of the outstanding transactions.
+DEFAULT_POLL_INTERVAL = 0.5
+
+# Seconds after which a submitted transaction without final outcome is failed with a TimeoutError.
+DEFAULT_TX_TIMEOUT = 60.0
+
+# get_tx errors meaning that the outcome is not known yet, rather than that the transaction failed.
+_PENDING_ERRORS = ("UNKNOWN_TRANSACTION", "TIMEOUT_ERROR")
+
+
+class _PendingTx(object):
+    def __init__(self, future: Future, signer: 'near_api.signer.Signer', deadline: float):
+        self.future = future
+        self.signer = signer
+        self.deadline = deadline
+
+
+class TxPipeline(object):
+    """
+    Pipelined transaction submission for an Account. submit() signs the transaction, computes its hash
+    locally and sends it with broadcast_tx_async without waiting for it to execute; it returns a Future
+    of the final outcome. One background poller resolves all outstanding transactions with batched get_tx
+    calls, so a single thread can keep hundreds of transactions in flight.
+    With a MultiKeyAccount, every transaction holds its key of the pool until it is resolved."""
+
+    def __init__(
+            self,
+            account: 'near_api.account.Account',
+            poll_interval: float = DEFAULT_POLL_INTERVAL,
+            tx_timeout: float = DEFAULT_TX_TIMEOUT
+    ):
+        self._account = account
+        self._provider = account.provider
+        self._poll_interval = poll_interval
+        self._tx_timeout = tx_timeout
+        self._pending: Dict[str, _PendingTx] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._poller: Optional[threading.Thread] = None
+
+    def __enter__(self) -> 'TxPipeline':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def pending(self) -> int:
+        """Number of submitted transactions not resolved yet."""
+        return len(self._pending)
+
+    def submit(self, receiver_id: str, actions: List['transactions.Action']) -> Future:
+        """
+        Sign and send a transaction, returning a Future of its final execution outcome. If the node rejects the
+        transaction, e.g. for an invalid nonce or an expired block hash, the Future fails with its error."""
+        if self._closed:
+            raise RuntimeError("Pipeline is closed")
+        signer = self._account._acquire_signer(receiver_id, actions)
+        try:
+            signed_tx, tx_hash = self._account._sign_tx(signer, receiver_id, actions)
+        except Exception:
+            self._account._release_signer(signer)
+            raise
+        tx_hash = base58.b58encode(tx_hash).decode('utf8')
+        future = Future()
+        with self._lock:
+            self._pending[tx_hash] = _PendingTx(future, signer, time.monotonic() + self._tx_timeout)
+            self._start_poller()
+        try:
+            self._provider.send_tx(signed_tx)
+        except JsonProviderError as e:
+            # A rejected transaction never shows up in get_tx, the error is its outcome.
+            self._account._handle_rejected_tx(signer, e)
+            self._resolve(tx_hash, exception=e)
+        except Exception:
+            with self._lock:
+                self._pending.pop(tx_hash, None)
+            self._account._release_signer(signer)
+            raise
+        return future
+
+    def send_money(self, account_id: str, amount: int) -> Future:
+        return self.submit(account_id, [transactions.create_transfer_action(amount)])
+
+    def function_call(
+            self,
+            contract_id: str,
+            method_name: str,
+            args: dict,
+            gas: int = DEFAULT_ATTACHED_GAS,
+            amount: int = 0
+    ) -> Future:
+        """NEAR call method."""
+        args = codec.dumps(args)
+        return self.submit(contract_id, [transactions.create_function_call_action(method_name, args, gas, amount)])
+
+    def _start_poller(self):
+        if self._poller is None:
+            self._poller = threading.Thread(target=self._poll_loop, name="near-tx-poller", daemon=True)
+            self._poller.start()
+
+    def _poll_loop(self):
+        while True:
+            self._wakeup.wait(self._poll_interval)
+            self._wakeup.clear()
+            with self._lock:
+                if self._closed and not self._pending:
+                    self._poller = None
+                    return
+            try:
+                self.poll()
+            except Exception:
+                log.warning("Failed to poll transaction outcomes", exc_info=True)
+
+    def poll(self):
+        """Query the outcomes of all outstanding transactions at once and resolve the final ones."""
+        with self._lock:
+            pending = list(self._pending.items())
+        if not pending:
+            return
+        account_id = self._account.account_id
+        results = self._provider.json_rpc_batch(
+            [("tx", [tx_hash, account_id]) for tx_hash, _ in pending], raise_on_error=False)
+        now = time.monotonic()
+        for (tx_hash, tx), result in zip(pending, results):
+            if isinstance(result, JsonProviderError):
+                if any(name in str(result) for name in _PENDING_ERRORS):
+                    result = None
+                else:
+                    self._account._handle_rejected_tx(tx.signer, result)
+                    self._resolve(tx_hash, exception=result)
+                    continue
+            if result is not None and self._is_final(result):
+                try:
+                    self._resolve(tx_hash, result=_check_tx_result(result))
+                except Exception as e:
+                    self._resolve(tx_hash, exception=e)
+            elif now > tx.deadline:
+                self._resolve(tx_hash, exception=TimeoutError("Transaction %s has no final outcome" % tx_hash))
+
+    @staticmethod
+    def _is_final(result: dict) -> bool:
+        status = result.get('status', {})
+        return isinstance(status, dict) and ('SuccessValue' in status or 'Failure' in status)
+
+    def _resolve(self, tx_hash: str, result: Optional[dict] = None, exception: Optional[BaseException] = None):
+        with self._lock:
+            tx = self._pending.pop(tx_hash, None)
+        if tx is None:
+            return
+        self._account._release_signer(tx.signer)
+        if exception is not None:
+            tx.future.set_exception(exception)
+        else:
+            tx.future.set_result(result)
+
+    def close(self, wait: bool = True):
+        """Stop accepting transactions. With wait, block until all outstanding ones are resolved."""
+        with self._lock:
+            self._closed = True
+            poller = self._poller
+        self._wakeup.set()
+        if wait and poller is not None:
+            poller.join()
@@ -1,8 +1,18 @@
 import base64
-import json
-from typing import Union, Tuple, Any
+import collections
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union, Tuple, Any, Optional, List, Iterable, Iterator, Callable
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from near_api import codec, metrics
+from near_api.cache import RpcCache, MISSING, rpc_key, is_idempotent
+from near_api.rate_limit import RpcLimiter
+from near_api.single_flight import SingleFlight
 
 TimeoutType = Union[float, Tuple[float, float]]
 """ The type used as "timeout" argument when sending requests. Quantities are in seconds.
@@ -21,30 +31,243 @@ class JsonProviderError(Exception):
     pass
 
 
+def _batch_results(content: Any, ids: List[int], raise_on_error: bool) -> List[Any]:
+    """Match a JSON-RPC batch response to the request ids, preserving their order."""
+    if not isinstance(content, list):
+        # The whole batch was rejected, e.g. the node does not accept batches.
+        raise JsonProviderError(content.get('error', content))
+    by_id = {item.get('id'): item for item in content}
+    results = []
+    for id_ in ids:
+        item = by_id.get(id_)
+        if item is None:
+            error = JsonProviderError({'name': "MISSING_RESPONSE", 'id': id_})
+        elif "error" in item:
+            error = JsonProviderError(item['error'])
+        else:
+            results.append(item['result'])
+            continue
+        if raise_on_error:
+            raise error
+        results.append(error)
+    return results
+
+
+def is_unknown_block(error: Exception) -> bool:
+    """Whether a JsonProviderError means that no block exists at the requested height."""
+    return isinstance(error, JsonProviderError) and "UNKNOWN_BLOCK" in str(error)
+
+
+# Default number of keep-alive connections kept open to the RPC endpoint.
+DEFAULT_POOL_MAXSIZE = 10
+
+# Default maximum number of calls sent in a single JSON-RPC batch request.
+DEFAULT_MAX_BATCH_SIZE = 100
+
+RpcCallType = Tuple[str, Union[dict, list, str]]
+""" A (method, params) pair describing a single call inside a JSON-RPC batch."""
+
+_JSON_HEADERS = {'Content-Type': "application/json"}
+
+# Default number of blocks fetched ahead by iter_blocks.
+DEFAULT_PREFETCH = 16
+
+# Bounds of the interval in seconds between two polls of the chain head by iter_blocks.
+DEFAULT_MIN_POLL_INTERVAL = 0.25
+DEFAULT_MAX_POLL_INTERVAL = 5.0
+
+BlockWithChunksType = Tuple[dict, List[dict]]
+""" A block and the chunks included in it, as yielded by iter_blocks."""
+
+
 class JsonProvider(object):
-    def __init__(self, rpc_addr, proxies=None):
+    def __init__(
+            self,
+            rpc_addr,
+            proxies=None,
+            pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+            session: Optional[requests.Session] = None,
+            cache: Optional['RpcCache'] = None,
+            single_flight: bool = False,
+            limiter: Optional['RpcLimiter'] = None
+    ):
+        """
+        Connections to rpc_addr are kept alive and reused from a pool of up to
+        pool_maxsize connections, shared by all threads using this provider.
+        A preconfigured requests.Session may be passed instead; it is then owned
+        by the caller and is not closed by close().
+        With a cache, cacheable read calls are answered from it when possible.
+        With single_flight, concurrent json_rpc calls with the same method and params share one request and
+        its result or error; on a cache miss, the request also fills the cache. Transaction broadcasts are
+        never shared.
+        With a limiter, requests are subject to its adaptive concurrency limit, method rates and retries."""
         if isinstance(rpc_addr, tuple):
             self._rpc_addr = "http://%s:%s" % rpc_addr
         else:
             self._rpc_addr = rpc_addr
         self.proxies = proxies
+        self._pool_maxsize = pool_maxsize
+        self._session = session
+        self._owns_session = session is None
+        self._session_lock = threading.Lock()
+        self._request_ids = itertools.count(1)
+        self.cache = cache
+        self.single_flight = SingleFlight() if single_flight else None
+        self.limiter = limiter
+
+    def __enter__(self) -> 'JsonProvider':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_maxsize, pool_block=False)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    @property
+    def session(self) -> requests.Session:
+        """The pooled session, created on first use and again after close()."""
+        session = self._session
+        if session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._create_session()
+                    self._owns_session = True
+                session = self._session
+        return session
+
+    def close(self):
+        """Close all pooled connections. The provider may still be used afterwards."""
+        with self._session_lock:
+            session, self._session = self._session, None
+        if session is not None and self._owns_session:
+            session.close()
 
     def rpc_addr(self) -> str:
         return self._rpc_addr
 
     def json_rpc(self, method: str, params: Union[dict, list, str], timeout: 'TimeoutType' = 2.0) -> dict:
+        cache = self.cache
+        if cache is not None and cache.ttl(method, params) is not None:
+            result = cache.get(method, params)
+            if result is MISSING:
+                result = self._fetch(method, params, timeout, cache)
+            return result
+        return self._fetch(method, params, timeout)
+
+    def _fetch(
+            self,
+            method: str,
+            params: Union[dict, list, str],
+            timeout: 'TimeoutType',
+            cache: Optional['RpcCache'] = None
+    ) -> dict:
+        def fetch():
+            result, size = self._json_rpc(method, params, timeout)
+            if cache is not None:
+                cache.put(method, params, result, size)
+            return result
+
+        if self.single_flight is None or not is_idempotent([method]):
+            return fetch()
+        return self.single_flight.do(rpc_key(method, params), fetch)
+
+    def _json_rpc(self, method: str, params: Union[dict, list, str], timeout: 'TimeoutType') -> Tuple[dict, int]:
+        """Send a single call, returning its result and the size of the response."""
         j = {
             'method': method,
             'params': params,
             'id': "dontcare",
             'jsonrpc': "2.0"
         }
-        r = requests.post(self.rpc_addr(), json=j, timeout=timeout, proxies=self.proxies)
-        r.raise_for_status()
-        content = json.loads(r.content)
+        content, size = self._post([method], j, timeout)
         if "error" in content:
             raise JsonProviderError(content['error'])
-        return content['result']
+        return content['result'], size
+
+    def json_rpc_batch(
+            self,
+            calls: Iterable['RpcCallType'],
+            timeout: 'TimeoutType' = 2.0,
+            raise_on_error: bool = True,
+            max_batch_size: int = DEFAULT_MAX_BATCH_SIZE
+    ) -> List[Any]:
+        """
+        Send calls as JSON-RPC 2.0 batches of at most max_batch_size entries, one round trip per batch.
+        Results are returned in the order of calls. If raise_on_error is False, failed calls are
+        returned as JsonProviderError instances instead of raising the first error."""
+        calls = list(calls)
+        cache = self.cache
+        results = [
+            cache.get(method, params) if cache is not None and cache.ttl(method, params) is not None else MISSING
+            for method, params in calls
+        ]
+        missing = [idx for idx, result in enumerate(results) if result is MISSING]
+        for start in range(0, len(missing), max_batch_size):
+            chunk = missing[start:start + max_batch_size]
+            chunk_results, size = self._send_batch([calls[idx] for idx in chunk], timeout, raise_on_error)
+            for idx, result in zip(chunk, chunk_results):
+                results[idx] = result
+                if cache is not None and not isinstance(result, JsonProviderError):
+                    # Calls of a batch are accounted an equal share of its response.
+                    cache.put(calls[idx][0], calls[idx][1], result, size // len(chunk))
+        return results
+
+    def _send_batch(
+            self,
+            calls: List['RpcCallType'],
+            timeout: 'TimeoutType',
+            raise_on_error: bool
+    ) -> Tuple[List[Any], int]:
+        """Send calls in one batch, returning their results in order and the size of the response."""
+        if not calls:
+            return [], 0
+        ids = [next(self._request_ids) for _ in calls]
+        j = [
+            {'method': method, 'params': params, 'id': id_, 'jsonrpc': "2.0"}
+            for id_, (method, params) in zip(ids, calls)
+        ]
+        content, size = self._post([method for method, _ in calls], j, timeout)
+        return _batch_results(content, ids, raise_on_error), size
+
+    def _post(self, methods: List[str], j: Union[dict, list], timeout: 'TimeoutType') -> Tuple[Any, int]:
+        data = codec.dumps(j)
+
+        def send():
+            return self.session.post(self.rpc_addr(), data=data, headers=_JSON_HEADERS, timeout=timeout,
+                                     proxies=self.proxies)
+
+        return self._request(methods, data, send)
+
+    def _request(
+            self,
+            methods: List[str],
+            data: bytes,
+            send: Callable[[], requests.Response]
+    ) -> Tuple[Any, int]:
+        """
+        Send a request through the limiter, if any, and return its decoded JSON content and the size of the
+        response, reporting metrics."""
+        start = time.perf_counter()
+        r = None
+        try:
+            r = send() if self.limiter is None else self.limiter.call(methods, send)
+            r.raise_for_status()
+            received = time.perf_counter()
+            content = codec.loads(r.content)
+        except Exception as e:
+            if metrics.enabled():
+                metrics.report_request(methods, time.perf_counter() - start, len(data),
+                                       len(r.content) if r is not None else 0, error=e)
+            raise
+        if metrics.enabled():
+            metrics.report_timing("json_decode", time.perf_counter() - received)
+            metrics.report_request(methods, received - start, len(data), len(r.content), content=content)
+        return content, len(r.content)
 
     def send_tx(self, signed_tx: bytes, timeout: 'TimeoutType' = 2.0) -> dict:
         return self.json_rpc("broadcast_tx_async",
@@ -56,9 +279,10 @@ class JsonProvider(object):
                              timeout=timeout)
 
     def get_status(self, timeout: 'TimeoutType' = 2.0) -> dict:
-        r = requests.get("%s/status" % self.rpc_addr(), timeout=timeout)
-        r.raise_for_status()
-        return json.loads(r.content)
+        def send():
+            return self.session.get("%s/status" % self.rpc_addr(), timeout=timeout)
+
+        return self._request(["status"], b'', send)[0]
 
     def get_validators(self, timeout: 'TimeoutType' = 2.0) -> dict:
         return self.json_rpc("validators", [None], timeout=timeout)
@@ -66,18 +290,82 @@ class JsonProvider(object):
     def query(self, query_object: str, timeout: 'TimeoutType' = 2.0) -> dict:
         return self.json_rpc("query", query_object, timeout=timeout)
 
+    @staticmethod
+    def _block_reference(block_id: Optional[str], finality: Optional[str]) -> dict:
+        params = {}
+        if block_id:
+            params['block_id'] = block_id
+        if finality:
+            params['finality'] = finality
+        return params
+
+    @staticmethod
+    def _light_client_proof_params(
+            outcome_type: str,
+            tx_or_receipt_id: str,
+            sender_or_receiver_id: str,
+            light_client_head: str
+    ) -> dict:
+        if outcome_type == "receipt":
+            return {
+                'type': "receipt",
+                'receipt_id': tx_or_receipt_id,
+                'receiver_id': sender_or_receiver_id,
+                'light_client_head': light_client_head
+            }
+        return {
+            'type': "transaction",
+            'transaction_hash': tx_or_receipt_id,
+            'sender_id': sender_or_receiver_id,
+            'light_client_head': light_client_head
+        }
+
+    @staticmethod
+    def _account_query(account_id: str, finality: str) -> dict:
+        return {
+            'request_type': "view_account",
+            'account_id': account_id,
+            'finality': finality
+        }
+
+    @staticmethod
+    def _access_key_query(account_id: str, public_key: str, finality: str) -> dict:
+        return {
+            'request_type': "view_access_key",
+            'account_id': account_id,
+            'public_key': public_key,
+            'finality': finality
+        }
+
+    @staticmethod
+    def _view_call_query(account_id: str, method_name: str, args: bytes, finality: str) -> dict:
+        return {
+            'request_type': "call_function",
+            'account_id': account_id,
+            'method_name': method_name,
+            'args_base64': base64.b64encode(args).decode('utf8'),
+            'finality': finality
+        }
+
     def get_account(
             self,
             account_id: str,
             finality: str = FinalityTypes.OPTIMISTIC,
             timeout: 'TimeoutType' = 2.0
     ) -> dict:
-        return self.json_rpc(
-            "query", {
-                'request_type': "view_account",
-                'account_id': account_id,
-                'finality': finality
-            }, timeout=timeout)
+        return self.json_rpc("query", self._account_query(account_id, finality), timeout=timeout)
+
+    def get_accounts(
+            self,
+            account_ids: Iterable[str],
+            finality: str = FinalityTypes.OPTIMISTIC,
+            timeout: 'TimeoutType' = 2.0,
+            raise_on_error: bool = True
+    ) -> List[dict]:
+        """Batch version of get_account."""
+        return self.json_rpc_batch(
+            [("query", self._account_query(account_id, finality)) for account_id in account_ids],
+            timeout=timeout, raise_on_error=raise_on_error)
 
     def get_access_key_list(
             self,
@@ -99,13 +387,19 @@ class JsonProvider(object):
             finality: str = FinalityTypes.OPTIMISTIC,
             timeout: 'TimeoutType' = 2.0
     ) -> dict:
-        return self.json_rpc(
-            "query", {
-                'request_type': "view_access_key",
-                'account_id': account_id,
-                'public_key': public_key,
-                'finality': finality
-            }, timeout=timeout)
+        return self.json_rpc("query", self._access_key_query(account_id, public_key, finality), timeout=timeout)
+
+    def get_access_keys(
+            self,
+            keys: Iterable[Tuple[str, str]],
+            finality: str = FinalityTypes.OPTIMISTIC,
+            timeout: 'TimeoutType' = 2.0,
+            raise_on_error: bool = True
+    ) -> List[dict]:
+        """Batch version of get_access_key, keys are (account_id, public_key) pairs."""
+        return self.json_rpc_batch(
+            [("query", self._access_key_query(account_id, public_key, finality)) for account_id, public_key in keys],
+            timeout=timeout, raise_on_error=raise_on_error)
 
     def view_call(
             self,
@@ -115,21 +409,49 @@ class JsonProvider(object):
             finality: str = FinalityTypes.OPTIMISTIC,
             timeout: 'TimeoutType' = 2.0
     ) -> dict:
-        return self.json_rpc(
-            "query", {
-                'request_type': "call_function",
-                'account_id': account_id,
-                'method_name': method_name,
-                'args_base64': base64.b64encode(args).decode('utf8'),
-                'finality': finality
-            }, timeout=timeout)
+        return self.json_rpc("query", self._view_call_query(account_id, method_name, args, finality), timeout=timeout)
+
+    def view_calls(
+            self,
+            calls: Iterable[Tuple[str, str, bytes]],
+            finality: str = FinalityTypes.OPTIMISTIC,
+            timeout: 'TimeoutType' = 2.0,
+            raise_on_error: bool = True
+    ) -> List[dict]:
+        """Batch version of view_call, calls are (account_id, method_name, args) tuples."""
+        return self.json_rpc_batch(
+            [
+                ("query", self._view_call_query(account_id, method_name, args, finality))
+                for account_id, method_name, args in calls
+            ],
+            timeout=timeout, raise_on_error=raise_on_error)
 
     def get_block(self, block_id: str, timeout: 'TimeoutType' = 2.0) -> dict:
         return self.json_rpc("block", [block_id], timeout=timeout)
 
+    def get_blocks(
+            self,
+            block_ids: Iterable[str],
+            timeout: 'TimeoutType' = 2.0,
+            raise_on_error: bool = True
+    ) -> List[dict]:
+        """Batch version of get_block."""
+        return self.json_rpc_batch([("block", [block_id]) for block_id in block_ids],
+                                   timeout=timeout, raise_on_error=raise_on_error)
+
     def get_chunk(self, chunk_id: str, timeout: 'TimeoutType' = 2.0) -> dict:
         return self.json_rpc("chunk", [chunk_id], timeout=timeout)
 
+    def get_chunks(
+            self,
+            chunk_ids: Iterable[str],
+            timeout: 'TimeoutType' = 2.0,
+            raise_on_error: bool = True
+    ) -> List[dict]:
+        """Batch version of get_chunk."""
+        return self.json_rpc_batch([("chunk", [chunk_id]) for chunk_id in chunk_ids],
+                                   timeout=timeout, raise_on_error=raise_on_error)
+
     def get_tx(self, tx_hash: str, tx_recipient_id: str, timeout: 'TimeoutType' = 2.0) -> dict:
         return self.json_rpc("tx", [tx_hash, tx_recipient_id], timeout=timeout)
 
@@ -140,12 +462,8 @@ class JsonProvider(object):
             timeout: 'TimeoutType' = 2.0
     ) -> dict:
         """Use either block_id or finality. Choose finality from "finality_types" class."""
-        params = {}
-        if block_id:
-            params['block_id'] = block_id
-        if finality:
-            params['finality'] = finality
-        return self.json_rpc("EXPERIMENTAL_changes_in_block", params, timeout=timeout)
+        return self.json_rpc("EXPERIMENTAL_changes_in_block", self._block_reference(block_id, finality),
+                             timeout=timeout)
 
     def get_validators_ordered(self, block_hash: bytes) -> dict:
         return self.json_rpc("EXPERIMENTAL_validators_ordered", [block_hash])
@@ -157,24 +475,94 @@ class JsonProvider(object):
             sender_or_receiver_id: str,
             light_client_head: str
     ) -> dict:
-        if outcome_type == "receipt":
-            params = {
-                'type': "receipt",
-                'receipt_id': tx_or_receipt_id,
-                'receiver_id': sender_or_receiver_id,
-                'light_client_head': light_client_head
-            }
-        else:
-            params = {
-                'type': "transaction",
-                'transaction_hash': tx_or_receipt_id,
-                'sender_id': sender_or_receiver_id,
-                'light_client_head': light_client_head
-            }
-        return self.json_rpc("light_client_proof", params)
+        return self.json_rpc("light_client_proof", self._light_client_proof_params(
+            outcome_type, tx_or_receipt_id, sender_or_receiver_id, light_client_head))
 
     def get_next_light_client_block(self, last_block_hash) -> dict:
         return self.json_rpc("next_light_client_block", [last_block_hash])
 
     def get_receipt(self, receipt_hash, timeout: 'TimeoutType' = 2.0) -> dict:
         return self.json_rpc("EXPERIMENTAL_receipt", [receipt_hash], timeout=timeout)
+
+    def head_height(self, finality: str = FinalityTypes.FINAL, timeout: 'TimeoutType' = 2.0) -> int:
+        """Height of the chain head at finality."""
+        return self.json_rpc("block", self._block_reference(None, finality), timeout=timeout)['header']['height']
+
+    def _fetch_block(self, height: int, timeout: 'TimeoutType') -> Optional['BlockWithChunksType']:
+        try:
+            block = self.get_block(height, timeout=timeout)
+        except JsonProviderError as e:
+            if is_unknown_block(e):
+                return None
+            raise
+        chunk_ids = [chunk['chunk_hash'] for chunk in block['chunks'] if chunk.get('height_included') == height]
+        return block, self.get_chunks(chunk_ids, timeout=timeout)
+
+    def prefetch_heights(
+            self,
+            fetch: Callable[[int, 'TimeoutType'], Any],
+            start_height: int,
+            end: Optional[int] = None,
+            finality: str = FinalityTypes.FINAL,
+            prefetch: int = DEFAULT_PREFETCH,
+            min_poll_interval: float = DEFAULT_MIN_POLL_INTERVAL,
+            max_poll_interval: float = DEFAULT_MAX_POLL_INTERVAL,
+            timeout: 'TimeoutType' = 10.0
+    ) -> Iterator[Any]:
+        """
+        Yield fetch(height, timeout) for the heights from start_height up to end, skipping None, prefetched and
+        following the chain as iter_blocks does, which is this loop with a fetch of blocks and their chunks.
+        Heights are only fetched once the head at finality reached them, and start_height is checked once against
+        the earliest height the node keeps, so fetch may take an error satisfying is_unknown_block for a height
+        without a block and return None."""
+        earliest = self.get_status(timeout=timeout)['sync_info']['earliest_block_height']
+        if start_height < earliest:
+            raise JsonProviderError(
+                {'name': "GARBAGE_COLLECTED_BLOCK", 'height': start_height, 'earliest_block_height': earliest})
+        executor = ThreadPoolExecutor(prefetch, thread_name_prefix="near-block-prefetch")
+        pending = collections.deque()
+        next_height = start_height
+        head = start_height - 1
+        poll_interval = min_poll_interval
+        try:
+            while pending or end is None or next_height < end:
+                while len(pending) < prefetch and (end is None or next_height < end):
+                    if next_height > head:
+                        if pending:
+                            break
+                        head = self.head_height(finality, timeout)
+                        if next_height > head:
+                            time.sleep(poll_interval)
+                            poll_interval = min(poll_interval * 2, max_poll_interval)
+                            continue
+                        poll_interval = min_poll_interval
+                    pending.append(executor.submit(fetch, next_height, timeout))
+                    next_height += 1
+                if pending:
+                    result = pending.popleft().result()
+                    if result is not None:
+                        yield result
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def iter_blocks(
+            self,
+            start_height: int,
+            end: Optional[int] = None,
+            finality: str = FinalityTypes.FINAL,
+            prefetch: int = DEFAULT_PREFETCH,
+            min_poll_interval: float = DEFAULT_MIN_POLL_INTERVAL,
+            max_poll_interval: float = DEFAULT_MAX_POLL_INTERVAL,
+            timeout: 'TimeoutType' = 10.0
+    ) -> Iterator['BlockWithChunksType']:
+        """
+        Yield (block, chunks) for every block from start_height up to end excluded, in height order, where chunks
+        are the chunks included in the block, in shard order. Heights without a block are skipped, while a
+        start_height the node no longer keeps raises JsonProviderError. Up to prefetch blocks are fetched ahead
+        concurrently, each with its chunks in one batch. Blocks past the chain head at finality are waited for:
+        without end, the chain is followed forever, polling the head every min_poll_interval seconds and backing
+        off up to max_poll_interval while no new block is produced."""
+        return self.prefetch_heights(
+            self._fetch_block, start_height, end, finality, prefetch, min_poll_interval, max_poll_interval, timeout)
@@ -0,0 +1,202 @@
+import collections
+import email.utils
+import threading
+import time
+from typing import Optional, Dict, Union, List, Callable
+
+import requests
+
+from near_api.cache import is_idempotent
+
+# Bounds and initial value of the number of concurrent requests allowed by an AdaptiveLimiter.
+DEFAULT_INITIAL_LIMIT = 10
+DEFAULT_MIN_LIMIT = 1
+DEFAULT_MAX_LIMIT = 256
+
+# Factor applied to the limit when the node is overloaded.
+DEFAULT_BACKOFF = 0.5
+
+# Latency, relative to the lowest recently observed one, up to which the node is considered not congested.
+DEFAULT_LATENCY_TOLERANCE = 2.0
+
+# Number of times a request rejected with HTTP 429 or 503 is retried.
+DEFAULT_MAX_RETRIES = 3
+
+# Seconds to wait before retrying a rejected request without Retry-After header, doubled on every retry,
+# and maximum wait accepted from a Retry-After header.
+DEFAULT_RETRY_AFTER = 0.5
+MAX_RETRY_AFTER = 60.0
+
+# Latency variations below this many seconds are noise rather than a sign of congestion.
+_LATENCY_NOISE = 0.005
+
+# Weight of a new latency sample pulling the baseline latency up, so the baseline follows a node getting slower.
+_BASELINE_DRIFT = 0.01
+
+_RETRY_STATUSES = (429, 503)
+
+
+class TokenBucket(object):
+    """Rate limit of rate requests per second, allowing bursts of up to burst requests. Thread-safe."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until tokens are available and take them, burst tokens at a time if more are needed."""
+        while tokens > 0:
+            needed = min(tokens, self.burst)
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= needed:
+                    self._tokens -= needed
+                    tokens -= needed
+                    continue
+                wait = (needed - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveLimiter(object):
+    """
+    Limit of concurrent requests to a node, adjusted with additive increase and multiplicative decrease.
+    While the limit is used and latencies stay within latency_tolerance times the baseline latency, it grows
+    by about one per round trip; when latencies grow beyond that it shrinks slowly, as queueing builds up on
+    the node. An overloaded response (HTTP 429, 5xx or a timeout) multiplies it by backoff, at most once per
+    round trip. pause() stops all requests for a while, e.g. as asked by a Retry-After header. Thread-safe."""
+
+    def __init__(
+            self,
+            initial_limit: int = DEFAULT_INITIAL_LIMIT,
+            min_limit: int = DEFAULT_MIN_LIMIT,
+            max_limit: int = DEFAULT_MAX_LIMIT,
+            backoff: float = DEFAULT_BACKOFF,
+            latency_tolerance: float = DEFAULT_LATENCY_TOLERANCE
+    ):
+        self._limit = float(initial_limit)
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._backoff = backoff
+        self._latency_tolerance = latency_tolerance
+        self._baseline: Optional[float] = None
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self) -> float:
+        """Block until a request may be sent, returning its start time to pass to release()."""
+        with self._cond:
+            while True:
+                wait = self._paused_until - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                elif self._in_flight < int(self._limit):
+                    self._in_flight += 1
+                    return time.monotonic()
+                else:
+                    self._cond.wait()
+
+    def release(self, start: float, overloaded: bool = False):
+        """Record the outcome of a request started at start."""
+        now = time.monotonic()
+        latency = now - start
+        with self._cond:
+            used = self._in_flight >= int(self._limit) // 2
+            self._in_flight -= 1
+            if overloaded:
+                # Requests sent before the last decrease saw the same overload, do not decrease again for them.
+                if start >= self._last_decrease:
+                    self._limit = max(self._min_limit, self._limit * self._backoff)
+                    self._last_decrease = now
+            else:
+                if self._baseline is None or latency < self._baseline:
+                    self._baseline = latency
+                else:
+                    self._baseline += (latency - self._baseline) * _BASELINE_DRIFT
+                if latency > self._latency_tolerance * self._baseline + _LATENCY_NOISE:
+                    self._limit = max(self._min_limit, self._limit - 1 / self._limit)
+                elif used:
+                    self._limit = min(self._max_limit, self._limit + 1 / self._limit)
+            self._cond.notify_all()
+
+    def pause(self, seconds: float):
+        """Hold all requests for seconds."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def _retry_after(response: requests.Response, retry: int) -> float:
+    """Seconds to wait before retrying a rejected request, from its Retry-After header if any."""
+    value = response.headers.get("Retry-After")
+    delay = None
+    if value:
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                delay = email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                pass
+    if delay is None:
+        delay = DEFAULT_RETRY_AFTER * 2 ** retry
+    return min(max(delay, 0.0), MAX_RETRY_AFTER)
+
+
+class RpcLimiter(object):
+    """
+    Flow control of the requests of a JsonProvider to its node: an AdaptiveLimiter bounds the concurrent requests,
+    optional per-method token buckets bound the request rate, and requests rejected with HTTP 429 or 503 are
+    retried up to max_retries times after their Retry-After delay, except transaction broadcasts, which may have
+    been processed anyway. method_rates maps a method name to its rate in calls per second, or to a TokenBucket;
+    every call of a batch takes a token of its method."""
+
+    def __init__(
+            self,
+            concurrency: Optional['AdaptiveLimiter'] = None,
+            method_rates: Optional[Dict[str, Union[float, 'TokenBucket']]] = None,
+            max_retries: int = DEFAULT_MAX_RETRIES
+    ):
+        self.concurrency = concurrency or AdaptiveLimiter()
+        self._buckets = {
+            method: rate if isinstance(rate, TokenBucket) else TokenBucket(rate)
+            for method, rate in (method_rates or {}).items()
+        }
+        self._max_retries = max_retries
+
+    def call(self, methods: List[str], send: Callable[[], requests.Response]) -> requests.Response:
+        """Send a request carrying calls of methods with send() once allowed, retrying it if rejected."""
+        retry = 0
+        max_retries = self._max_retries if is_idempotent(methods) else 0
+        while True:
+            for method, count in collections.Counter(methods).items():
+                bucket = self._buckets.get(method)
+                if bucket is not None:
+                    bucket.acquire(count)
+            start = self.concurrency.acquire()
+            overloaded = True
+            try:
+                response = send()
+                overloaded = response.status_code == 429 or response.status_code >= 500
+            except Exception as e:
+                overloaded = isinstance(e, (requests.Timeout, requests.ConnectionError))
+                raise
+            finally:
+                self.concurrency.release(start, overloaded)
+            if response.status_code not in _RETRY_STATUSES or retry >= max_retries:
+                return response
+            self.concurrency.pause(_retry_after(response, retry))
+            retry += 1
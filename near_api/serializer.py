@@ -1,7 +1,13 @@
-from typing import Union
+import struct
+from typing import Union, Any, Callable, Dict, Tuple
 
 
 class BinarySerializer:
+    """
+    Schema driven Borsh serializer.
+    Besides 'uN', 'string', [N], [type], option and class field types, 'bytes' is a Vec<u8> whose
+    value is any bytes-like object (bytes, bytearray, memoryview, mmap) and is copied in a single step."""
+
     def __init__(self, schema: dict):
         self.array = bytearray()
         self.schema = schema
@@ -23,6 +29,10 @@ class BinarySerializer:
                     b = value.encode('utf8')
                     self.serialize_num(len(b), 4)
                     self.array += b
+                elif field_type == 'bytes':
+                    with memoryview(bytes(value) if isinstance(value, list) else value) as view:
+                        self.serialize_num(view.nbytes, 4)
+                        self.array += view
                 else:
                     assert False, field_type        # TODO: Need to replace to Exception
             elif type(field_type) == list:
@@ -69,3 +79,364 @@ class BinarySerializer:
     def serialize(self, obj):
         self.serialize_struct(obj)
         return bytes(self.array)
+
+
+_U32 = struct.Struct('<I')
+_NUM_STRUCTS = {
+    2: struct.Struct('<H'),
+    4: _U32,
+    8: struct.Struct('<Q'),
+}
+
+EncoderType = Callable[[Any, bytearray], None]
+""" A compiled encoder, appends the Borsh encoding of a value to the output buffer."""
+
+
+class CompiledBinarySerializer:
+    """
+    Serializer that compiles a schema once into one encoder function per class.
+    Produces the same bytes as BinarySerializer without re-dispatching on the schema for every field.
+    An instance is reusable and can be shared between threads."""
+
+    def __init__(self, schema: dict):
+        self.schema = schema
+        self._encoders: Dict[type, EncoderType] = {}
+        for cls in schema:
+            self.encoder(cls)
+
+    def encoder(self, cls: type) -> 'EncoderType':
+        """Return the compiled encoder of a schema class."""
+        enc = self._encoders.get(cls)
+        if enc is None:
+            enc = self._compile_struct(cls)
+        return enc
+
+    def _compile_num(self, n_bytes: int, name: str) -> 'EncoderType':
+        def out_of_range(value):
+            return ValueError("%s = %s is not a u%d" % (name, value, n_bytes * 8))
+
+        if n_bytes == 1:
+            def encode_u8(value, out):
+                try:
+                    out.append(value)
+                except ValueError:
+                    raise out_of_range(value) from None
+            return encode_u8
+        if n_bytes in _NUM_STRUCTS:
+            pack = _NUM_STRUCTS[n_bytes].pack
+
+            def encode_num(value, out):
+                try:
+                    out += pack(value)
+                except struct.error:
+                    raise out_of_range(value) from None
+            return encode_num
+
+        def encode_big_num(value, out):
+            try:
+                out += value.to_bytes(n_bytes, 'little')
+            except OverflowError:
+                raise out_of_range(value) from None
+        return encode_big_num
+
+    def _compile_byte_vec(self) -> 'EncoderType':
+        pack_u32 = _U32.pack
+
+        def encode_byte_vec(value, out):
+            if isinstance(value, list):
+                value = bytes(value)
+            # The length is in bytes, also for buffers of wider items such as array('I'). The view is
+            # released right away so that an mmap can be closed after serialization.
+            with memoryview(value) as view:
+                out += pack_u32(view.nbytes)
+                out += view
+        return encode_byte_vec
+
+    def _compile_field(self, field_type: Union[str, list, dict, type], name: str) -> 'EncoderType':
+        """Compile the encoder of field_type; name is the field in error messages, e.g. "Transfer.deposit"."""
+        pack_u32 = _U32.pack
+        if type(field_type) == str:
+            if field_type[0] == 'u':
+                return self._compile_num(int(field_type[1:]) // 8, name)
+            elif field_type == 'string':
+                def encode_string(value, out):
+                    b = value.encode('utf8')
+                    out += pack_u32(len(b))
+                    out += b
+                return encode_string
+            elif field_type == 'bytes':
+                return self._compile_byte_vec()
+            else:
+                raise TypeError("Unknown field type %s" % field_type)
+        elif type(field_type) == list:
+            if len(field_type) != 1:
+                raise TypeError("Unknown field type %s" % field_type)
+            if type(field_type[0]) == int:
+                length = field_type[0]
+
+                def encode_fixed_array(value, out):
+                    if type(value) != bytes:
+                        raise TypeError("type(%s) = %s != bytes" % (value, type(value)))
+                    if len(value) != length:
+                        raise ValueError("len(%s) = %s != %s" % (value, len(value), length))
+                    out += value
+                return encode_fixed_array
+            elif field_type[0] == 'u8':
+                return self._compile_byte_vec()
+            else:
+                encode_element = self._compile_field(field_type[0], name + "[]")
+
+                def encode_vec(value, out):
+                    out += pack_u32(len(value))
+                    for el in value:
+                        encode_element(el, out)
+                return encode_vec
+        elif type(field_type) == dict:
+            if field_type['kind'] != "option":
+                raise TypeError("Unknown field type %s" % field_type)
+            # tx_schema historically spells the key as the builtin `type`.
+            encode_value = self._compile_field(field_type['type'] if 'type' in field_type else field_type[type], name)
+
+            def encode_option(value, out):
+                if value is None:
+                    out.append(0)
+                else:
+                    out.append(1)
+                    encode_value(value, out)
+            return encode_option
+        elif type(field_type) == type:
+            encode_struct = self.encoder(field_type)
+
+            def encode_struct_field(value, out):
+                if type(value) != field_type:
+                    raise TypeError("%s != type(%s)" % (field_type, value))
+                encode_struct(value, out)
+            return encode_struct_field
+        else:
+            raise TypeError("Unknown field type %s" % (field_type,))
+
+    def _compile_struct(self, cls: type) -> 'EncoderType':
+        struct_schema = self.schema[cls]
+        # The encoder is registered before its fields are compiled so that recursive schemas resolve.
+        if struct_schema['kind'] == "struct":
+            fields = []
+
+            def encode(obj, out):
+                for field_name, encode_field in fields:
+                    encode_field(getattr(obj, field_name), out)
+            self._encoders[cls] = encode
+            fields.extend(
+                (field_name, self._compile_field(field_type, "%s.%s" % (cls.__name__, field_name)))
+                for field_name, field_type in struct_schema['fields'])
+        elif struct_schema['kind'] == "enum":
+            variants = {}
+            enum_field = struct_schema['field']
+
+            def encode(obj, out):
+                name = getattr(obj, enum_field)
+                idx, encode_variant = variants[name]
+                out.append(idx)
+                encode_variant(getattr(obj, name), out)
+            self._encoders[cls] = encode
+            for idx, (field_name, field_type) in enumerate(struct_schema['values']):
+                variants[field_name] = (idx, self._compile_field(field_type, "%s.%s" % (cls.__name__, field_name)))
+        else:
+            raise TypeError("Unknown kind of %s: %s" % (cls, struct_schema))
+        return encode
+
+    def serialize(self, obj) -> bytes:
+        out = bytearray()
+        self.encoder(type(obj))(obj, out)
+        return bytes(out)
+
+
+class DeserializationError(Exception):
+    pass
+
+
+DecoderType = Callable[[memoryview, int], Tuple[Any, int]]
+""" A compiled decoder, reads a value at an offset of the input and returns it with the offset past it."""
+
+
+class BinaryDeserializer:
+    """
+    Borsh deserializer driven by the same schema dicts as BinarySerializer.
+    Struct and enum classes are instantiated without calling __init__ and filled with their fields,
+    enums get their variant name in the schema's 'field' attribute, exactly as serializers expect them.
+    Input is read through a memoryview without intermediate copies. With lazy_bytes, 'bytes' and ['u8']
+    fields are returned as memoryview slices of the input instead of being copied to bytes; they stay
+    valid as long as the input buffer is alive and unmodified."""
+
+    def __init__(self, schema: dict, lazy_bytes: bool = False):
+        self.schema = schema
+        self.lazy_bytes = lazy_bytes
+        self._decoders: Dict[type, DecoderType] = {}
+        for cls in schema:
+            self.decoder(cls)
+
+    def decoder(self, cls: type) -> 'DecoderType':
+        """Return the compiled decoder of a schema class."""
+        dec = self._decoders.get(cls)
+        if dec is None:
+            dec = self._compile_struct(cls)
+        return dec
+
+    @staticmethod
+    def _take(data: memoryview, pos: int, n: int) -> Tuple[memoryview, int]:
+        end = pos + n
+        if end > len(data):
+            raise DeserializationError("Unexpected end of input at %d, %d more bytes expected" % (pos, n))
+        return data[pos:end], end
+
+    def _compile_num(self, n_bytes: int) -> 'DecoderType':
+        take = self._take
+        if n_bytes == 1:
+            def decode_u8(data, pos):
+                if pos >= len(data):
+                    raise DeserializationError("Unexpected end of input at %d, 1 more bytes expected" % pos)
+                return data[pos], pos + 1
+            return decode_u8
+        if n_bytes in _NUM_STRUCTS:
+            unpack_from = _NUM_STRUCTS[n_bytes].unpack_from
+
+            def decode_num(data, pos):
+                if pos + n_bytes > len(data):
+                    raise DeserializationError("Unexpected end of input at %d, %d more bytes expected" % (pos, n_bytes))
+                return unpack_from(data, pos)[0], pos + n_bytes
+            return decode_num
+
+        def decode_big_num(data, pos):
+            b, pos = take(data, pos, n_bytes)
+            return int.from_bytes(b, 'little'), pos
+        return decode_big_num
+
+    def _compile_byte_vec(self) -> 'DecoderType':
+        take = self._take
+        decode_len = self._compile_num(4)
+        lazy = self.lazy_bytes
+
+        def decode_byte_vec(data, pos):
+            length, pos = decode_len(data, pos)
+            b, pos = take(data, pos, length)
+            return (b if lazy else bytes(b)), pos
+        return decode_byte_vec
+
+    def _compile_field(self, field_type: Union[str, list, dict, type]) -> 'DecoderType':
+        take = self._take
+        decode_len = self._compile_num(4)
+        if type(field_type) == str:
+            if field_type[0] == 'u':
+                return self._compile_num(int(field_type[1:]) // 8)
+            elif field_type == 'string':
+                def decode_string(data, pos):
+                    length, pos = decode_len(data, pos)
+                    b, pos = take(data, pos, length)
+                    try:
+                        return str(b, 'utf8'), pos
+                    except UnicodeDecodeError as e:
+                        raise DeserializationError("Invalid utf8 string at %d: %s" % (pos - length, e))
+                return decode_string
+            elif field_type == 'bytes':
+                return self._compile_byte_vec()
+            else:
+                raise DeserializationError("Unknown field type %s" % field_type)
+        elif type(field_type) == list:
+            if len(field_type) != 1:
+                raise DeserializationError("Unknown field type %s" % field_type)
+            if type(field_type[0]) == int:
+                length = field_type[0]
+
+                def decode_fixed_array(data, pos):
+                    b, pos = take(data, pos, length)
+                    return bytes(b), pos
+                return decode_fixed_array
+            elif field_type[0] == 'u8':
+                return self._compile_byte_vec()
+            else:
+                decode_element = self._compile_field(field_type[0])
+
+                def decode_vec(data, pos):
+                    length, pos = decode_len(data, pos)
+                    value = []
+                    for _ in range(length):
+                        el, pos = decode_element(data, pos)
+                        value.append(el)
+                    return value, pos
+                return decode_vec
+        elif type(field_type) == dict:
+            if field_type['kind'] != "option":
+                raise DeserializationError("Unknown field type %s" % field_type)
+            # tx_schema historically spells the key as the builtin `type`.
+            decode_value = self._compile_field(field_type['type'] if 'type' in field_type else field_type[type])
+
+            def decode_option(data, pos):
+                b, pos = take(data, pos, 1)
+                if b[0] == 0:
+                    return None, pos
+                if b[0] != 1:
+                    raise DeserializationError("Invalid option tag %d at %d" % (b[0], pos - 1))
+                return decode_value(data, pos)
+            return decode_option
+        elif type(field_type) == type:
+            return self.decoder(field_type)
+        else:
+            raise DeserializationError("Unknown field type %s" % (field_type,))
+
+    def _compile_struct(self, cls: type) -> 'DecoderType':
+        struct_schema = self.schema[cls]
+        take = self._take
+        # The decoder is registered before its fields are compiled so that recursive schemas resolve.
+        if struct_schema['kind'] == "struct":
+            fields = []
+
+            def decode(data, pos):
+                obj = cls.__new__(cls)
+                for field_name, decode_field in fields:
+                    value, pos = decode_field(data, pos)
+                    setattr(obj, field_name, value)
+                return obj, pos
+            self._decoders[cls] = decode
+            fields.extend(
+                (field_name, self._compile_field(field_type)) for field_name, field_type in struct_schema['fields'])
+        elif struct_schema['kind'] == "enum":
+            variants = []
+            enum_field = struct_schema['field']
+
+            def decode(data, pos):
+                b, pos = take(data, pos, 1)
+                if b[0] >= len(variants):
+                    raise DeserializationError("Invalid %s variant %d at %d" % (cls.__name__, b[0], pos - 1))
+                name, decode_variant = variants[b[0]]
+                value, pos = decode_variant(data, pos)
+                obj = cls.__new__(cls)
+                setattr(obj, enum_field, name)
+                setattr(obj, name, value)
+                return obj, pos
+            self._decoders[cls] = decode
+            variants.extend(
+                (field_name, self._compile_field(field_type)) for field_name, field_type in struct_schema['values'])
+        else:
+            raise DeserializationError("Unknown kind of %s: %s" % (cls, struct_schema))
+        return decode
+
+    def _value_decoder(self, cls: Union[type, str, list, dict]) -> 'DecoderType':
+        if type(cls) == type:
+            return self.decoder(cls)
+        return self._compile_field(cls)
+
+    def deserialize_from(
+            self,
+            data: Union[bytes, bytearray, memoryview],
+            cls: Union[type, str, list, dict],
+            offset: int = 0
+    ) -> Tuple[Any, int]:
+        """Decode one cls value at offset of data, returning it with the offset just past it."""
+        return self._value_decoder(cls)(memoryview(data).cast('B'), offset)
+
+    def deserialize(self, data: Union[bytes, bytearray, memoryview], cls: Union[type, str, list, dict]):
+        """Decode data which must contain exactly one value of cls, a schema class or any field type such as 'u128'."""
+        data = memoryview(data).cast('B')
+        obj, pos = self._value_decoder(cls)(data, 0)
+        if pos != len(data):
+            raise DeserializationError("%d trailing bytes after %s" % (len(data) - pos, cls))
+        return obj
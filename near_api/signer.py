@@ -1,9 +1,10 @@
-import json
 from typing import Union
 
 import base58
 from nacl import signing, encoding
 
+from near_api import codec
+
 
 class KeyPair(object):
 
@@ -14,7 +15,7 @@ class KeyPair(object):
         the byte object returned as "secret_key" property of a KeyPair object."""
         if not secret_key:
             self._secret_key = signing.SigningKey.generate()
-        if isinstance(secret_key, bytes):
+        elif isinstance(secret_key, bytes):
             self._secret_key = signing.SigningKey(secret_key, encoder=encoding.RawEncoder)
         elif isinstance(secret_key, str):
             secret_key = secret_key.split(':')[-1]
@@ -77,4 +78,4 @@ class Signer(object):
     @classmethod
     def from_json_file(cls, json_file: str):
         with open(json_file) as f:
-            return cls.from_json(json.loads(f.read()))
+            return cls.from_json(codec.loads(f.read()))
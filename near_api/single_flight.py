@@ -0,0 +1,55 @@
+import copy
+import threading
+from typing import Callable, Any, Dict, Optional
+
+
+class _Call(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.followers = 0
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight(object):
+    """
+    Deduplication of concurrent identical calls: while a call with a given key is in flight, other threads making
+    the same call wait for it and share its result or error instead of making their own. Every caller gets its own
+    copy of the result, so it may be modified freely, and its own copy of the error, chained to the original one.
+    Thread-safe."""
+
+    def __init__(self):
+        self._calls: Dict[Any, _Call] = {}
+        self._lock = threading.Lock()
+        self.shared = 0
+
+    def do(self, key: Any, fn: Callable[[], Any]) -> Any:
+        """Return fn(), or a copy of the result of the call with the same key already in flight."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = None
+            if call is not None:
+                call.followers += 1
+                self.shared += 1
+            else:
+                call = self._calls[key] = _Call()
+                leader = call
+        if call is not leader:
+            call.done.wait()
+            if call.error is not None:
+                # The leader's exception is being raised in its own thread, which updates its traceback.
+                raise copy.copy(call.error) from call.error
+            return copy.deepcopy(call.result)
+        try:
+            result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            if call.error is None and call.followers:
+                # Snapshot taken before the leader can modify its result; followers copy the snapshot.
+                call.result = copy.deepcopy(result)
+            call.done.set()
+        return result
@@ -0,0 +1,206 @@
+import base64
+from typing import Any, Optional, List, Dict, Set, Tuple, Iterator, Union
+
+import near_api
+from near_api.providers import (
+    FinalityTypes, JsonProviderError, RpcCallType, TimeoutType, is_unknown_block,
+    DEFAULT_PREFETCH, DEFAULT_MIN_POLL_INTERVAL, DEFAULT_MAX_POLL_INTERVAL
+)
+
+StateChangesType = Tuple[int, str, List[dict]]
+""" The (height, block_hash, changes) of a block, as yielded by StateFollower.follow."""
+
+
+def _is_unknown_account(error: Exception) -> bool:
+    """Whether a JsonProviderError means that the account does not exist at the requested block."""
+    return isinstance(error, JsonProviderError) and "UNKNOWN_ACCOUNT" in str(error)
+
+
+def _check_query_result(result: Any) -> Optional[dict]:
+    """Return a query result, None if its account does not exist, or raise the error it failed with."""
+    if _is_unknown_account(result):
+        return None
+    if isinstance(result, JsonProviderError):
+        raise result
+    return result
+
+
+class StateView(object):
+    """
+    In-memory state of the subscriptions of a StateFollower, as of block height. accounts maps an account id to
+    its account fields, data maps it to the contract storage under the subscribed key prefixes and access_keys to
+    its access keys by public key."""
+
+    def __init__(self):
+        self.height: Optional[int] = None
+        self.block_hash: Optional[str] = None
+        self.accounts: Dict[str, dict] = {}
+        self.data: Dict[str, Dict[bytes, bytes]] = {}
+        self.access_keys: Dict[str, Dict[str, dict]] = {}
+
+    def apply(self, change: dict):
+        """Apply a state change returned by EXPERIMENTAL_changes."""
+        change_type = change['type']
+        value = change['change']
+        account_id = value['account_id']
+        if change_type == "account_update":
+            self.accounts[account_id] = {k: v for k, v in value.items() if k != 'account_id'}
+        elif change_type == "account_deletion":
+            self.accounts.pop(account_id, None)
+        elif change_type == "data_update":
+            self.data.setdefault(account_id, {})[base64.b64decode(value['key_base64'])] = \
+                base64.b64decode(value['value_base64'])
+        elif change_type == "data_deletion":
+            self.data.get(account_id, {}).pop(base64.b64decode(value['key_base64']), None)
+        elif change_type == "access_key_update":
+            self.access_keys.setdefault(account_id, {})[value['public_key']] = value['access_key']
+        elif change_type == "access_key_deletion":
+            self.access_keys.get(account_id, {}).pop(value['public_key'], None)
+
+
+class StateFollower(object):
+    """
+    Incremental view of the state of some accounts, kept up to date block by block.
+
+    Subscribe to accounts, to key prefixes of contract storage and to access keys, then iterate over follow().
+    For every block it fetches EXPERIMENTAL_changes_in_block, and only if one of the subscribed accounts was
+    touched, the detailed changes of the subscribed accounts in one batch, then applies them to view. Blocks are
+    prefetched as by JsonProvider.iter_blocks. Subscriptions should be made before following."""
+
+    def __init__(
+            self,
+            provider: 'near_api.providers.JsonProvider',
+            finality: str = FinalityTypes.FINAL,
+            prefetch: int = DEFAULT_PREFETCH,
+            timeout: 'TimeoutType' = 10.0
+    ):
+        self._provider = provider
+        self._finality = finality
+        self._prefetch = prefetch
+        self._timeout = timeout
+        self._accounts: Set[str] = set()
+        self._data: Dict[str, Set[bytes]] = {}
+        self._access_keys: Set[str] = set()
+        self.view = StateView()
+
+    def subscribe_account(self, account_id: str):
+        self._accounts.add(account_id)
+
+    def subscribe_data(self, account_id: str, key_prefix: bytes = b''):
+        """Subscribe to the contract storage keys of account_id starting with key_prefix."""
+        prefixes = self._data.setdefault(account_id, set())
+        if any(key_prefix.startswith(prefix) for prefix in prefixes):
+            return
+        # Drop the prefixes covered by the new one, so no change is fetched twice.
+        prefixes.difference_update([prefix for prefix in prefixes if prefix.startswith(key_prefix)])
+        prefixes.add(key_prefix)
+
+    def subscribe_access_keys(self, account_id: str):
+        self._access_keys.add(account_id)
+
+    def _change_calls(
+            self,
+            block_id: Union[int, str],
+            accounts: Set[str],
+            data: Set[str],
+            access_keys: Set[str]
+    ) -> List['RpcCallType']:
+        calls = []
+        if accounts:
+            calls.append(("EXPERIMENTAL_changes", {
+                'changes_type': "account_changes", 'account_ids': sorted(accounts), 'block_id': block_id}))
+        by_prefix: Dict[bytes, List[str]] = {}
+        for account_id in sorted(data):
+            for prefix in self._data[account_id]:
+                by_prefix.setdefault(prefix, []).append(account_id)
+        for prefix, account_ids in sorted(by_prefix.items()):
+            calls.append(("EXPERIMENTAL_changes", {
+                'changes_type': "data_changes", 'account_ids': account_ids,
+                'key_prefix_base64': base64.b64encode(prefix).decode('utf8'), 'block_id': block_id}))
+        if access_keys:
+            calls.append(("EXPERIMENTAL_changes", {
+                'changes_type': "all_access_key_changes", 'account_ids': sorted(access_keys), 'block_id': block_id}))
+        return calls
+
+    def _fetch_changes(self, height: int, timeout: 'TimeoutType') -> Optional['StateChangesType']:
+        try:
+            touched = self._provider.get_changes_in_block(block_id=height, timeout=timeout)
+        except JsonProviderError as e:
+            if is_unknown_block(e):
+                return None
+            raise
+        accounts, data, access_keys = set(), set(), set()
+        for change in touched['changes']:
+            account_id = change['account_id']
+            if change['type'] == "account_touched" and account_id in self._accounts:
+                accounts.add(account_id)
+            elif change['type'] == "data_touched" and account_id in self._data:
+                data.add(account_id)
+            elif change['type'] == "access_key_touched" and account_id in self._access_keys:
+                access_keys.add(account_id)
+        block_hash = touched['block_hash']
+        calls = self._change_calls(block_hash, accounts, data, access_keys)
+        results = self._provider.json_rpc_batch(calls, timeout=timeout) if calls else []
+        return height, block_hash, [change for result in results for change in result['changes']]
+
+    def load(self, block_id: Union[int, str]):
+        """
+        Replace the view with the full state of the subscriptions at block_id, a block height or hash. Accounts
+        which do not exist at block_id are left out of the view; any other error is raised and the view is kept."""
+        calls = [
+            ("query", {'request_type': "view_account", 'account_id': account_id, 'block_id': block_id})
+            for account_id in sorted(self._accounts)
+        ]
+        for account_id in sorted(self._data):
+            for prefix in sorted(self._data[account_id]):
+                calls.append(("query", {
+                    'request_type': "view_state", 'account_id': account_id,
+                    'prefix_base64': base64.b64encode(prefix).decode('utf8'), 'block_id': block_id}))
+        calls.extend(
+            ("query", {'request_type': "view_access_key_list", 'account_id': account_id, 'block_id': block_id})
+            for account_id in sorted(self._access_keys))
+        results = iter(self._provider.json_rpc_batch(calls, timeout=self._timeout, raise_on_error=False))
+        view = StateView()
+        for account_id in sorted(self._accounts):
+            result = _check_query_result(next(results))
+            if result is not None:
+                view.height, view.block_hash = result['block_height'], result['block_hash']
+                view.accounts[account_id] = {
+                    k: v for k, v in result.items() if k not in ('block_height', 'block_hash')}
+        for account_id in sorted(self._data):
+            for _ in self._data[account_id]:
+                result = _check_query_result(next(results))
+                if result is not None:
+                    view.data.setdefault(account_id, {}).update(
+                        (base64.b64decode(item['key']), base64.b64decode(item['value'])) for item in result['values'])
+        for account_id in sorted(self._access_keys):
+            result = _check_query_result(next(results))
+            if result is not None:
+                view.access_keys[account_id] = {key['public_key']: key['access_key'] for key in result['keys']}
+        if isinstance(block_id, int):
+            view.height = block_id
+        self.view = view
+
+    def follow(
+            self,
+            start_height: Optional[int] = None,
+            end: Optional[int] = None,
+            min_poll_interval: float = DEFAULT_MIN_POLL_INTERVAL,
+            max_poll_interval: float = DEFAULT_MAX_POLL_INTERVAL
+    ) -> Iterator['StateChangesType']:
+        """
+        Apply the changes of the subscriptions block by block from start_height up to end excluded, following
+        the chain forever without end, and yield the (height, block_hash, changes) of every block once view
+        includes them. Without start_height, the view is first loaded at the chain head and followed from there."""
+        if start_height is None:
+            head = self._provider.head_height(self._finality, self._timeout)
+            self.load(head)
+            start_height = head + 1
+        blocks = self._provider.prefetch_heights(
+            self._fetch_changes, start_height, end, self._finality, self._prefetch,
+            min_poll_interval, max_poll_interval, self._timeout)
+        for height, block_hash, changes in blocks:
+            for change in changes:
+                self.view.apply(change)
+            self.view.height, self.view.block_hash = height, block_hash
+            yield height, block_hash, changes
@@ -1,76 +1,189 @@
 import hashlib
-from typing import List
+import mmap
+import time
+from typing import List, Optional, Tuple, Union
 
 import near_api
-from near_api.serializer import BinarySerializer
+from near_api import metrics
+from near_api.serializer import BinaryDeserializer, CompiledBinarySerializer
 
 
-class Signature:
-    pass
+# The classes below mirror tx_schema. Their attributes are the schema fields, held in __slots__ so that
+# instances are small; all constructor arguments are optional, so the serializers may also fill the fields
+# one by one. An enum (Action, AccessKeyPermission) holds the name of its variant in enum and the variant in
+# value, also readable and writable as the attribute named after the variant, e.g. action.transfer.
 
 
-class SignedTransaction:
-    pass
+class PublicKey(object):
+    __slots__ = ('keyType', 'data')
 
+    def __init__(self, data: bytes = b'', key_type: int = 0):
+        self.keyType = key_type
+        self.data = data
 
-class Transaction:
-    pass
 
+class Signature(object):
+    __slots__ = ('keyType', 'data')
 
-class PublicKey:
-    pass
+    def __init__(self, data: bytes = b'', key_type: int = 0):
+        self.keyType = key_type
+        self.data = data
 
 
-class AccessKey:
-    pass
+class FunctionCallPermission(object):
+    __slots__ = ('allowance', 'receiverId', 'methodNames')
 
+    def __init__(
+            self,
+            receiver_id: str = "",
+            method_names: Optional[List[str]] = None,
+            allowance: Optional[int] = None
+    ):
+        self.allowance = allowance
+        self.receiverId = receiver_id
+        self.methodNames = method_names if method_names is not None else []
 
-class AccessKeyPermission:
-    pass
 
+class FullAccessPermission(object):
+    __slots__ = ()
 
-class FunctionCallPermission:
-    pass
 
+def _variant(name: str) -> property:
+    """Attribute of an enum holding its value if its variant is name."""
+    def get(self):
+        if self.enum != name:
+            raise AttributeError(name)
+        return self.value
 
-class FullAccessPermission:
-    pass
+    def set(self, value):
+        self.enum = name
+        self.value = value
 
+    return property(get, set)
 
-class Action:
-    pass
 
+class _Enum(object):
+    __slots__ = ('enum', 'value')
 
-class CreateAccount:
-    pass
+    # Variant name of each variant class, set from tx_schema.
+    _variants = {}
 
+    def __init__(self, value=None):
+        if value is not None:
+            self.enum = self._variants[value.__class__]
+            self.value = value
 
-class DeployContract:
-    pass
 
+class AccessKeyPermission(_Enum):
+    __slots__ = ()
+    functionCall = _variant('functionCall')
+    fullAccess = _variant('fullAccess')
 
-class FunctionCall:
-    pass
 
+class AccessKey(object):
+    __slots__ = ('nonce', 'permission')
 
-class Transfer:
-    pass
+    def __init__(self, permission: Optional[AccessKeyPermission] = None, nonce: int = 0):
+        self.nonce = nonce
+        self.permission = permission
 
 
-class Stake:
-    pass
+class CreateAccount(object):
+    __slots__ = ()
 
 
-class AddKey:
-    pass
+class DeployContract(object):
+    __slots__ = ('code',)
 
+    def __init__(self, code: Union[bytes, bytearray, memoryview, mmap.mmap] = b''):
+        self.code = code
 
-class DeleteKey:
-    pass
 
+class FunctionCall(object):
+    __slots__ = ('methodName', 'args', 'gas', 'deposit')
 
-class DeleteAccount:
-    pass
+    def __init__(self, method_name: str = "", args: bytes = b'', gas: int = 0, deposit: int = 0):
+        self.methodName = method_name
+        self.args = args
+        self.gas = gas
+        self.deposit = deposit
+
+
+class Transfer(object):
+    __slots__ = ('deposit',)
+
+    def __init__(self, deposit: int = 0):
+        self.deposit = deposit
+
+
+class Stake(object):
+    __slots__ = ('stake', 'publicKey')
+
+    def __init__(self, stake: int = 0, public_key: Optional[PublicKey] = None):
+        self.stake = stake
+        self.publicKey = public_key
+
+
+class AddKey(object):
+    __slots__ = ('publicKey', 'accessKey')
+
+    def __init__(self, public_key: Optional[PublicKey] = None, access_key: Optional[AccessKey] = None):
+        self.publicKey = public_key
+        self.accessKey = access_key
+
+
+class DeleteKey(object):
+    __slots__ = ('publicKey',)
+
+    def __init__(self, public_key: Optional[PublicKey] = None):
+        self.publicKey = public_key
+
+
+class DeleteAccount(object):
+    __slots__ = ('beneficiaryId',)
+
+    def __init__(self, beneficiary_id: str = ""):
+        self.beneficiaryId = beneficiary_id
+
+
+class Action(_Enum):
+    __slots__ = ()
+    createAccount = _variant('createAccount')
+    deployContract = _variant('deployContract')
+    functionCall = _variant('functionCall')
+    transfer = _variant('transfer')
+    stake = _variant('stake')
+    addKey = _variant('addKey')
+    deleteKey = _variant('deleteKey')
+    deleteAccount = _variant('deleteAccount')
+
+
+class Transaction(object):
+    __slots__ = ('signerId', 'publicKey', 'nonce', 'receiverId', 'blockHash', 'actions')
+
+    def __init__(
+            self,
+            signer_id: str = "",
+            public_key: Optional[PublicKey] = None,
+            nonce: int = 0,
+            receiver_id: str = "",
+            block_hash: bytes = b'',
+            actions: Optional[List[Action]] = None
+    ):
+        self.signerId = signer_id
+        self.publicKey = public_key
+        self.nonce = nonce
+        self.receiverId = receiver_id
+        self.blockHash = block_hash
+        self.actions = actions if actions is not None else []
+
+
+class SignedTransaction(object):
+    __slots__ = ('transaction', 'signature')
+
+    def __init__(self, transaction: Optional[Transaction] = None, signature: Optional[Signature] = None):
+        self.transaction = transaction
+        self.signature = signature
 
 
 tx_schema = dict(
@@ -187,7 +300,7 @@ tx_schema = dict(
             {
                 'kind': 'struct',
                 'fields': [
-                    ['code', ['u8']],
+                    ['code', 'bytes'],
                 ],
             },
         ],
@@ -197,7 +310,7 @@ tx_schema = dict(
                 'kind': 'struct',
                 'fields': [
                     ['methodName', 'string'],
-                    ['args', ['u8']],
+                    ['args', 'bytes'],
                     ['gas', 'u64'],
                     ['deposit', 'u128'],
                 ],
@@ -253,6 +366,13 @@ tx_schema = dict(
     ]
 )
 
+for _enum_cls in (Action, AccessKeyPermission):
+    _enum_cls._variants = {variant_cls: name for name, variant_cls in tx_schema[_enum_cls]['values']}
+
+tx_serializer = CompiledBinarySerializer(tx_schema)
+tx_deserializer = BinaryDeserializer(tx_schema)
+lazy_tx_deserializer = BinaryDeserializer(tx_schema, lazy_bytes=True)
+
 
 def sign_and_serialize_transaction(
         receiver_id: str,
@@ -261,124 +381,197 @@ def sign_and_serialize_transaction(
         block_hash: bytes,
         signer: 'near_api.signer.Signer'
 ) -> bytes:
+    return sign_and_hash_transaction(receiver_id, nonce, actions, block_hash, signer)[0]
+
+
+def _build_transaction(
+        receiver_id: str,
+        nonce: int,
+        actions: List[Action],
+        block_hash: bytes,
+        signer: 'near_api.signer.Signer'
+) -> Transaction:
     assert signer.public_key is not None    # TODO: Need to replace to Exception
     assert block_hash is not None    # TODO: Need to replace to Exception
-    tx = Transaction()
-    tx.signerId = signer.account_id
-    tx.publicKey = PublicKey()
-    tx.publicKey.keyType = 0
-    tx.publicKey.data = signer.public_key
-    tx.nonce = nonce
-    tx.receiverId = receiver_id
-    tx.actions = actions
-    tx.blockHash = block_hash
+    return Transaction(signer.account_id, PublicKey(signer.public_key), nonce, receiver_id, block_hash, actions)
 
-    msg: bytes = BinarySerializer(tx_schema).serialize(tx)
-    hash_: bytes = hashlib.sha256(msg).digest()
 
-    signature = Signature()
-    signature.keyType = 0
-    signature.data = signer.sign(hash_)
+def sign_and_hash_transaction(
+        receiver_id: str,
+        nonce: int,
+        actions: List[Action],
+        block_hash: bytes,
+        signer: 'near_api.signer.Signer'
+) -> Tuple[bytes, bytes]:
+    """
+    Same as sign_and_serialize_transaction, also returning the transaction hash, which identifies the
+    transaction on chain (its base58 encoding is what get_tx expects): (signed_tx, tx_hash)."""
+    out, hash_ = sign_and_hash_transaction_buffer(receiver_id, nonce, actions, block_hash, signer)
+    return bytes(out), hash_
 
-    signed_tx = SignedTransaction()
-    signed_tx.transaction = tx
-    signed_tx.signature = signature
 
-    return BinarySerializer(tx_schema).serialize(signed_tx)
+def sign_and_hash_transaction_buffer(
+        receiver_id: str,
+        nonce: int,
+        actions: List[Action],
+        block_hash: bytes,
+        signer: 'near_api.signer.Signer'
+) -> Tuple[bytearray, bytes]:
+    """
+    Same as sign_and_hash_transaction, returning signed_tx as the bytearray it was serialized to rather than
+    a bytes copy of it, so contract code is copied only once. For callers which only send signed_tx."""
+    start = time.perf_counter()
+    tx = _build_transaction(receiver_id, nonce, actions, block_hash, signer)
+
+    # A SignedTransaction is its transaction followed by the signature, so both are written
+    # to one buffer and the transaction is serialized only once.
+    out = bytearray()
+    tx_serializer.encoder(Transaction)(tx, out)
+    serialized = time.perf_counter()
+    hash_: bytes = hashlib.sha256(out).digest()
+    hashed = time.perf_counter()
+
+    signature = Signature(signer.sign(hash_))
+    signed = time.perf_counter()
+
+    tx_serializer.encoder(Signature)(signature, out)
+    if metrics.enabled():
+        metrics.report_timing("serialize", serialized - start + time.perf_counter() - signed)
+        metrics.report_timing("hash", hashed - serialized)
+        metrics.report_timing("sign", signed - hashed)
+    return out, hash_
+
+
+class TransactionTemplate(object):
+    """
+    Prepared transaction of a signer to receiver_id with fixed actions. Everything but the nonce, the block hash
+    and optionally the deposit of its only Transfer or FunctionCall action is serialized once, and every
+    signing patches these fields in place at recorded offsets instead of walking the schema again.
+    Output is identical to sign_and_serialize_transaction with the same arguments."""
+
+    def __init__(self, signer: 'near_api.signer.Signer', receiver_id: str, actions: List[Action]):
+        self._signer = signer
+        tx = _build_transaction(receiver_id, 0, actions, bytes(32), signer)
+        out = bytearray()
+        tx_serializer.encoder(Transaction)(tx, out)
+        self._tx_len = len(out)
+        # Field offsets follow the layout of Transaction in tx_schema.
+        self._nonce_offset = 4 + len(signer.account_id.encode('utf8')) + 1 + 32
+        self._block_hash_offset = self._nonce_offset + 8 + 4 + len(receiver_id.encode('utf8'))
+        self._deposit_offsets = []
+        offset = self._block_hash_offset + 32 + 4
+        for action in actions:
+            start = len(out)
+            tx_serializer.encoder(Action)(action, out)
+            if action.enum == "transfer":
+                self._deposit_offsets.append(offset + 1)
+            elif action.enum == "functionCall":
+                self._deposit_offsets.append(offset + len(out) - start - 16)
+            offset += len(out) - start
+            del out[start:]
+        if offset != self._tx_len:
+            raise ValueError("Unexpected transaction layout")
+        # The constant parts between the patched fields, joined with them on every signing.
+        template = bytes(out)
+        self._head = template[:self._nonce_offset]
+        self._middle = template[self._nonce_offset + 8:self._block_hash_offset]
+        self._tail = template[self._block_hash_offset + 32:]
+        if len(self._deposit_offsets) == 1:
+            deposit_offset = self._deposit_offsets[0] - self._block_hash_offset - 32
+            self._before_deposit = self._tail[:deposit_offset]
+            self._after_deposit = self._tail[deposit_offset + 16:]
+
+    def sign_and_hash(
+            self,
+            nonce: int,
+            block_hash: bytes,
+            deposit: Optional[int] = None
+    ) -> Tuple[bytes, bytes]:
+        """Return (signed_tx, tx_hash) for the given nonce and block hash, and deposit if not None."""
+        if len(block_hash) != 32:
+            raise ValueError("len(%s) = %s != 32" % (block_hash, len(block_hash)))
+        if deposit is not None and len(self._deposit_offsets) != 1:
+            raise ValueError("Template has %d deposits" % len(self._deposit_offsets))
+        if deposit is None:
+            parts = [self._head, nonce.to_bytes(8, 'little'), self._middle, block_hash, self._tail]
+        else:
+            parts = [self._head, nonce.to_bytes(8, 'little'), self._middle, block_hash, self._before_deposit,
+                     deposit.to_bytes(16, 'little'), self._after_deposit]
+        # The parts are hashed one by one and joined once, with the signature, into the returned bytes.
+        hasher = hashlib.sha256()
+        for part in parts:
+            hasher.update(part)
+        hash_ = hasher.digest()
+        # The signature is ed25519, key type 0, as in sign_and_hash_transaction.
+        parts.append(b'\x00')
+        parts.append(self._signer.sign(hash_))
+        return b''.join(parts), hash_
+
+    def sign(self, nonce: int, block_hash: bytes, deposit: Optional[int] = None) -> bytes:
+        return self.sign_and_hash(nonce, block_hash, deposit)[0]
+
+
+def deserialize_signed_transaction(
+        data: Union[bytes, bytearray, memoryview],
+        lazy_bytes: bool = False
+) -> SignedTransaction:
+    """
+    Rebuild a SignedTransaction from its Borsh encoding, e.g. as produced by sign_and_serialize_transaction.
+    With lazy_bytes, contract code and function call args are memoryview slices of data instead of copies."""
+    return (lazy_tx_deserializer if lazy_bytes else tx_deserializer).deserialize(data, SignedTransaction)
+
+
+def deserialize_transaction(data: Union[bytes, bytearray, memoryview], lazy_bytes: bool = False) -> Transaction:
+    """Rebuild an unsigned Transaction from its Borsh encoding."""
+    return (lazy_tx_deserializer if lazy_bytes else tx_deserializer).deserialize(data, Transaction)
 
 
 def create_create_account_action() -> 'Action':
-    create_account = CreateAccount()
-    action = Action()
-    action.enum = "createAccount"
-    action.createAccount = create_account
-    return action
+    return Action(CreateAccount())
 
 
 def create_delete_account_action(beneficiary_id: str) -> 'Action':
-    delete_account = DeleteAccount()
-    delete_account.beneficiaryId = beneficiary_id
-    action = Action()
-    action.enum = "deleteAccount"
-    action.deleteAccount = delete_account
-    return action
-
-
-def create_full_access_key_action(pk: str) -> 'Action':
-    permission = AccessKeyPermission()
-    permission.enum = "fullAccess"
-    permission.fullAccess = FullAccessPermission()
-    access_key = AccessKey()
-    access_key.nonce = 0
-    access_key.permission = permission
-    public_key = PublicKey()
-    public_key.keyType = 0
-    public_key.data = pk
-    add_key = AddKey()
-    add_key.accessKey = access_key
-    add_key.publicKey = public_key
-    action = Action()
-    action.enum = "addKey"
-    action.addKey = add_key
-    return action
-
-
-def create_delete_access_key_action(pk: str) -> 'Action':
-    public_key = PublicKey()
-    public_key.keyType = 0
-    public_key.data = pk
-    delete_key = DeleteKey()
-    delete_key.publicKey = public_key
-    action = Action()
-    action.enum = "deleteKey"
-    action.deleteKey = delete_key
-    return action
+    return Action(DeleteAccount(beneficiary_id))
+
+
+def create_full_access_key_action(pk: bytes) -> 'Action':
+    access_key = AccessKey(AccessKeyPermission(FullAccessPermission()))
+    return Action(AddKey(PublicKey(pk), access_key))
+
+
+def create_function_call_access_key_action(
+        pk: bytes,
+        receiver_id: str,
+        method_names: Optional[List[str]] = None,
+        allowance: Optional[int] = None
+) -> 'Action':
+    """Add a key allowed only to call method_names (any method if empty) of receiver_id, spending at most allowance."""
+    permission = AccessKeyPermission(FunctionCallPermission(receiver_id, method_names, allowance))
+    return Action(AddKey(PublicKey(pk), AccessKey(permission)))
+
+
+def create_delete_access_key_action(pk: bytes) -> 'Action':
+    return Action(DeleteKey(PublicKey(pk)))
 
 
 def create_transfer_action(amount: int) -> 'Action':
-    transfer = Transfer()
-    transfer.deposit = amount
-    action = Action()
-    action.enum = "transfer"
-    action.transfer = transfer
-    return action
+    return Action(Transfer(amount))
 
 
 # TODO: deprecate usage of create_payment_action.
 create_payment_action = create_transfer_action
 
 
-def create_staking_action(amount: int, pk: str) -> 'Action':
-    stake = Stake()
-    stake.stake = amount
-    stake.publicKey = PublicKey()
-    stake.publicKey.keyType = 0
-    stake.publicKey.data = pk
-    action = Action()
-    action.enum = "stake"
-    action.stake = stake
-    return action
+def create_staking_action(amount: int, pk: bytes) -> 'Action':
+    return Action(Stake(amount, PublicKey(pk)))
 
 
-def create_deploy_contract_action(code: bytes) -> 'Action':
-    deploy_contract = DeployContract()
-    deploy_contract.code = code
-    action = Action()
-    action.enum = "deployContract"
-    action.deployContract = deploy_contract
-    return action
+def create_deploy_contract_action(code: Union[bytes, bytearray, memoryview, mmap.mmap]) -> 'Action':
+    return Action(DeployContract(code))
 
 
 def create_function_call_action(method_name: str, args: bytes, gas: int, deposit: int) -> 'Action':
-    function_call = FunctionCall()
-    function_call.methodName = method_name
-    function_call.args = args
-    function_call.gas = gas
-    function_call.deposit = deposit
-    action = Action()
-    action.enum = "functionCall"
-    action.functionCall = function_call
-    return action
+    return Action(FunctionCall(method_name, args, gas, deposit))
 
 
 def sign_create_account_tx(
@@ -11,7 +11,13 @@ META_DATA = dict(
 
     packages=find_packages(),
 
-    install_requires=["requests", "base58", "pynacl"]
+    python_requires=">=3.7",
+
+    install_requires=["requests", "base58", "pynacl"],
+
+    extras_require={
+        "async": ["aiohttp"],
+    }
 )
 
 if __name__ == "__main__":
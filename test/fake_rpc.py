@@ -0,0 +1,122 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class RpcError(Exception):
+    """Raised by handlers to reply with the given JSON-RPC error object."""
+
+
+def query(params):
+    if params['request_type'] == "view_access_key":
+        return {'nonce': 7, 'permission': "FullAccess"}
+    if params['request_type'] == "call_function":
+        return {'result': list(b'{"value": 1}'), 'logs': []}
+    return {'account_id': params['account_id'], 'amount': "1"}
+
+
+def broadcast_tx_commit(params):
+    return {
+        'status': {'SuccessValue': ""},
+        'transaction_outcome': {'outcome': {'logs': []}},
+        'receipts_outcome': [],
+    }
+
+
+class FakeRpcServer(object):
+    """Minimal in-process JSON-RPC node for offline tests.
+
+    handlers maps a JSON-RPC method name to a callable taking params and
+    returning the result; raising an exception produces a JSON-RPC error.
+    status is the /status response, or a callable returning it."""
+
+    def __init__(self, handlers=None, status=None, delay=0.0):
+        self.handlers = handlers or {}
+        # Seconds to wait before answering, and HTTP status to fail requests with, if any: the next fail_count
+        # requests if set, otherwise all of them, with fail_headers.
+        self.delay = delay
+        self.fail_status = None
+        self.fail_count = None
+        self.fail_headers = {}
+        self.status = status or {'chain_id': "fake", 'sync_info': {'latest_block_hash': "1" * 32}}
+        self.requests = []
+        self.status_requests = 0
+        self.connections = set()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately, Nagle's algorithm would delay the body.
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, body):
+                if server.delay:
+                    time.sleep(server.delay)
+                if server.should_fail():
+                    self.send_response(server.fail_status)
+                    for name, value in server.fail_headers.items():
+                        self.send_header(name, value)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                data = json.dumps(body).encode('utf8')
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                server.connections.add(self.client_address)
+                server.status_requests += 1
+                self._reply(server.status() if callable(server.status) else server.status)
+
+            def do_POST(self):
+                server.connections.add(self.client_address)
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                server.requests.append(body)
+                if isinstance(body, list):
+                    self._reply([server.dispatch(item) for item in body])
+                else:
+                    self._reply(server.dispatch(body))
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def should_fail(self):
+        with self._lock:
+            if self.fail_status is None or self.fail_count == 0:
+                return False
+            if self.fail_count is not None:
+                self.fail_count -= 1
+            return True
+
+    def dispatch(self, request):
+        try:
+            handler = self.handlers.get(request['method'])
+            if handler is None:
+                raise RpcError({'name': "REQUEST_VALIDATION_ERROR", 'cause': {'name': "METHOD_NOT_FOUND"}})
+            result = handler(request['params'])
+        except RpcError as e:
+            return {'jsonrpc': "2.0", 'id': request['id'], 'error': e.args[0]}
+        except Exception as e:
+            return {'jsonrpc': "2.0", 'id': request['id'], 'error': {'name': type(e).__name__, 'message': str(e)}}
+        return {'jsonrpc': "2.0", 'id': request['id'], 'result': result}
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:%d" % self._httpd.server_address[1]
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1,79 @@
+import asyncio
+import base64
+import unittest
+
+import near_api
+from near_api.async_account import AsyncAccount
+from near_api.async_providers import AsyncJsonProvider
+from near_api.nonce import AsyncNonceManager
+from fake_rpc import FakeRpcServer, RpcError, query, broadcast_tx_commit
+
+
+class AsyncProviderTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeRpcServer({'query': query, 'broadcast_tx_commit': broadcast_tx_commit})
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+
+    def test_concurrent_calls(self):
+        async def run():
+            async with AsyncJsonProvider(self.server.url, pool_size=4, max_concurrency=8) as provider:
+                results = await asyncio.gather(*[provider.get_account("a%d.near" % i) for i in range(50)])
+                batch = await provider.get_accounts(["x.near", "y.near"])
+                status = await provider.get_status()
+            return results, batch, status
+
+        results, batch, status = asyncio.run(run())
+        self.assertEqual([r['account_id'] for r in results], ["a%d.near" % i for i in range(50)])
+        self.assertEqual([r['account_id'] for r in batch], ["x.near", "y.near"])
+        self.assertEqual(status['chain_id'], "fake")
+        self.assertLessEqual(len(self.server.connections), 4)
+
+    def test_account(self):
+        signer = near_api.signer.Signer("test.near", near_api.signer.KeyPair(bytes(range(32))))
+
+        async def run():
+            async with AsyncJsonProvider(self.server.url) as provider:
+                account = await AsyncAccount.create(provider, signer)
+                await account.send_money("b.near", 1)
+                view = await account.view_function("c.near", "get", {})
+                return account, view
+
+        account, view = asyncio.run(run())
+        self.assertEqual(account.access_key['nonce'], 8)
+        self.assertEqual(view['result'], {'value': 1})
+
+    def test_account_retries_invalid_nonce(self):
+        sent = []
+
+        def broadcast(params):
+            tx = near_api.transactions.deserialize_signed_transaction(base64.b64decode(params[0]))
+            sent.append(tx.transaction.nonce)
+            if tx.transaction.nonce <= 20:
+                raise RpcError({
+                    'name': "HANDLER_ERROR",
+                    'data': {'TxExecutionError': {'InvalidTxError': {
+                        'InvalidNonce': {'tx_nonce': tx.transaction.nonce, 'ak_nonce': 20}}}},
+                })
+            return broadcast_tx_commit(params)
+
+        self.server.handlers['broadcast_tx_commit'] = broadcast
+        signer = near_api.signer.Signer("test.near", near_api.signer.KeyPair(bytes(range(32))))
+
+        async def run():
+            async with AsyncJsonProvider(self.server.url) as provider:
+                manager = AsyncNonceManager(provider)
+                account = await AsyncAccount.create(provider, signer, nonce_manager=manager)
+                await account.send_money("b.near", 1)
+                await asyncio.gather(*[account.send_money("b.near", 1) for _ in range(3)])
+                return account, manager
+
+        account, manager = asyncio.run(run())
+        self.assertEqual(sent[:2], [8, 21])
+        self.assertEqual(sorted(sent[2:]), [22, 23, 24])
+        self.assertEqual(account.access_key['nonce'], 24)
+        self.assertEqual(manager.current_nonce("test.near", signer.key_pair.encoded_public_key()), 24)
+
+
+if __name__ == '__main__':
+    unittest.main()
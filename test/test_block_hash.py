@@ -0,0 +1,49 @@
+import time
+import unittest
+
+import near_api
+from near_api.block_hash import BlockHashCache
+from fake_rpc import FakeRpcServer, query, broadcast_tx_commit
+
+
+class BlockHashCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeRpcServer({'query': query, 'broadcast_tx_commit': broadcast_tx_commit})
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.provider = near_api.providers.JsonProvider(self.server.url)
+        self.addCleanup(self.provider.close)
+
+    def test_cached(self):
+        cache = BlockHashCache(self.provider)
+        self.assertEqual(cache.get(), bytes(32))
+        self.assertEqual(cache.get(), bytes(32))
+        self.assertEqual(self.server.status_requests, 1)
+        cache.invalidate()
+        cache.get()
+        self.assertEqual(self.server.status_requests, 2)
+
+    def test_max_age(self):
+        cache = BlockHashCache(self.provider, max_age=0.05)
+        cache.get()
+        time.sleep(0.1)
+        cache.get()
+        self.assertEqual(self.server.status_requests, 2)
+
+    def test_background_refresh(self):
+        with BlockHashCache(self.provider, refresh_interval=0.05) as cache:
+            time.sleep(0.3)
+            self.assertEqual(cache.get(), bytes(32))
+        self.assertGreaterEqual(self.server.status_requests, 2)
+
+    def test_account_uses_cache(self):
+        signer = near_api.signer.Signer("test.near", near_api.signer.KeyPair(bytes(range(32))))
+        account = near_api.account.Account(self.provider, signer)
+        for _ in range(3):
+            account.send_money("b.near", 1)
+        self.assertEqual(self.server.status_requests, 1)
+        self.assertEqual(account.access_key['nonce'], 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
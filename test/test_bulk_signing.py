@@ -0,0 +1,30 @@
+import hashlib
+import unittest
+
+import near_api
+from near_api import transactions
+from near_api.bulk_signing import sign_transactions
+
+
+class BulkSigningTest(unittest.TestCase):
+    def setUp(self):
+        self.signer = near_api.signer.Signer("signer.near", near_api.signer.KeyPair(bytes(range(32))))
+        self.block_hash = hashlib.sha256(b"block").digest()
+        self.jobs = [("r%d.near" % i, [transactions.create_transfer_action(i)], 100 + i) for i in range(50)]
+        self.expected = [
+            transactions.sign_and_hash_transaction(receiver_id, nonce, actions, self.block_hash, self.signer)
+            for receiver_id, actions, nonce in self.jobs
+        ]
+
+    def test_processes(self):
+        signed = list(sign_transactions(self.signer, iter(self.jobs), self.block_hash, max_workers=2, chunk_size=7))
+        self.assertEqual(signed, self.expected)
+
+    def test_threads(self):
+        signed = list(sign_transactions(
+            self.signer, self.jobs, self.block_hash, use_processes=False, max_workers=3, chunk_size=4))
+        self.assertEqual(signed, self.expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import time
+import unittest
+
+import near_api
+from near_api.cache import RpcCache, MISSING
+from fake_rpc import FakeRpcServer, query
+
+
+class RpcCacheTest(unittest.TestCase):
+    def test_ttl(self):
+        cache = RpcCache(final_ttl=1.0)
+        self.assertEqual(cache.ttl("query", {'block_id': 5, 'account_id': "a"}), float('inf'))
+        self.assertEqual(cache.ttl("query", {'finality': "final"}), 1.0)
+        self.assertEqual(cache.ttl("block", ["hash"]), float('inf'))
+        self.assertIsNone(cache.ttl("broadcast_tx_commit", ["tx"]))
+        self.assertIsNone(cache.ttl("EXPERIMENTAL_changes_in_block", {'finality': "final"}))
+        self.assertIsNone(cache.ttl("query", {'request_type': "view_access_key", 'finality': "optimistic"}))
+        self.assertIsNone(cache.ttl("query", {'request_type': "view_access_key_list", 'finality': "final"}))
+        self.assertEqual(cache.ttl("query", {'request_type': "view_access_key", 'block_id': 5}), float('inf'))
+        self.assertEqual(cache.ttl("query", {'request_type': "view_access_key_list", 'block_id': "h"}), float('inf'))
+        cache = RpcCache(block_time=2.0)
+        self.assertEqual(cache.ttl("query", {'finality': "final"}), 2.0)
+        self.assertEqual(cache.ttl("query", {'finality': "optimistic"}), 1.0)
+
+    def test_expiry_and_copies(self):
+        cache = RpcCache(optimistic_ttl=0.05)
+        params = {'request_type': "view_account", 'account_id': "a", 'finality': "optimistic"}
+        result = {'amount': "1"}
+        cache.put("query", params, result)
+        result['amount'] = "3"
+        cache.get("query", params)['amount'] = "2"
+        self.assertEqual(cache.get("query", params), {'amount': "1"})
+        time.sleep(0.1)
+        self.assertIs(cache.get("query", params), MISSING)
+        self.assertEqual(cache.stats()['hits'], 2)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_lru_eviction(self):
+        cache = RpcCache(max_entries=2)
+        for block in ["a", "b"]:
+            cache.put("block", [block], {'header': block})
+        cache.get("block", ["a"])
+        cache.put("block", ["c"], {'header': "c"})
+        self.assertIs(cache.get("block", ["b"]), MISSING)
+        self.assertEqual(cache.get("block", ["a"]), {'header': "a"})
+        self.assertEqual(cache.stats()['evictions'], 1)
+        cache = RpcCache(max_bytes=40)
+        cache.put("block", ["a"], {'header': "x" * 20})
+        cache.put("block", ["b"], {'header': "y" * 20})
+        self.assertEqual(cache.stats()['entries'], 1)
+        cache.put("block", ["c"], {'header': "c"}, 40)
+        self.assertEqual(cache.stats(), dict(cache.stats(), entries=1, bytes=40))
+
+
+class CachedProviderTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeRpcServer({'query': query, 'block': lambda params: {'header': {'hash': params[0]}}})
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.provider = near_api.providers.JsonProvider(self.server.url, cache=RpcCache())
+        self.addCleanup(self.provider.close)
+
+    def test_read_through(self):
+        for _ in range(3):
+            self.assertEqual(self.provider.get_account("a.near", "final")['account_id'], "a.near")
+            self.provider.get_block("h1")
+        self.assertEqual(len(self.server.requests), 2)
+        blocks = self.provider.get_blocks(["h1", "h2", "h3"])
+        self.assertEqual([block['header']['hash'] for block in blocks], ["h1", "h2", "h3"])
+        self.assertEqual(len(self.server.requests[-1]), 2)
+        self.assertEqual(self.provider.cache.stats()['hits'], 5)
+
+    def test_access_key_not_cached(self):
+        for _ in range(2):
+            self.assertEqual(self.provider.get_access_key("a.near", "ed25519:pk", "optimistic")['nonce'], 7)
+        self.assertEqual(len(self.server.requests), 2)
+        params = {'request_type': "view_access_key", 'account_id': "a.near", 'public_key': "ed25519:pk", 'block_id': 5}
+        for _ in range(2):
+            self.assertEqual(self.provider.query(params)['nonce'], 7)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_response_size(self):
+        self.provider.get_account("a.near", "final")
+        self.provider.get_blocks(["h1", "h2"])
+        response_sizes = self.provider.cache.stats()['bytes']
+        self.assertGreater(response_sizes, 0)
+        # Entries are accounted the size of the responses, larger than their results alone.
+        results = [self.provider.get_account("a.near", "final")] + self.provider.get_blocks(["h1", "h2"])
+        self.assertGreater(response_sizes, sum(len(near_api.codec.dumps(result)) for result in results))
+
+
+if __name__ == '__main__':
+    unittest.main()
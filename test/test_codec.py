@@ -0,0 +1,49 @@
+import unittest
+
+from near_api import codec
+
+
+class CodecTest(unittest.TestCase):
+    def setUp(self):
+        previous = codec.get_codec()
+        self.addCleanup(codec.set_codec, previous)
+
+    def test_codecs_agree(self):
+        value = {'b': [1, "é", None, True], 'a': {'amount': str(10 ** 30)}}
+        codecs = [codec.JsonCodec()]
+        if codec.orjson is not None:
+            codecs.append(codec.OrjsonCodec())
+        if codec.ujson is not None:
+            codecs.append(codec.UjsonCodec())
+        for json_codec in codecs:
+            with self.subTest(json_codec.name):
+                self.assertEqual(json_codec.loads(json_codec.dumps(value)), value)
+                self.assertEqual(json_codec.loads(json_codec.dumps(value, sort_keys=True).decode('utf8')), value)
+                reordered = dict(reversed(value.items()))
+                self.assertEqual(json_codec.dumps(value, sort_keys=True), json_codec.dumps(reordered, sort_keys=True))
+                self.assertEqual(codec.JsonCodec().loads(json_codec.dumps({'a': 2 ** 100})), {'a': 2 ** 100})
+
+    def test_big_ints(self):
+        value = {'balance': 2 ** 128 - 1, 'debts': [-2 ** 63 - 1, 2 ** 64], 'amount': str(10 ** 30)}
+        for name in ["orjson", "ujson", "json"]:
+            try:
+                codec.set_codec(name)
+            except ImportError:
+                continue
+            with self.subTest(name):
+                for data in [codec.dumps(value), codec.dumps(value).decode('utf8')]:
+                    decoded = codec.loads(data)
+                    self.assertEqual(decoded, value)
+                    self.assertIsInstance(decoded['balance'], int)
+                self.assertEqual(codec.loads(b"340282366920938463463374607431768211455"), 2 ** 128 - 1)
+
+    def test_set_codec(self):
+        codec.set_codec("json")
+        self.assertEqual(codec.get_codec().name, "json")
+        self.assertEqual(codec.dumps({'a': 1}), b'{"a": 1}')
+        with self.assertRaises(ValueError):
+            codec.set_codec("yaml")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import itertools
+import threading
+import time
+import unittest
+
+import near_api
+from fake_rpc import FakeRpcServer, RpcError
+
+
+class FakeChain(object):
+    def __init__(self, head, missing=(), earliest=1):
+        self.head = head
+        self.missing = set(missing)
+        self.earliest = earliest
+
+    def status(self):
+        return {'sync_info': {'earliest_block_height': self.earliest, 'latest_block_height': self.head}}
+
+    def block(self, params):
+        if isinstance(params, dict):
+            height = self.head
+        else:
+            height = params[0]
+        if height > self.head or height < self.earliest or height in self.missing:
+            raise RpcError({'name': "HANDLER_ERROR", 'cause': {'name': "UNKNOWN_BLOCK"}})
+        return {
+            'header': {'height': height},
+            'chunks': [
+                {'chunk_hash': "%d-0" % height, 'height_included': height},
+                {'chunk_hash': "%d-1" % (height - 1), 'height_included': height - 1},
+            ],
+        }
+
+    @staticmethod
+    def chunk(params):
+        return {'chunk_hash': params[0]}
+
+
+class IterBlocksTest(unittest.TestCase):
+    def test_range(self):
+        chain = FakeChain(head=100, missing=[5])
+        with FakeRpcServer({'block': chain.block, 'chunk': chain.chunk}, chain.status, delay=0.01) as server:
+            provider = near_api.providers.JsonProvider(server.url)
+            blocks = list(provider.iter_blocks(1, 40, prefetch=8))
+            self.assertEqual(server.status_requests, 1)
+        self.assertEqual([block['header']['height'] for block, _ in blocks], [h for h in range(1, 40) if h != 5])
+        block, chunks = blocks[0]
+        self.assertEqual(chunks, [{'chunk_hash': "1-0"}])
+
+    def test_prefetch_heights(self):
+        chain = FakeChain(head=100)
+        with FakeRpcServer({'block': chain.block}, chain.status) as server:
+            provider = near_api.providers.JsonProvider(server.url)
+            self.assertEqual(provider.head_height(), 100)
+            fetched = provider.prefetch_heights(lambda height, timeout: height if height % 2 else None, 1, 8)
+            self.assertEqual(list(fetched), [1, 3, 5, 7])
+
+    def test_garbage_collected_heights(self):
+        chain = FakeChain(head=100, earliest=10)
+        with FakeRpcServer({'block': chain.block, 'chunk': chain.chunk}, chain.status) as server:
+            provider = near_api.providers.JsonProvider(server.url)
+            with self.assertRaisesRegex(near_api.providers.JsonProviderError, "GARBAGE_COLLECTED_BLOCK"):
+                list(provider.iter_blocks(5, 20))
+            self.assertEqual(len(server.requests), 0)
+
+    def test_follow(self):
+        chain = FakeChain(head=3)
+        with FakeRpcServer({'block': chain.block, 'chunk': chain.chunk}, chain.status) as server:
+            provider = near_api.providers.JsonProvider(server.url)
+
+            def produce():
+                for _ in range(3):
+                    time.sleep(0.1)
+                    chain.head += 1
+
+            producer = threading.Thread(target=produce)
+            producer.start()
+            blocks = provider.iter_blocks(2, min_poll_interval=0.02, max_poll_interval=0.05)
+            heights = [block['header']['height'] for block, _ in itertools.islice(blocks, 5)]
+            blocks.close()
+            producer.join()
+        self.assertEqual(heights, [2, 3, 4, 5, 6])
+
+
+if __name__ == '__main__':
+    unittest.main()
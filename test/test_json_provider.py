@@ -0,0 +1,66 @@
+import unittest
+
+import near_api
+from fake_rpc import FakeRpcServer
+
+
+class JsonProviderPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeRpcServer({'block': lambda params: {'header': {'hash': params[0]}}})
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+
+    def test_connection_reused(self):
+        with near_api.providers.JsonProvider(self.server.url) as provider:
+            for i in range(5):
+                self.assertEqual(provider.get_block(str(i))['header']['hash'], str(i))
+            provider.get_status()
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_usable_after_close(self):
+        provider = near_api.providers.JsonProvider(self.server.url)
+        provider.get_block("a")
+        provider.close()
+        self.assertEqual(provider.get_block("b")['header']['hash'], "b")
+        provider.close()
+
+    def test_error(self):
+        with near_api.providers.JsonProvider(self.server.url) as provider:
+            with self.assertRaises(near_api.providers.JsonProviderError):
+                provider.get_chunk("x")
+
+
+class JsonProviderBatchTest(unittest.TestCase):
+    def setUp(self):
+        def view_account(params):
+            if params['account_id'] == "missing.near":
+                raise ValueError("UNKNOWN_ACCOUNT")
+            return {'account_id': params['account_id']}
+
+        self.server = FakeRpcServer({'query': view_account})
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.provider = near_api.providers.JsonProvider(self.server.url)
+        self.addCleanup(self.provider.close)
+
+    def test_batch_order_and_split(self):
+        account_ids = ["a%d.near" % i for i in range(7)]
+        self.provider.json_rpc_batch([], max_batch_size=3)
+        results = self.provider.json_rpc_batch(
+            [("query", self.provider._account_query(account_id, "final")) for account_id in account_ids],
+            max_batch_size=3)
+        self.assertEqual([r['account_id'] for r in results], account_ids)
+        self.assertEqual([len(request) for request in self.server.requests], [3, 3, 1])
+        ids = [item['id'] for request in self.server.requests for item in request]
+        self.assertEqual(len(set(ids)), len(ids))
+
+    def test_batch_errors(self):
+        with self.assertRaises(near_api.providers.JsonProviderError):
+            self.provider.get_accounts(["a.near", "missing.near"])
+        results = self.provider.get_accounts(["a.near", "missing.near"], raise_on_error=False)
+        self.assertEqual(results[0]['account_id'], "a.near")
+        self.assertIsInstance(results[1], near_api.providers.JsonProviderError)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import base64
+import threading
+import unittest
+
+import near_api
+from near_api.key_pool import KeyPool, KeyPoolStrategies, MultiKeyAccount
+from fake_rpc import FakeRpcServer, query, broadcast_tx_commit
+
+
+class KeyPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.signers = [
+            near_api.signer.Signer("a.near", near_api.signer.KeyPair(bytes([i] * 32))) for i in range(3)
+        ]
+
+    def test_round_robin(self):
+        pool = KeyPool(self.signers, KeyPoolStrategies.ROUND_ROBIN)
+        picked = [pool.acquire() for _ in range(6)]
+        self.assertEqual(picked, self.signers * 2)
+
+    def test_least_loaded(self):
+        pool = KeyPool(self.signers)
+        first = pool.acquire()
+        second = pool.acquire()
+        self.assertNotEqual(first, second)
+        pool.release(first)
+        self.assertNotEqual(pool.acquire(), second)
+        self.assertEqual(sum(pool.in_flight()), 2)
+
+    def test_permissions(self):
+        function_call = {'FunctionCall': {'receiver_id': "c.near", 'method_names': ["go"], 'allowance': None}}
+        pool = KeyPool(self.signers[:1])
+        pool.add(self.signers[1], function_call)
+        call = [near_api.transactions.create_function_call_action("go", b"{}", 10, 0)]
+        self.assertEqual({pool.acquire("c.near", call) for _ in range(4)}, set(self.signers[:2]))
+        for receiver_id, actions in [
+            ("c.near", [near_api.transactions.create_transfer_action(1)]),
+            ("c.near", [near_api.transactions.create_function_call_action("go", b"{}", 10, 1)]),
+            ("c.near", [near_api.transactions.create_function_call_action("other", b"{}", 10, 0)]),
+            ("d.near", call),
+            ("c.near", call * 2),
+        ]:
+            self.assertEqual({pool.acquire(receiver_id, actions) for _ in range(4)}, {self.signers[0]})
+        with self.assertRaises(ValueError):
+            KeyPool([self.signers[1]], permissions=[function_call]).acquire(
+                "c.near", [near_api.transactions.create_transfer_action(1)])
+
+
+class MultiKeyAccountTest(unittest.TestCase):
+    def setUp(self):
+        self.sent = []
+        self.txs = []
+        self.lock = threading.Lock()
+
+        def broadcast(params):
+            tx = near_api.transactions.deserialize_signed_transaction(base64.b64decode(params[0])).transaction
+            with self.lock:
+                self.sent.append((tx.publicKey.data, tx.nonce, [action.enum for action in tx.actions]))
+                self.txs.append(tx)
+            return broadcast_tx_commit(params)
+
+        self.primary = near_api.signer.Signer("a.near", near_api.signer.KeyPair(bytes(32)))
+
+        def query_keys(params):
+            # Keys other than the primary one are function call keys for the account's contract.
+            if params['request_type'] == "view_access_key" and \
+                    params['public_key'] != self.primary.key_pair.encoded_public_key():
+                permission = {'FunctionCall': {'receiver_id': "a.near", 'method_names': [], 'allowance': None}}
+                return {'nonce': 7, 'permission': permission}
+            return query(params)
+
+        self.server = FakeRpcServer({'query': query_keys, 'broadcast_tx_commit': broadcast})
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.provider = near_api.providers.JsonProvider(self.server.url)
+        self.addCleanup(self.provider.close)
+
+    def test_parallel_lanes(self):
+        signer = self.primary
+        account = MultiKeyAccount(self.provider, signer)
+        key_pairs = account.add_keys(3)
+        self.assertEqual(self.sent[0][2], ["addKey"] * 3)
+        self.assertEqual(self.txs[0].actions[0].addKey.accessKey.permission.functionCall.receiverId, "a.near")
+        self.assertEqual(len(account.key_pool), 4)
+
+        threads = [threading.Thread(target=account.function_call, args=("a.near", "go", {})) for _ in range(20)]
+        threads += [threading.Thread(target=account.send_money, args=("b.near", 1)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        sent = self.sent[1:]
+        self.assertEqual(len(sent), 25)
+        used_keys = {public_key for public_key, _, actions in sent if actions == ["functionCall"]}
+        self.assertTrue(used_keys <= {signer.public_key} | {key_pair.public_key for key_pair in key_pairs})
+        self.assertEqual({public_key for public_key, _, actions in sent if actions == ["transfer"]},
+                         {signer.public_key})
+        self.assertEqual(len({(public_key, nonce) for public_key, nonce, _ in sent}), 25)
+
+
+if __name__ == '__main__':
+    unittest.main()
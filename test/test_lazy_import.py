@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+import unittest
+
+import near_api
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(near_api.__file__)))
+
+
+def loaded_modules(code):
+    """Names of the modules loaded by a fresh interpreter running code."""
+    output = subprocess.check_output(
+        [sys.executable, "-c", code + "\nimport sys\nprint(' '.join(sys.modules))"],
+        env=dict(os.environ, PYTHONPATH=ROOT))
+    return set(output.decode().split())
+
+
+class LazyImportTest(unittest.TestCase):
+    def test_import_loads_no_dependency(self):
+        modules = loaded_modules("import near_api")
+        self.assertFalse(modules & {"requests", "nacl", "base58", "logging", "near_api.providers"})
+
+    def test_serializer_alone(self):
+        modules = loaded_modules("import near_api.transactions")
+        self.assertIn("near_api.transactions", modules)
+        self.assertFalse(modules & {"requests", "nacl", "near_api.providers"})
+
+    def test_sync_block_hash_cache(self):
+        self.assertNotIn("asyncio", loaded_modules("import near_api.block_hash"))
+
+    def test_sync_account(self):
+        self.assertNotIn("asyncio", loaded_modules("import near_api.account"))
+
+    def test_star_import(self):
+        modules = loaded_modules("from near_api import *\nassert providers.JsonProvider and log.name")
+        self.assertIn("near_api.account", modules)
+        self.assertFalse(modules & {"aiohttp", "asyncio", "near_api.async_providers", "near_api.async_account"})
+
+    def test_attribute_access(self):
+        self.assertIs(near_api.providers.JsonProvider, __import__("near_api.providers").providers.JsonProvider)
+        self.assertIn("account", dir(near_api))
+        self.assertEqual(near_api.log.name, "near_api")
+        with self.assertRaises(AttributeError):
+            near_api.missing
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+import near_api
+from near_api import metrics, transactions
+from near_api.metrics import MetricsRecorder
+from fake_rpc import FakeRpcServer, RpcError, query
+
+
+def unknown_block(params):
+    raise RpcError({'name': "HANDLER_ERROR", 'cause': {'name': "UNKNOWN_BLOCK"}})
+
+
+class MetricsTest(unittest.TestCase):
+    def setUp(self):
+        self.recorder = MetricsRecorder()
+        metrics.add_observer(self.recorder)
+        self.addCleanup(metrics.remove_observer, self.recorder)
+
+    def test_rpc_metrics(self):
+        with FakeRpcServer({'query': query, 'block': unknown_block}) as server:
+            provider = near_api.providers.JsonProvider(server.url)
+            provider.get_account("a.near")
+            provider.get_accounts(["a.near", "b.near"])
+            with self.assertRaises(near_api.providers.JsonProviderError):
+                provider.get_block(5)
+            provider.json_rpc_batch([("query", {'request_type': "view_account", 'account_id': "a.near"}),
+                                     ("block", [5])], raise_on_error=False)
+            provider.get_status()
+            server.fail_status = 503
+            with self.assertRaises(near_api.providers.requests.HTTPError):
+                provider.get_account("a.near")
+            with self.assertRaises(near_api.providers.requests.HTTPError):
+                provider.get_status()
+        stats = self.recorder.stats()
+        self.assertEqual(stats['requests'], {'query': 3, 'block': 1, 'batch': 1, 'status': 2})
+        self.assertEqual(stats['calls'], {'query': 4, 'block': 1, 'batch': 2, 'status': 2})
+        self.assertEqual(stats['rpc_errors'], {('block', "UNKNOWN_BLOCK"): 2})
+        self.assertEqual(stats['failures'], {('query', "HTTP_503"): 1, ('status', "HTTP_503"): 1})
+        self.assertGreater(stats['response_bytes_sum']['query'], 0)
+
+        text = self.recorder.prometheus_text()
+        self.assertIn('near_rpc_request_duration_seconds_count{method="query"} 3', text)
+        self.assertIn('near_rpc_request_duration_seconds_bucket{method="query",le="+Inf"} 3', text)
+        self.assertIn('near_rpc_errors_total{method="block",kind="UNKNOWN_BLOCK"} 2', text)
+        self.assertIn("# TYPE near_rpc_calls_total counter", text)
+
+    def test_label_escaping(self):
+        self.recorder.on_rpc_error("query", 'a\\b"c\nd')
+        self.assertIn('near_rpc_errors_total{method="query",kind="a\\\\b\\"c\\nd"} 1',
+                      self.recorder.prometheus_text())
+
+    def test_signing_timings(self):
+        signer = near_api.signer.Signer("test.near", near_api.signer.KeyPair(bytes(range(32))))
+        transactions.sign_and_serialize_transaction(
+            "r.near", 1, [transactions.create_transfer_action(1)], bytes(32), signer)
+        self.assertEqual(set(self.recorder.stats()['timings_sum']), {"serialize", "hash", "sign"})
+        metrics.remove_observer(self.recorder)
+        transactions.sign_and_serialize_transaction(
+            "r.near", 1, [transactions.create_transfer_action(1)], bytes(32), signer)
+        self.assertEqual(self.recorder.prometheus_text().count('near_operation_duration_seconds_count'), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
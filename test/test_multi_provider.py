@@ -0,0 +1,96 @@
+import socket
+import time
+import unittest
+
+import requests
+
+import near_api
+from near_api.multi_provider import MultiJsonProvider
+from fake_rpc import FakeRpcServer, query
+
+
+def block(params):
+    return {'header': {'hash': params[0]}}
+
+
+class MultiJsonProviderTest(unittest.TestCase):
+    def setUp(self):
+        self.servers = [FakeRpcServer({'query': query, 'block': block}) for _ in range(2)]
+        for server in self.servers:
+            server.__enter__()
+            self.addCleanup(server.__exit__)
+
+    def test_prefers_fast_endpoint(self):
+        self.servers[0].delay = 0.05
+        with MultiJsonProvider([server.url for server in self.servers]) as provider:
+            for i in range(20):
+                provider.get_block(str(i))
+        self.assertGreater(len(self.servers[1].requests), len(self.servers[0].requests))
+
+    def test_failover_eject_and_probe(self):
+        self.servers[0].fail_status = 503
+        with MultiJsonProvider([server.url for server in self.servers], max_failures=2, eject_time=0.2) as provider:
+            for i in range(5):
+                self.assertEqual(provider.get_block(str(i))['header']['hash'], str(i))
+            self.assertFalse(provider.endpoints[0].healthy)
+            self.servers[0].fail_status = None
+            time.sleep(0.5)
+            self.assertTrue(provider.endpoints[0].healthy)
+            self.assertTrue(all(stats['healthy'] for stats in provider.endpoint_stats()))
+
+    def test_application_errors_are_not_failover(self):
+        with MultiJsonProvider([server.url for server in self.servers]) as provider:
+            with self.assertRaises(near_api.providers.JsonProviderError):
+                provider.get_chunk("x")
+            self.assertEqual(sum(len(server.requests) for server in self.servers), 1)
+
+    def test_endpoint_sessions(self):
+        with MultiJsonProvider([server.url for server in self.servers]) as provider:
+            provider.get_status()
+            self.assertIn(provider.session, [endpoint.provider.session for endpoint in provider.endpoints])
+            self.assertIn(provider.rpc_addr(), provider.rpc_addrs())
+            self.assertIsNone(provider._session)
+
+    def test_hedging(self):
+        self.servers[0].delay = 1.0
+        with MultiJsonProvider([server.url for server in self.servers], hedge=True, hedge_delay=0.05) as provider:
+            start = time.monotonic()
+            self.assertEqual(provider.get_block("a")['header']['hash'], "a")
+            self.assertLess(time.monotonic() - start, 0.5)
+            self.assertEqual(len(self.servers[1].requests), 1)
+
+    def test_broadcast_is_not_hedged(self):
+        self.servers[0].delay = 0.3
+        self.servers[0].handlers['broadcast_tx_async'] = lambda params: "hash"
+        with MultiJsonProvider([server.url for server in self.servers], hedge=True, hedge_delay=0.05) as provider:
+            self.assertEqual(provider.send_tx(b"tx"), "hash")
+            self.assertEqual(len(self.servers[1].requests), 0)
+
+    def test_broadcast_failover(self):
+        self.servers[0].delay = 0.5
+        for server in self.servers:
+            server.handlers['broadcast_tx_async'] = lambda params: "hash"
+        with MultiJsonProvider([server.url for server in self.servers]) as provider:
+            provider.endpoints[1].latency = 1.0
+            with self.assertRaises(requests.Timeout):
+                provider.send_tx(b"tx", timeout=0.1)
+            self.assertEqual(len(self.servers[1].requests), 0)
+            self.assertEqual(provider.get_block("a")['header']['hash'], "a")
+        # Nothing listens on a port just released, so connecting to it is refused.
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            closed_url = "http://127.0.0.1:%d" % sock.getsockname()[1]
+        with MultiJsonProvider([closed_url, self.servers[1].url]) as provider:
+            provider.endpoints[1].latency = 1.0
+            self.assertEqual(provider.send_tx(b"tx"), "hash")
+            self.assertEqual(provider.rpc_addrs(), [closed_url, self.servers[1].url])
+
+    def test_account(self):
+        signer = near_api.signer.Signer("test.near", near_api.signer.KeyPair(bytes(range(32))))
+        with MultiJsonProvider([server.url for server in self.servers]) as provider:
+            account = near_api.account.Account(provider, signer)
+            self.assertEqual(account.state['account_id'], "test.near")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import base64
+import threading
+import unittest
+
+import near_api
+from near_api.nonce import NonceManager, invalid_nonce_info
+from near_api.providers import JsonProviderError
+from fake_rpc import FakeRpcServer, RpcError, query, broadcast_tx_commit
+
+
+def invalid_nonce_error(tx_nonce, ak_nonce):
+    return {
+        'name': "HANDLER_ERROR",
+        'data': {'TxExecutionError': {'InvalidTxError': {'InvalidNonce': {'tx_nonce': tx_nonce, 'ak_nonce': ak_nonce}}}},
+    }
+
+
+class NonceManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeRpcServer({'query': query, 'broadcast_tx_commit': broadcast_tx_commit})
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.provider = near_api.providers.JsonProvider(self.server.url)
+        self.addCleanup(self.provider.close)
+
+    def test_concurrent_allocation(self):
+        manager = NonceManager(self.provider)
+        nonces = []
+
+        def allocate():
+            for _ in range(200):
+                nonces.append(manager.next_nonce("a.near", "pk"))
+
+        threads = [threading.Thread(target=allocate) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(nonces), list(range(8, 8 + 1600)))
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_resync(self):
+        manager = NonceManager(self.provider)
+        manager.seed("a.near", "pk", 3)
+        self.assertEqual(manager.next_nonce("a.near", "pk"), 4)
+        self.assertEqual(manager.resync("a.near", "pk"), 7)
+        self.assertEqual(manager.resync("a.near", "pk", 5), 7)
+        self.assertEqual(manager.next_nonce("a.near", "pk"), 8)
+
+    def test_invalid_nonce_info(self):
+        self.assertEqual(invalid_nonce_info(JsonProviderError(invalid_nonce_error(3, 9))),
+                         {'tx_nonce': 3, 'ak_nonce': 9})
+        self.assertIsNone(invalid_nonce_info(JsonProviderError({'name': "HANDLER_ERROR"})))
+
+    def test_account_retries_invalid_nonce(self):
+        sent = []
+
+        def broadcast(params):
+            tx = near_api.transactions.deserialize_signed_transaction(base64.b64decode(params[0]))
+            sent.append(tx.transaction.nonce)
+            if tx.transaction.nonce <= 20:
+                raise RpcError(invalid_nonce_error(tx.transaction.nonce, 20))
+            return broadcast_tx_commit(params)
+
+        self.server.handlers['broadcast_tx_commit'] = broadcast
+        signer = near_api.signer.Signer("test.near", near_api.signer.KeyPair(bytes(range(32))))
+        account = near_api.account.Account(self.provider, signer)
+        account.send_money("b.near", 1)
+        self.assertEqual(sent, [8, 21])
+        self.assertEqual(account.access_key['nonce'], 21)
+
+
+if __name__ == '__main__':
+    unittest.main()
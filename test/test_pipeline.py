@@ -0,0 +1,85 @@
+import base64
+import hashlib
+import threading
+import unittest
+
+import base58
+
+import near_api
+from near_api.pipeline import TxPipeline
+from fake_rpc import FakeRpcServer, RpcError, query, broadcast_tx_commit
+
+
+class TxPipelineTest(unittest.TestCase):
+    def setUp(self):
+        self.submitted = {}
+        self.lock = threading.Lock()
+
+        def broadcast_tx_async(params):
+            signed_tx = near_api.transactions.deserialize_signed_transaction(base64.b64decode(params[0]))
+            tx_bytes = near_api.transactions.tx_serializer.serialize(signed_tx.transaction)
+            tx_hash = base58.b58encode(hashlib.sha256(tx_bytes).digest()).decode('utf8')
+            with self.lock:
+                self.submitted[tx_hash] = signed_tx.transaction
+            return tx_hash
+
+        def tx(params):
+            with self.lock:
+                transaction = self.submitted.get(params[0])
+            if transaction is None:
+                raise RpcError({'name': "HANDLER_ERROR", 'cause': {'name': "UNKNOWN_TRANSACTION"}})
+            if transaction.actions[0].transfer.deposit == 13:
+                return dict(broadcast_tx_commit(params), status={'Failure': {'ActionError': {}}})
+            return broadcast_tx_commit(params)
+
+        self.server = FakeRpcServer({
+            'query': query,
+            'broadcast_tx_async': broadcast_tx_async,
+            'tx': tx,
+        })
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.provider = near_api.providers.JsonProvider(self.server.url)
+        self.addCleanup(self.provider.close)
+        signer = near_api.signer.Signer("test.near", near_api.signer.KeyPair(bytes(range(32))))
+        self.account = near_api.account.Account(self.provider, signer)
+
+    def test_pipelined(self):
+        with TxPipeline(self.account, poll_interval=0.01) as pipeline:
+            futures = [pipeline.send_money("b.near", 100 + i) for i in range(30)]
+            results = [future.result(timeout=5) for future in futures]
+        self.assertEqual(len(results), 30)
+        self.assertEqual(sorted(tx.nonce for tx in self.submitted.values()), list(range(8, 38)))
+        polls = [request for request in self.server.requests if isinstance(request, list)]
+        self.assertLess(len(polls), 30)
+        self.assertEqual(pipeline.pending, 0)
+
+    def test_failure_and_timeout(self):
+        with TxPipeline(self.account, poll_interval=0.01, tx_timeout=0.2) as pipeline:
+            failed = pipeline.send_money("b.near", 13)
+            with self.assertRaises(near_api.account.TransactionError):
+                failed.result(timeout=5)
+            self.server.handlers['broadcast_tx_async'] = lambda params: "lost"
+            lost = pipeline.send_money("b.near", 1)
+            with self.assertRaises(TimeoutError):
+                lost.result(timeout=5)
+
+    def test_rejected(self):
+        def reject(params):
+            raise RpcError({
+                'name': "HANDLER_ERROR",
+                'data': {'TxExecutionError': {'InvalidTxError': {'InvalidNonce': {'tx_nonce': 8, 'ak_nonce': 30}}}},
+            })
+
+        self.server.handlers['broadcast_tx_async'] = reject
+        with TxPipeline(self.account, poll_interval=0.01, tx_timeout=5) as pipeline:
+            rejected = pipeline.function_call("c.near", "go", {'a': 1})
+            with self.assertRaises(near_api.providers.JsonProviderError):
+                rejected.result(timeout=0)
+            self.assertEqual(pipeline.pending, 0)
+        public_key = self.account.signer.key_pair.encoded_public_key()
+        self.assertEqual(self.account.nonce_manager.current_nonce("test.near", public_key), 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import threading
+import time
+import unittest
+
+import near_api
+from near_api.rate_limit import AdaptiveLimiter, RpcLimiter, TokenBucket
+from fake_rpc import FakeRpcServer, query
+
+
+class AdaptiveLimiterTest(unittest.TestCase):
+    def test_increase_and_backoff(self):
+        limiter = AdaptiveLimiter(initial_limit=4, max_limit=8)
+        for _ in range(100):
+            starts = [limiter.acquire() for _ in range(limiter.limit)]
+            for start in starts:
+                limiter.release(start)
+        self.assertEqual(limiter.limit, 8)
+        starts = [limiter.acquire() for _ in range(8)]
+        for start in starts:
+            limiter.release(start, overloaded=True)
+        # One decrease for the whole round of overloaded requests.
+        self.assertEqual(limiter.limit, 4)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_blocks_at_limit(self):
+        limiter = AdaptiveLimiter(initial_limit=1)
+        start = limiter.acquire()
+        acquired = threading.Event()
+        thread = threading.Thread(target=lambda: (limiter.acquire(), acquired.set()))
+        thread.start()
+        self.assertFalse(acquired.wait(0.1))
+        limiter.release(start)
+        self.assertTrue(acquired.wait(1))
+        thread.join()
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(rate=20, burst=1)
+        start = time.monotonic()
+        for _ in range(5):
+            bucket.acquire()
+        self.assertGreater(time.monotonic() - start, 0.15)
+
+
+class RpcLimiterTest(unittest.TestCase):
+    def test_retry_after(self):
+        with FakeRpcServer({'query': query}) as server:
+            server.fail_status = 429
+            server.fail_count = 2
+            server.fail_headers = {'Retry-After': "0.1"}
+            provider = near_api.providers.JsonProvider(server.url, limiter=RpcLimiter())
+            start = time.monotonic()
+            self.assertEqual(provider.get_account("a.near")['account_id'], "a.near")
+            self.assertGreater(time.monotonic() - start, 0.2)
+            self.assertEqual(provider.limiter.concurrency.limit, 2)
+
+    def test_gives_up_after_max_retries(self):
+        with FakeRpcServer({'query': query}) as server:
+            server.fail_status = 503
+            server.fail_headers = {'Retry-After': "0"}
+            provider = near_api.providers.JsonProvider(server.url, limiter=RpcLimiter(max_retries=1))
+            with self.assertRaises(near_api.providers.requests.HTTPError):
+                provider.get_account("a.near")
+            self.assertEqual(len(server.requests), 2)
+
+    def test_broadcasts_are_not_retried(self):
+        with FakeRpcServer({'broadcast_tx_async': lambda params: "hash"}) as server:
+            server.fail_status = 503
+            server.fail_count = 1
+            server.fail_headers = {'Retry-After': "0"}
+            provider = near_api.providers.JsonProvider(server.url, limiter=RpcLimiter())
+            with self.assertRaises(near_api.providers.requests.HTTPError):
+                provider.send_tx(b"tx")
+            self.assertEqual(len(server.requests), 1)
+
+    def test_method_rates_in_batches(self):
+        with FakeRpcServer({'query': query}) as server:
+            limiter = RpcLimiter(method_rates={'query': TokenBucket(rate=50, burst=5)})
+            provider = near_api.providers.JsonProvider(server.url, limiter=limiter)
+            start = time.monotonic()
+            provider.get_accounts(["a%d.near" % i for i in range(10)])
+            provider.get_accounts(["b%d.near" % i for i in range(5)])
+            self.assertGreater(time.monotonic() - start, 0.15)
+
+
+if __name__ == '__main__':
+    unittest.main()
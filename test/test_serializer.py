@@ -0,0 +1,221 @@
+import array
+import hashlib
+import os
+import pickle
+import tempfile
+import unittest
+
+import near_api
+from near_api import transactions
+from near_api.account import _open_contract_code
+from near_api.serializer import BinarySerializer, BinaryDeserializer, CompiledBinarySerializer, DeserializationError
+
+
+def all_actions():
+    pk = bytes(range(32))
+    return [
+        transactions.create_create_account_action(),
+        transactions.create_delete_account_action("beneficiary.near"),
+        transactions.create_full_access_key_action(pk),
+        transactions.create_delete_access_key_action(pk),
+        transactions.create_transfer_action(10 ** 24 + 7),
+        transactions.create_staking_action(2 ** 128 - 1, pk),
+        transactions.create_deploy_contract_action(bytes(range(256)) * 10),
+        transactions.create_function_call_action("method", b'{"a": "\xc3\xa9"}', 30 * 10 ** 12, 1),
+    ]
+
+
+def reference_signed_tx(receiver_id, nonce, actions, block_hash, signer):
+    tx = transactions.Transaction()
+    tx.signerId = signer.account_id
+    tx.publicKey = transactions.PublicKey()
+    tx.publicKey.keyType = 0
+    tx.publicKey.data = signer.public_key
+    tx.nonce = nonce
+    tx.receiverId = receiver_id
+    tx.actions = actions
+    tx.blockHash = block_hash
+    signature = transactions.Signature()
+    signature.keyType = 0
+    signature.data = signer.sign(hashlib.sha256(BinarySerializer(transactions.tx_schema).serialize(tx)).digest())
+    signed_tx = transactions.SignedTransaction()
+    signed_tx.transaction = tx
+    signed_tx.signature = signature
+    return BinarySerializer(transactions.tx_schema).serialize(signed_tx)
+
+
+class SerializerTest(unittest.TestCase):
+    def setUp(self):
+        self.signer = near_api.signer.Signer("signer.near", near_api.signer.KeyPair(bytes(range(32))))
+
+    def test_compiled_matches_interpreted(self):
+        compiled = CompiledBinarySerializer(transactions.tx_schema)
+        for action in all_actions():
+            self.assertEqual(compiled.serialize(action), BinarySerializer(transactions.tx_schema).serialize(action))
+
+    def test_sign_and_serialize_transaction(self):
+        block_hash = hashlib.sha256(b"block").digest()
+        self.assertEqual(
+            transactions.sign_and_serialize_transaction("receiver.near", 12345, all_actions(), block_hash, self.signer),
+            reference_signed_tx("receiver.near", 12345, all_actions(), block_hash, self.signer))
+
+    def test_return_types(self):
+        block_hash = hashlib.sha256(b"block").digest()
+        args = ("receiver.near", 1, all_actions(), block_hash, self.signer)
+        signed_tx, tx_hash = transactions.sign_and_hash_transaction(*args)
+        self.assertIs(type(signed_tx), bytes)
+        self.assertIs(type(transactions.sign_and_serialize_transaction(*args)), bytes)
+        self.assertIs(type(transactions.tx_serializer.serialize(all_actions()[0])), bytes)
+        self.assertIs(type(transactions.TransactionTemplate(self.signer, "receiver.near", all_actions()).sign(
+            1, block_hash)), bytes)
+        self.assertEqual(transactions.sign_and_hash_transaction_buffer(*args), (bytearray(signed_tx), tx_hash))
+
+    def test_bytes_field_from_buffer(self):
+        code = bytes(range(256)) * 100
+        expected = BinarySerializer(transactions.tx_schema).serialize(transactions.create_deploy_contract_action(code))
+        self.assertEqual(expected[1:5], len(code).to_bytes(4, 'little'))
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(code)
+        self.addCleanup(os.unlink, f.name)
+        compiled = CompiledBinarySerializer(transactions.tx_schema)
+        for contract_code in [memoryview(code), bytearray(code), f.name]:
+            with _open_contract_code(contract_code) as buffer:
+                self.assertEqual(compiled.serialize(transactions.create_deploy_contract_action(buffer)), expected)
+
+    def test_bytes_field_length_in_bytes(self):
+        words = array.array('I', range(10))
+        expected = BinarySerializer(transactions.tx_schema).serialize(
+            transactions.create_deploy_contract_action(words.tobytes()))
+        for code in [words, memoryview(words)]:
+            action = transactions.create_deploy_contract_action(code)
+            self.assertEqual(BinarySerializer(transactions.tx_schema).serialize(action), expected)
+            self.assertEqual(CompiledBinarySerializer(transactions.tx_schema).serialize(action), expected)
+
+    def test_invalid_values(self):
+        compiled = CompiledBinarySerializer(transactions.tx_schema)
+        for deposit in [-1, 2 ** 128]:
+            with self.assertRaisesRegex(ValueError, "Transfer.deposit"):
+                compiled.serialize(transactions.create_transfer_action(deposit))
+        tx = transactions.Transaction("s.near", transactions.PublicKey(bytes(32)), -1, "r.near", bytes(32), [])
+        with self.assertRaisesRegex(ValueError, "Transaction.nonce"):
+            compiled.serialize(tx)
+        with self.assertRaises(ValueError):
+            compiled.serialize(transactions.create_delete_access_key_action(b"short"))
+
+
+class TransactionClassesTest(unittest.TestCase):
+    def test_constructors_match_helpers(self):
+        pk = bytes(range(32))
+        serializer = CompiledBinarySerializer(transactions.tx_schema)
+        constructed = [
+            transactions.Action(transactions.CreateAccount()),
+            transactions.Action(transactions.DeleteAccount("beneficiary.near")),
+            transactions.Action(transactions.AddKey(
+                transactions.PublicKey(pk),
+                transactions.AccessKey(transactions.AccessKeyPermission(transactions.FullAccessPermission())))),
+            transactions.Action(transactions.DeleteKey(transactions.PublicKey(pk))),
+            transactions.Action(transactions.Transfer(10 ** 24 + 7)),
+            transactions.Action(transactions.Stake(2 ** 128 - 1, transactions.PublicKey(pk))),
+            transactions.Action(transactions.DeployContract(bytes(range(256)) * 10)),
+            transactions.Action(transactions.FunctionCall("method", b'{"a": "\xc3\xa9"}', 30 * 10 ** 12, 1)),
+        ]
+        for action, expected in zip(constructed, all_actions()):
+            self.assertEqual(action.enum, expected.enum)
+            self.assertEqual(serializer.serialize(action), serializer.serialize(expected))
+
+    def test_variants(self):
+        action = transactions.Action(transactions.Transfer(5))
+        self.assertEqual(action.enum, "transfer")
+        self.assertEqual(action.transfer.deposit, 5)
+        self.assertFalse(hasattr(action, 'functionCall'))
+        action.functionCall = transactions.FunctionCall("m", b"{}", 1, 0)
+        self.assertEqual(action.enum, "functionCall")
+        self.assertFalse(hasattr(action, 'transfer'))
+
+    def test_slots(self):
+        for action in all_actions():
+            self.assertFalse(hasattr(action, '__dict__'))
+            self.assertFalse(hasattr(action.value, '__dict__'))
+            with self.assertRaises(AttributeError):
+                action.unknown = 1
+        copy = pickle.loads(pickle.dumps(all_actions()))
+        serializer = CompiledBinarySerializer(transactions.tx_schema)
+        self.assertEqual([serializer.serialize(a) for a in copy], [serializer.serialize(a) for a in all_actions()])
+
+
+class TransactionTemplateTest(unittest.TestCase):
+    def setUp(self):
+        self.signer = near_api.signer.Signer("signer.near", near_api.signer.KeyPair(bytes(range(32))))
+
+    def test_matches_sign_and_serialize(self):
+        for actions in [all_actions(), [transactions.create_function_call_action("m", b"{}", 10 ** 13, 5)]]:
+            template = transactions.TransactionTemplate(self.signer, "receiver.near", actions)
+            for nonce in [1, 2 ** 63]:
+                block_hash = hashlib.sha256(b"%d" % nonce).digest()
+                self.assertEqual(
+                    template.sign_and_hash(nonce, block_hash),
+                    transactions.sign_and_hash_transaction("receiver.near", nonce, actions, block_hash, self.signer))
+
+    def test_deposit(self):
+        template = transactions.TransactionTemplate(
+            self.signer, "receiver.near", [transactions.create_transfer_action(1)])
+        block_hash = bytes(32)
+        self.assertEqual(
+            template.sign(3, block_hash, deposit=10 ** 24),
+            transactions.sign_and_serialize_transaction(
+                "receiver.near", 3, [transactions.create_transfer_action(10 ** 24)], block_hash, self.signer))
+        with self.assertRaises(ValueError):
+            transactions.TransactionTemplate(self.signer, "r.near", all_actions()).sign(1, block_hash, deposit=1)
+        with self.assertRaises(ValueError):
+            template.sign(3, block_hash[:31])
+
+
+class DeserializerTest(unittest.TestCase):
+    def setUp(self):
+        self.signer = near_api.signer.Signer("signer.near", near_api.signer.KeyPair(bytes(range(32))))
+        self.block_hash = hashlib.sha256(b"block").digest()
+        self.signed_tx = transactions.sign_and_serialize_transaction(
+            "receiver.near", 42, all_actions(), self.block_hash, self.signer)
+
+    def test_round_trip(self):
+        signed_tx = transactions.deserialize_signed_transaction(self.signed_tx)
+        tx = signed_tx.transaction
+        self.assertEqual(tx.signerId, "signer.near")
+        self.assertEqual(tx.receiverId, "receiver.near")
+        self.assertEqual(tx.nonce, 42)
+        self.assertEqual(tx.blockHash, self.block_hash)
+        self.assertEqual(tx.publicKey.data, self.signer.public_key)
+        self.assertEqual([action.enum for action in tx.actions], [action.enum for action in all_actions()])
+        self.assertEqual(tx.actions[4].transfer.deposit, 10 ** 24 + 7)
+        self.assertEqual(tx.actions[7].functionCall.args, b'{"a": "\xc3\xa9"}')
+        self.assertEqual(transactions.tx_serializer.serialize(signed_tx), self.signed_tx)
+
+    def test_lazy_bytes(self):
+        data = bytearray(self.signed_tx)
+        signed_tx = transactions.deserialize_signed_transaction(memoryview(data), lazy_bytes=True)
+        code = signed_tx.transaction.actions[6].deployContract.code
+        self.assertIsInstance(code, memoryview)
+        self.assertEqual(code, bytes(range(256)) * 10)
+        self.assertEqual(transactions.tx_serializer.serialize(signed_tx), self.signed_tx)
+
+    def test_option(self):
+        schema = {transactions.FunctionCallPermission: transactions.tx_schema[transactions.FunctionCallPermission]}
+        permission = transactions.FunctionCallPermission()
+        permission.receiverId = "contract.near"
+        permission.methodNames = ["a", "b"]
+        for allowance in [None, 10 ** 24]:
+            permission.allowance = allowance
+            data = CompiledBinarySerializer(schema).serialize(permission)
+            decoded = BinaryDeserializer(schema).deserialize(data, transactions.FunctionCallPermission)
+            self.assertEqual(decoded.allowance, allowance)
+            self.assertEqual(decoded.methodNames, ["a", "b"])
+
+    def test_invalid_input(self):
+        with self.assertRaises(DeserializationError):
+            transactions.deserialize_signed_transaction(self.signed_tx[:-1])
+        with self.assertRaises(DeserializationError):
+            transactions.deserialize_signed_transaction(self.signed_tx + b"\x00")
+
+
+if __name__ == '__main__':
+    unittest.main()
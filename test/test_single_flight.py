@@ -0,0 +1,76 @@
+import threading
+import unittest
+
+import near_api
+from near_api.cache import RpcCache
+from near_api.single_flight import SingleFlight
+from fake_rpc import FakeRpcServer, query
+
+
+def run_concurrently(fn, count=8):
+    results = [None] * count
+
+    def run(idx):
+        try:
+            results[idx] = fn()
+        except Exception as e:
+            results[idx] = e
+
+    threads = [threading.Thread(target=run, args=(idx,)) for idx in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class SingleFlightTest(unittest.TestCase):
+    def test_shared_result(self):
+        with FakeRpcServer({'query': query}, delay=0.2) as server:
+            provider = near_api.providers.JsonProvider(server.url, single_flight=True)
+            results = run_concurrently(lambda: provider.get_account("a.near"))
+            self.assertEqual(len(server.requests), 1)
+            self.assertEqual(results, [{'account_id': "a.near", 'amount': "1"}] * 8)
+            self.assertEqual(len({id(result) for result in results}), 8)
+            self.assertEqual(provider.single_flight.shared, 7)
+
+    def test_shared_error(self):
+        with FakeRpcServer({}, delay=0.2) as server:
+            provider = near_api.providers.JsonProvider(server.url, single_flight=True)
+            results = run_concurrently(lambda: provider.get_chunk("x"))
+            self.assertEqual(len(server.requests), 1)
+            self.assertTrue(all(isinstance(result, near_api.providers.JsonProviderError) for result in results))
+
+    def test_follower_errors_are_copies(self):
+        with FakeRpcServer({}, delay=0.2) as server:
+            provider = near_api.providers.JsonProvider(server.url, single_flight=True)
+            results = run_concurrently(lambda: provider.get_chunk("x"))
+            self.assertEqual(len({id(result) for result in results}), 8)
+            leaders = [result for result in results if result.__cause__ is None]
+            self.assertEqual(len(leaders), 1)
+            self.assertTrue(all(result.__cause__ is leaders[0] for result in results if result is not leaders[0]))
+            self.assertTrue(all(result.args == leaders[0].args for result in results))
+
+    def test_broadcasts_are_not_shared(self):
+        with FakeRpcServer({'broadcast_tx_async': lambda params: "hash"}, delay=0.2) as server:
+            provider = near_api.providers.JsonProvider(server.url, single_flight=True)
+            self.assertEqual(run_concurrently(lambda: provider.send_tx(b"tx"), 4), ["hash"] * 4)
+            self.assertEqual(len(server.requests), 4)
+            self.assertEqual(provider.single_flight.shared, 0)
+
+    def test_with_cache(self):
+        with FakeRpcServer({'query': query}, delay=0.2) as server:
+            provider = near_api.providers.JsonProvider(server.url, cache=RpcCache(), single_flight=True)
+            run_concurrently(lambda: provider.get_account("a.near"))
+            provider.get_account("a.near")
+            self.assertEqual(len(server.requests), 1)
+            self.assertEqual(provider.cache.stats()['hits'], 1)
+
+    def test_sequential_calls_are_not_shared(self):
+        flight = SingleFlight()
+        self.assertEqual([flight.do("key", lambda: idx) for idx in range(3)], [0, 1, 2])
+        self.assertEqual(flight.shared, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
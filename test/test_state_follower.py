@@ -0,0 +1,115 @@
+import base64
+import unittest
+
+import near_api
+from near_api.state_follower import StateFollower
+from fake_rpc import FakeRpcServer, RpcError
+
+
+def b64(data):
+    return base64.b64encode(data).decode('utf8')
+
+
+class FakeStateChain(object):
+    """Chain where block h sets the balance of a.near and b.near to h, except block 3 only touching b.near,
+    and key b"k" of c.near to h. Block 4 is missing."""
+
+    def __init__(self, head):
+        self.head = head
+        self.changes_requests = []
+        self.unknown_accounts = set()
+        self.state_error = False
+
+    def status(self):
+        return {'sync_info': {'earliest_block_height': 1, 'latest_block_height': self.head}}
+
+    def block(self, params):
+        return {'header': {'height': self.head, 'hash': "h%d" % self.head}}
+
+    def changes_in_block(self, params):
+        height = params['block_id']
+        if height > self.head or height == 4:
+            raise RpcError({'name': "HANDLER_ERROR", 'cause': {'name': "UNKNOWN_BLOCK"}})
+        accounts = ["b.near"] if height == 3 else ["a.near", "b.near", "c.near"]
+        return {
+            'block_hash': "h%d" % height,
+            'changes': [{'type': "account_touched", 'account_id': account_id} for account_id in accounts] +
+                       [{'type': "data_touched", 'account_id': "c.near"}],
+        }
+
+    def changes(self, params):
+        self.changes_requests.append(params)
+        height = int(params['block_id'][1:])
+        if params['changes_type'] == "account_changes":
+            return {'changes': [
+                {'type': "account_update", 'change': {'account_id': account_id, 'amount': str(height)}}
+                for account_id in params['account_ids']
+            ]}
+        return {'changes': [
+            {'type': "data_update", 'change': {'account_id': "c.near", 'key_base64': b64(b"k"),
+                                               'value_base64': b64(str(height).encode())}},
+            {'type': "data_deletion", 'change': {'account_id': "c.near", 'key_base64': b64(b"k-old")}},
+        ]}
+
+    def query(self, params):
+        if params['account_id'] in self.unknown_accounts:
+            raise RpcError({'name': "HANDLER_ERROR", 'cause': {'name': "UNKNOWN_ACCOUNT"}})
+        if params['request_type'] == "view_state" and self.state_error:
+            raise RpcError({'name': "HANDLER_ERROR", 'cause': {'name': "TOO_LARGE_CONTRACT_STATE"}})
+        if params['request_type'] == "view_account":
+            return {'amount': "0", 'block_height': params['block_id'], 'block_hash': "h%d" % params['block_id']}
+        return {'values': [{'key': b64(b"k-old"), 'value': b64(b"x")}]}
+
+
+class StateFollowerTest(unittest.TestCase):
+    def setUp(self):
+        self.chain = FakeStateChain(head=2)
+        self.server = FakeRpcServer({
+            'block': self.chain.block,
+            'EXPERIMENTAL_changes_in_block': self.chain.changes_in_block,
+            'EXPERIMENTAL_changes': self.chain.changes,
+            'query': self.chain.query,
+        }, self.chain.status)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.follower = StateFollower(near_api.providers.JsonProvider(self.server.url))
+        self.follower.subscribe_account("a.near")
+        self.follower.subscribe_data("c.near", b"k-")
+        self.follower.subscribe_data("c.near", b"k")
+
+    def test_follow_from_head(self):
+        follower = self.follower
+        # The view is loaded at the head, no block follows it yet.
+        self.assertEqual(list(follower.follow(end=3)), [])
+        self.assertEqual(follower.view.accounts, {'a.near': {'amount': "0"}})
+        self.assertEqual(follower.view.data, {'c.near': {b"k-old": b"x"}})
+        self.assertEqual((follower.view.height, follower.view.block_hash), (2, "h2"))
+
+    def test_load_errors(self):
+        follower = self.follower
+        self.chain.unknown_accounts.add("a.near")
+        follower.load(2)
+        self.assertEqual(follower.view.accounts, {})
+        self.assertEqual(follower.view.data, {'c.near': {b"k-old": b"x"}})
+        view = follower.view
+        self.chain.state_error = True
+        with self.assertRaises(near_api.providers.JsonProviderError):
+            follower.load(2)
+        self.assertIs(follower.view, view)
+
+    def test_incremental_updates(self):
+        follower = self.follower
+        self.chain.head = 6
+        blocks = list(follower.follow(start_height=2, end=7))
+        self.assertEqual([height for height, _, _ in blocks], [2, 3, 5, 6])
+        self.assertEqual([change['type'] for change in blocks[1][2]], ["data_update", "data_deletion"])
+        self.assertEqual(follower.view.accounts, {'a.near': {'amount': "6"}})
+        self.assertEqual(follower.view.data, {'c.near': {b"k": b"6"}})
+        self.assertEqual((follower.view.height, follower.view.block_hash), (6, "h6"))
+        # Only subscribed accounts are fetched, the overlapping prefix subscriptions only once.
+        self.assertTrue(all(params.get('account_ids') != ["b.near"] for params in self.chain.changes_requests))
+        self.assertEqual(len(self.chain.changes_requests), 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import json
+import unittest
+
+import near_api
+from near_api.serializer import BinaryDeserializer
+from fake_rpc import FakeRpcServer, query
+
+
+class Token:
+    pass
+
+
+token_schema = {
+    Token: {'kind': 'struct', 'fields': [['owner', 'string'], ['balance', 'u128']]},
+}
+
+
+class ViewFunctionTest(unittest.TestCase):
+    def setUp(self):
+        results = {
+            'json': json.dumps({'name': "café ☕"}).encode('utf8'),
+            'borsh': (b'\x0a\x00\x00\x00alice.near' + (10 ** 24).to_bytes(16, 'little')),
+            'u128': (7).to_bytes(16, 'little'),
+        }
+
+        def view_query(params):
+            if params['request_type'] == "call_function":
+                return {'result': list(results[params['method_name']]), 'logs': []}
+            return query(params)
+
+        self.server = FakeRpcServer({'query': view_query})
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.provider = near_api.providers.JsonProvider(self.server.url)
+        self.addCleanup(self.provider.close)
+        signer = near_api.signer.Signer("test.near", near_api.signer.KeyPair(bytes(range(32))))
+        self.account = near_api.account.Account(self.provider, signer)
+
+    def test_json_utf8(self):
+        self.assertEqual(self.account.view_function("c.near", "json")['result'], {'name': "café ☕"})
+
+    def test_raw(self):
+        result = self.account.view_function("c.near", "u128", raw=True)['result']
+        self.assertEqual(result, (7).to_bytes(16, 'little'))
+
+    def test_borsh(self):
+        deserializer = BinaryDeserializer(token_schema)
+        token = self.account.view_function_borsh("c.near", "borsh", deserializer, Token)['result']
+        self.assertEqual((token.owner, token.balance), ("alice.near", 10 ** 24))
+        self.assertEqual(self.account.view_function_borsh("c.near", "u128", deserializer, 'u128')['result'], 7)
+
+
+if __name__ == '__main__':
+    unittest.main()